@@ -0,0 +1,83 @@
+"""
+This file compares benchmark results against a stored baseline.
+
+Both files are written by a benchmark's --output option. Every metric of every
+result measured in both is listed with its relative change; a metric that got
+worse by more than --threshold, and by more than the noise floor, is a
+regression, and the exit status is 1 if there are any.
+"""
+
+import argparse
+import sys
+
+from results import Result, load_results, result_key
+from typing import Dict, List
+
+# Changes smaller than these are noise, whatever their relative size.
+_noise_floors = {"seconds": 1e-3, "peak_bytes": 64 * 1024}
+
+
+def compare(
+    baseline: List[Result], current: List[Result], threshold: float
+) -> List[str]:
+    """
+    Print the changes from baseline to current and return the regressions.
+    """
+    baseline_by_key: Dict[str, Result] = {result_key(r): r for r in baseline}
+    regressions: List[str] = []
+    for result in current:
+        key = result_key(result)
+        print(key)
+        if key not in baseline_by_key:
+            print("  (not in baseline)")
+            continue
+        old_result = baseline_by_key[key]
+        for group, metrics in sorted(result.items()):
+            if group == "params" or not isinstance(metrics, dict):
+                continue
+            old_metrics = old_result.get(group, {})
+            for metric, value in sorted(metrics.items()):
+                if metric not in old_metrics:
+                    continue
+                old = old_metrics[metric]
+                change = (value - old) / old if old else 0.0
+                name = "%s.%s" % (group, metric)
+                floor = _noise_floors.get(group, 0)
+                regressed = change > threshold and value - old > floor
+                if regressed:
+                    regressions.append("%s %s" % (key, name))
+                print(
+                    "  %-24s %12.6g %12.6g %+8.1f%%%s"
+                    % (name, old, value, change * 100, "  REGRESSION" * regressed)
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative change counted as a regression (default 0.1)",
+    )
+    args = parser.parse_args()
+    baseline = load_results(args.baseline)
+    current = load_results(args.current)
+    if baseline["suite"] != current["suite"]:
+        sys.exit(
+            "Cannot compare results of suites %s and %s"
+            % (baseline["suite"], current["suite"])
+        )
+    if baseline["environment"] != current["environment"]:
+        print("Warning: results were measured in different environments")
+    regressions = compare(baseline["results"], current["results"], args.threshold)
+    if regressions:
+        print("%d regressions" % len(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
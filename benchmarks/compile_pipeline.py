@@ -0,0 +1,256 @@
+"""
+This file benchmarks each phase of compiling Petra programs, and how they
+scale with program size.
+
+Synthetic programs are generated from four parameters: the number of
+functions, the depth of each expression, the nesting depth of blocks and the
+number of variables per function. Each phase is timed separately:
+
+  build      constructing the Petra AST, with name checks disabled
+  validate   validating every node of the AST
+  typecheck  typechecking and simplifying each Function
+  codegen    emitting the functions into an llvmlite module
+  to_llvm    converting the module to LLVM IR text
+  parse      parsing the IR with LLVM
+  optimize   running the optimization pipeline
+  jit        generating machine code with MCJIT
+
+Each parameter in turn is scaled by --scales with the others at their base
+value, giving one scaling curve per parameter. Times are the minimum over
+--repeat runs. Peak Python memory of each phase is measured with tracemalloc
+in a separate run, so that tracing doesn't slow down the timed runs; memory
+allocated inside LLVM is not included.
+
+Save results with --output and compare them to a baseline with compare.py.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import petra as pt
+
+from llvmlite import binding, ir
+from petra.expr import Expr
+from petra.function import Function
+from petra.optimize import optimize
+from petra.program import FunctionDecls
+from petra.statement import Statement
+from petra.target import create_target_machine
+from petra.type import Ftypein, Ftypeout
+from results import Result, write_results
+from typing import Callable, Dict, List, Tuple, Union
+
+Params = Dict[str, int]
+
+_base: Params = {"functions": 100, "depth": 8, "nesting": 4, "variables": 8}
+_phases = [
+    "build",
+    "validate",
+    "typecheck",
+    "codegen",
+    "to_llvm",
+    "parse",
+    "optimize",
+    "jit",
+]
+
+
+def expression(operands: List[pt.Symbol], depth: int, seed: int) -> Expr:
+    """
+    Returns a chain of depth arithmetic operations over operands.
+    """
+    ops = [pt.Add, pt.Sub, pt.Mul]
+    e: Expr = pt.Var(operands[seed % len(operands)])
+    for k in range(depth):
+        right: Expr = pt.Int32(k + 1)
+        if k % 2:
+            right = pt.Var(operands[(seed + k) % len(operands)])
+        e = ops[(seed + k) % len(ops)](e, right)
+    return e
+
+
+def function_body(x: pt.Symbol, callee: str, params: Params) -> pt.Block:
+    """
+    Returns a body defining params["variables"] variables, nested in
+    params["nesting"] ifs, and calling callee if given.
+    """
+    operands = [x]
+    statements: List[Statement] = []
+    for j in range(params["variables"]):
+        v = pt.Symbol(pt.Int32_t, "v%d" % j)
+        statements.append(pt.DefineVar(v, expression(operands, params["depth"], j)))
+        operands.append(v)
+    result: Expr = pt.Var(operands[-1])
+    if callee:
+        result = pt.Call(callee, [result])
+    block = pt.Block(statements + [pt.Return(result)])
+    for level in range(params["nesting"]):
+        predicate = pt.Lt(pt.Var(x), pt.Int32(level))
+        block = pt.Block([pt.If(predicate, block, pt.Block([])), pt.Return(pt.Var(x))])
+    return block
+
+
+def walk(
+    node: Union[Expr, Statement, pt.Block],
+    visit: Callable[[Union[Expr, Statement, pt.Block]], None],
+) -> None:
+    """
+    Call visit on node and every expression, statement and block below it.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        visit(node)
+        stack.extend(node.children())
+
+
+def run_phases(params: Params, opt_level: int, measure: Callable[..., None]) -> None:
+    """
+    Compile a program with the given parameters, calling measure(phase, f)
+    to run each phase f.
+    """
+    functypes: Dict[str, Tuple[Ftypein, Ftypeout]] = dict()
+    bodies: List[Tuple[str, pt.Symbol, pt.Block]] = []
+    functions: List[Function] = []
+    module = ir.Module(name="pipeline")
+    llvm_ir: List[str] = []
+    mods: List[binding.ModuleRef] = []
+    target_machine = create_target_machine(opt_level)
+
+    def build() -> None:
+        with pt.trusted():
+            for i in range(params["functions"]):
+                name = "f%d" % i
+                functypes[name] = ((pt.Int32_t,), pt.Int32_t)
+                x = pt.Symbol(pt.Int32_t, "x")
+                callee = "f%d" % (i - 1) if i else ""
+                bodies.append((name, x, function_body(x, callee, params)))
+
+    def validate() -> None:
+        for _, _, block in bodies:
+            walk(block, lambda node: node.validate())
+
+    def typecheck() -> None:
+        for name, x, block in bodies:
+            functions.append(Function(name, (x,), pt.Int32_t, block, functypes))
+
+    def codegen() -> None:
+        funcs = FunctionDecls(module, functypes)
+        for func in functions:
+            func.codegen(module, funcs)
+
+    def to_llvm() -> None:
+        llvm_ir.append(str(module))
+
+    def parse() -> None:
+        mods.append(binding.parse_assembly(llvm_ir[0]))
+
+    def optimize_module() -> None:
+        optimize(mods[0], target_machine, opt_level)
+
+    def jit() -> None:
+        engine = binding.create_mcjit_compiler(mods[0], target_machine)
+        engine.finalize_object()
+
+    for phase, f in zip(
+        _phases,
+        [build, validate, typecheck, codegen, to_llvm, parse, optimize_module, jit],
+    ):
+        measure(phase, f)
+
+
+def time_phases(params: Params, opt_level: int) -> Dict[str, float]:
+    seconds: Dict[str, float] = dict()
+
+    def measure(phase: str, f: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        f()
+        seconds[phase] = time.perf_counter() - start
+
+    run_phases(params, opt_level, measure)
+    return seconds
+
+
+def trace_phases(params: Params, opt_level: int) -> Dict[str, int]:
+    """
+    Returns the peak Python memory allocated by each phase, in bytes.
+    """
+    peak_bytes: Dict[str, int] = dict()
+
+    def measure(phase: str, f: Callable[[], None]) -> None:
+        tracemalloc.start()
+        try:
+            f()
+            peak_bytes[phase] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    run_phases(params, opt_level, measure)
+    return peak_bytes
+
+
+def benchmark(params: Params, opt_level: int, repeat: int, memory: bool) -> Result:
+    seconds: Dict[str, float] = dict()
+    for _ in range(repeat):
+        gc.collect()
+        for phase, t in time_phases(params, opt_level).items():
+            seconds[phase] = min(seconds.get(phase, t), t)
+    seconds["total"] = sum(seconds.values())
+    result: Result = {
+        "name": "pipeline",
+        "params": dict(params, opt_level=opt_level),
+        "seconds": seconds,
+    }
+    if memory:
+        gc.collect()
+        result["peak_bytes"] = trace_phases(params, opt_level)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    for name, value in _base.items():
+        parser.add_argument("--%s" % name, type=int, default=value)
+    parser.add_argument(
+        "--sweep",
+        nargs="*",
+        choices=list(_base),
+        default=list(_base),
+        help="parameters to scale, one at a time (default all)",
+    )
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--opt-level", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    base = {name: getattr(args, name) for name in _base}
+    configs = [dict(base)]
+    for name in args.sweep:
+        for scale in args.scales:
+            params = dict(base, **{name: base[name] * scale})
+            if params not in configs:
+                configs.append(params)
+
+    print("%-44s" % "parameters" + "".join("%10s" % p for p in _phases + ["total"]))
+    results: List[Result] = []
+    for params in configs:
+        result = benchmark(params, args.opt_level, args.repeat, not args.no_memory)
+        results.append(result)
+        label = " ".join("%s=%d" % item for item in params.items())
+        seconds = result["seconds"]
+        print(
+            "%-44s" % label
+            + "".join("%10.4f" % seconds[p] for p in _phases + ["total"])
+        )
+    if args.output:
+        write_results(args.output, "compile_pipeline", results)
+
+
+if __name__ == "__main__":
+    main()
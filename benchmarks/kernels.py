@@ -0,0 +1,485 @@
+"""
+This file benchmarks the code Petra generates, running kernels built from
+Petra's constructs next to NumPy and C implementations of the same kernels.
+
+  collatz  total Collatz steps of 1..n, calling the recursive collatz of
+           examples/collatz.py
+  sqrt     elementwise sqrtf over a Float32 buffer, as in examples/sqrt.py
+  points   sum of x * y over an array of structs, loaded through pointers
+  axpy     y = a * x + y over Float64 buffers, updating y in place
+  sum      sum of an Int64 buffer
+
+Each kernel is JIT-compiled with Program.compile() at each --opt-levels
+setting and called once per run over the whole input. The C versions are
+compiled with the system C compiler, and are skipped if there isn't one. NumPy
+is needed to make the inputs and for the NumPy versions. Each implementation is
+run --warmup times, then timed over --repeat runs, and its result checked
+against the first implementation's.
+
+Save results with --output and compare them to a baseline with compare.py.
+"""
+
+import argparse
+import ctypes
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+import petra as pt
+
+from petra.native import ctype
+from petra.statement import Statement
+from results import Result, write_results
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+Point_t = pt.StructType({"x": pt.Int64_t, "y": pt.Int64_t})
+
+_c_source = r"""
+#include <math.h>
+#include <stdint.h>
+
+struct point { int64_t x, y; };
+
+static int32_t collatz(int32_t n) {
+  if (n == 1) return 0;
+  if (n % 2 == 0) n = n / 2; else n = 3 * n + 1;
+  return 1 + collatz(n);
+}
+
+int32_t collatz_total(int32_t n) {
+  int32_t total = 0;
+  for (int32_t i = 1; i <= n; i++) total += collatz(i);
+  return total;
+}
+
+void sqrt_all(const float *x, float *out, int64_t n) {
+  for (int64_t i = 0; i < n; i++) out[i] = sqrtf(x[i]);
+}
+
+int64_t points(const struct point *p, int64_t n) {
+  int64_t total = 0;
+  for (int64_t i = 0; i < n; i++) total += p[i].x * p[i].y;
+  return total;
+}
+
+void axpy(double a, const double *x, double *y, int64_t n) {
+  for (int64_t i = 0; i < n; i++) y[i] = a * x[i] + y[i];
+}
+
+int64_t sum(const int64_t *x, int64_t n) {
+  int64_t total = 0;
+  for (int64_t i = 0; i < n; i++) total += x[i];
+  return total;
+}
+"""
+
+
+def loop(i: pt.Symbol, n: pt.Symbol, start: int, statements: List[Statement]) -> pt.For:
+    """
+    Returns a loop running statements for i from start up to n - 1.
+    """
+    t = i.get_type()
+    assert isinstance(t, pt.type.IntType)
+    return pt.For(
+        i,
+        pt.constant.Constant(start, t),
+        pt.Var(n),
+        pt.constant.Constant(1, t),
+        pt.Block(statements),
+    )
+
+
+def at(ptr: pt.Symbol, i: pt.Symbol) -> pt.Deref:
+    return pt.Deref(pt.Offset(pt.Var(ptr), pt.Var(i)))
+
+
+def petra_program() -> pt.Program:
+    program = pt.Program("kernels")
+    Float32_p = pt.PointerType(pt.Float32_t)
+    Float64_p = pt.PointerType(pt.Float64_t)
+    Int64_p = pt.PointerType(pt.Int64_t)
+    Point_p = pt.PointerType(Point_t)
+
+    # examples/collatz.py
+    n32 = pt.Symbol(pt.Int32_t, "n")
+    program.add_func(
+        "collatz",
+        (n32,),
+        pt.Int32_t,
+        pt.Block(
+            [
+                pt.If(
+                    pt.Eq(pt.Var(n32), pt.Int32(1)),
+                    pt.Block([pt.Return(pt.Int32(0))]),
+                    pt.Block([]),
+                ),
+                pt.If(
+                    pt.Eq(pt.Mod(pt.Var(n32), pt.Int32(2)), pt.Int32(0)),
+                    pt.Block(
+                        [pt.Assign(pt.Var(n32), pt.Div(pt.Var(n32), pt.Int32(2)))]
+                    ),
+                    pt.Block(
+                        [
+                            pt.Assign(
+                                pt.Var(n32),
+                                pt.Add(pt.Mul(pt.Int32(3), pt.Var(n32)), pt.Int32(1)),
+                            )
+                        ]
+                    ),
+                ),
+                pt.Return(pt.Add(pt.Int32(1), pt.Call("collatz", [pt.Var(n32)]))),
+            ]
+        ),
+    )
+    i32 = pt.Symbol(pt.Int32_t, "i")
+    total32 = pt.Symbol(pt.Int32_t, "total")
+    # The loop runs up to n inclusive.
+    n32_end = pt.Symbol(pt.Int32_t, "end")
+    program.add_func(
+        "collatz_total",
+        (n32,),
+        pt.Int32_t,
+        pt.Block(
+            [
+                pt.DefineVar(total32, pt.Int32(0)),
+                pt.DefineVar(n32_end, pt.Add(pt.Var(n32), pt.Int32(1))),
+                loop(
+                    i32,
+                    n32_end,
+                    1,
+                    [
+                        pt.Assign(
+                            pt.Var(total32),
+                            pt.Add(pt.Var(total32), pt.Call("collatz", [pt.Var(i32)])),
+                        )
+                    ],
+                ),
+                pt.Return(pt.Var(total32)),
+            ]
+        ),
+    )
+
+    # examples/sqrt.py
+    program.add_func_decl("sqrtf", (pt.Float32_t,), pt.Float32_t)
+    x32 = pt.Symbol(Float32_p, "x")
+    out32 = pt.Symbol(Float32_p, "out")
+    i = pt.Symbol(pt.Int64_t, "i")
+    n = pt.Symbol(pt.Int64_t, "n")
+    program.add_func(
+        "sqrt_all",
+        (x32, out32, n),
+        (),
+        pt.Block(
+            [
+                loop(
+                    i,
+                    n,
+                    0,
+                    [
+                        pt.Store(
+                            pt.Offset(pt.Var(out32), pt.Var(i)),
+                            pt.Call("sqrtf", [at(x32, i)]),
+                        )
+                    ],
+                ),
+                pt.Return(()),
+            ]
+        ),
+    )
+
+    # Structs, as in tests/test_structs.py, through pointers.
+    p = pt.Symbol(Point_p, "p")
+    point = pt.Symbol(Point_t, "point")
+    total = pt.Symbol(pt.Int64_t, "total")
+    program.add_func(
+        "points",
+        (p, n),
+        pt.Int64_t,
+        pt.Block(
+            [
+                pt.DefineVar(total, pt.Int64(0)),
+                loop(
+                    i,
+                    n,
+                    0,
+                    [
+                        pt.DefineVar(point, at(p, i)),
+                        pt.Assign(
+                            pt.Var(total),
+                            pt.Add(
+                                pt.Var(total),
+                                pt.Mul(
+                                    pt.GetElement(pt.Var(point), 0),
+                                    pt.GetElement(pt.Var(point), 1),
+                                ),
+                            ),
+                        ),
+                    ],
+                ),
+                pt.Return(pt.Var(total)),
+            ]
+        ),
+    )
+
+    # Pointer loops, as in tests/test_pointers.py.
+    a = pt.Symbol(pt.Float64_t, "a")
+    x64 = pt.Symbol(Float64_p, "x")
+    y64 = pt.Symbol(Float64_p, "y")
+    program.add_func(
+        "axpy",
+        (a, x64, y64, n),
+        (),
+        pt.Block(
+            [
+                loop(
+                    i,
+                    n,
+                    0,
+                    [
+                        pt.Store(
+                            pt.Offset(pt.Var(y64), pt.Var(i)),
+                            pt.Add(pt.Mul(pt.Var(a), at(x64, i)), at(y64, i)),
+                        )
+                    ],
+                ),
+                pt.Return(()),
+            ]
+        ),
+    )
+    xi = pt.Symbol(Int64_p, "x")
+    program.add_func(
+        "sum",
+        (xi, n),
+        pt.Int64_t,
+        pt.Block(
+            [
+                pt.DefineVar(total, pt.Int64(0)),
+                loop(
+                    i,
+                    n,
+                    0,
+                    [pt.Assign(pt.Var(total), pt.Add(pt.Var(total), at(xi, i)))],
+                ),
+                pt.Return(pt.Var(total)),
+            ]
+        ),
+    )
+    return program
+
+
+def c_library(directory: str, cflags: List[str]) -> Optional[ctypes.CDLL]:
+    """
+    Returns the C kernels compiled into a shared library, or None if there is
+    no C compiler.
+    """
+    cc = os.environ.get("CC", "cc")
+    if shutil.which(cc) is None:
+        return None
+    source = os.path.join(directory, "kernels.c")
+    library = os.path.join(directory, "kernels.so")
+    with open(source, "w") as f:
+        f.write(_c_source)
+    subprocess.check_call(
+        [cc] + cflags + ["-shared", "-fPIC", source, "-o", library, "-lm"]
+    )
+    lib = ctypes.CDLL(library)
+    Float32_p = ctypes.POINTER(ctypes.c_float)
+    Float64_p = ctypes.POINTER(ctypes.c_double)
+    Int64_p = ctypes.POINTER(ctypes.c_int64)
+    prototypes: Dict[str, Tuple[object, List[object]]] = {
+        "collatz_total": (ctypes.c_int32, [ctypes.c_int32]),
+        "sqrt_all": (None, [Float32_p, Float32_p, ctypes.c_int64]),
+        "points": (ctypes.c_int64, [ctypes.POINTER(ctype(Point_t)), ctypes.c_int64]),
+        "axpy": (None, [ctypes.c_double, Float64_p, Float64_p, ctypes.c_int64]),
+        "sum": (ctypes.c_int64, [Int64_p, ctypes.c_int64]),
+    }
+    for name, (restype, argtypes) in prototypes.items():
+        getattr(lib, name).restype = restype
+        getattr(lib, name).argtypes = argtypes
+    return lib
+
+
+def pointer(array: object, t: pt.type.Type) -> object:
+    """
+    Returns a ctypes pointer to the data of a NumPy array.
+    """
+    return array.ctypes.data_as(ctypes.POINTER(ctype(t)))  # type: ignore
+
+
+# A kernel's implementations by name, each running it and returning its result.
+Implementations = Dict[str, Callable[[], object]]
+
+
+def kernels(
+    size: int, functions: Dict[str, Dict[str, Callable[..., object]]]
+) -> Dict[str, Tuple[int, Implementations]]:
+    """
+    Returns the number of elements and the implementations of each kernel,
+    given the native functions of each implementation by kernel name.
+    """
+    result: Dict[str, Tuple[int, Implementations]] = dict()
+    rng = numpy.random.default_rng(0)
+
+    def implementations(
+        name: str, args: Callable[[Callable[..., object]], object]
+    ) -> Implementations:
+        return {
+            impl: (lambda f=funcs[name]: args(f))  # type: ignore
+            for impl, funcs in functions.items()
+        }
+
+    collatz_n = max(1, size // 10)
+    result["collatz"] = (
+        collatz_n,
+        implementations("collatz_total", lambda f: f(collatz_n)),
+    )
+
+    x32 = rng.random(size, dtype=numpy.float32)
+    out32 = numpy.empty_like(x32)
+
+    def sqrt_all(f: Callable[..., object]) -> object:
+        f(pointer(x32, pt.Float32_t), pointer(out32, pt.Float32_t), size)
+        return out32.copy()
+
+    result["sqrt"] = (size, implementations("sqrt_all", sqrt_all))
+
+    points = numpy.zeros(size, dtype=[("x", numpy.int64), ("y", numpy.int64)])
+    points["x"] = rng.integers(-1000, 1000, size)
+    points["y"] = rng.integers(-1000, 1000, size)
+    result["points"] = (
+        size,
+        implementations("points", lambda f: f(pointer(points, Point_t), size)),
+    )
+
+    x64 = rng.random(size)
+    y64 = rng.random(size)
+
+    def axpy(f: Callable[..., object]) -> object:
+        y = y64.copy()
+        f(2.5, pointer(x64, pt.Float64_t), pointer(y, pt.Float64_t), size)
+        return y
+
+    result["axpy"] = (size, implementations("axpy", axpy))
+
+    xi = rng.integers(-1000, 1000, size)
+    result["sum"] = (
+        size,
+        implementations("sum", lambda f: f(pointer(xi, pt.Int64_t), size)),
+    )
+
+    result["collatz"][1]["numpy"] = lambda: numpy_collatz_total(collatz_n)
+    result["sqrt"][1]["numpy"] = lambda: numpy.sqrt(x32, out=out32).copy()
+    result["points"][1]["numpy"] = lambda: int(numpy.dot(points["x"], points["y"]))
+    # Like the others, this copies y so every run starts from the same y.
+    result["axpy"][1]["numpy"] = lambda: numpy.add(2.5 * x64, y64.copy())
+    result["sum"][1]["numpy"] = lambda: int(xi.sum())
+    return result
+
+
+def numpy_collatz_total(n: int) -> int:
+    values = numpy.arange(1, n + 1, dtype=numpy.int64)
+    total = 0
+    while values.size:
+        values = values[values != 1]
+        total += values.size
+        even = values % 2 == 0
+        values = numpy.where(even, values // 2, 3 * values + 1)
+    return total
+
+
+def time_runs(f: Callable[[], object], warmup: int, repeat: int) -> List[float]:
+    for _ in range(warmup):
+        f()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def same(a: object, b: object) -> bool:
+    if numpy is not None and isinstance(a, numpy.ndarray):
+        return bool(numpy.allclose(a, b))
+    return a == b
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--opt-levels", type=int, nargs="+", default=[0, 1, 2, 3])
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cflags", default="-O2 -march=native")
+    parser.add_argument(
+        "--kernels", nargs="+", choices=["collatz", "sqrt", "points", "axpy", "sum"]
+    )
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+    if numpy is None:
+        parser.error("the kernel benchmarks need NumPy for their inputs")
+
+    program = petra_program()
+    names = ["collatz_total", "sqrt_all", "points", "axpy", "sum"]
+    functions: Dict[str, Dict[str, Callable[..., object]]] = dict()
+    for opt_level in args.opt_levels:
+        functions["petra-O%d" % opt_level] = {
+            name: program.get_callable(name, opt_level=opt_level) for name in names
+        }
+    with tempfile.TemporaryDirectory() as directory:
+        lib = c_library(directory, args.cflags.split())
+        if lib is not None:
+            functions["c"] = {name: getattr(lib, name) for name in names}
+        else:
+            print("No C compiler found; skipping the C kernels")
+
+        results: List[Result] = []
+        print(
+            "%-8s %-10s %10s %12s %10s"
+            % ("kernel", "impl", "seconds", "Melem/s", "vs C")
+        )
+        for kernel, (n, impls) in kernels(args.size, functions).items():
+            if args.kernels and kernel not in args.kernels:
+                continue
+            expected: object = None
+            best: Dict[str, float] = dict()
+            for impl, f in impls.items():
+                value = f()
+                if expected is None:
+                    expected = value
+                elif not same(value, expected):
+                    raise Exception("%s of %s gave a different result" % (impl, kernel))
+                times = time_runs(f, args.warmup, args.repeat)
+                best[impl] = min(times)
+                results.append(
+                    {
+                        "name": kernel,
+                        "params": {"impl": impl, "n": n},
+                        "seconds": {
+                            "min": min(times),
+                            "median": statistics.median(times),
+                        },
+                    }
+                )
+            for impl, seconds in best.items():
+                relative = "%9.2fx" % (seconds / best["c"]) if "c" in best else ""
+                print(
+                    "%-8s %-10s %10.5f %12.1f %10s"
+                    % (kernel, impl, seconds, n / seconds / 1e6, relative)
+                )
+    if args.output:
+        write_results(args.output, "kernels", results)
+
+
+if __name__ == "__main__":
+    main()
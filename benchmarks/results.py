@@ -0,0 +1,63 @@
+"""
+This file defines the machine-readable results shared by the benchmarks.
+
+Results are JSON objects holding the suite name, a description of the
+machine they were measured on, and a list of results. Each result has a
+name, the parameters it was measured with, and groups of metrics, e.g.
+"seconds" or "peak_bytes", mapping metric names to numbers where lower is
+better. compare.py compares two such files.
+"""
+
+import json
+import platform
+import sys
+
+import llvmlite
+
+from typing import Any, Dict, List
+
+Result = Dict[str, Any]
+
+
+def environment() -> Dict[str, str]:
+    """
+    Returns a description of the machine and software measured on.
+    """
+    from llvmlite import binding
+
+    return {
+        "python": platform.python_version(),
+        "llvmlite": llvmlite.__version__,
+        "llvm": ".".join(str(v) for v in binding.llvm_version_info),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def write_results(path: str, suite: str, results: List[Result]) -> None:
+    """
+    Write results to path, or to standard output if path is "-".
+    """
+    data = {"suite": suite, "environment": environment(), "results": results}
+    text = json.dumps(data, indent=2, sort_keys=True) + "\n"
+    if path == "-":
+        sys.stdout.write(text)
+    else:
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        data: Dict[str, Any] = json.load(f)
+    return data
+
+
+def result_key(result: Result) -> str:
+    """
+    Returns a key identifying what a result measured, for matching results
+    across runs.
+    """
+    params = ",".join("%s=%s" % item for item in sorted(result["params"].items()))
+    return "%s(%s)" % (result["name"], params)
@@ -0,0 +1,69 @@
+"""
+This file benchmarks how typechecking scales with the number of functions in a
+program and the nesting depth of their blocks.
+
+Each function sums its argument through a chain of nested ifs and calls the
+previous function, so every block is entered once per level. Typechecking time
+per function should stay flat as the program grows.
+"""
+
+import argparse
+import time
+
+import petra as pt
+
+from petra.expr import Expr
+from petra.function import Function
+from petra.type import Ftypein, Ftypeout
+from typing import Dict, List, Tuple
+
+
+def nested_body(x: pt.Symbol, depth: int, callee: str) -> pt.Block:
+    value: Expr = pt.Var(x)
+    if callee:
+        value = pt.Call(callee, [pt.Var(x)])
+    block = pt.Block([pt.Return(value)])
+    for level in range(depth):
+        y = pt.Symbol(pt.Int32_t, "y%s" % level)
+        block = pt.Block(
+            [
+                pt.DefineVar(y, pt.Add(pt.Var(x), pt.Int32(level))),
+                pt.If(pt.Lt(pt.Var(y), pt.Int32(0)), block, pt.Block([])),
+                pt.Return(pt.Var(y)),
+            ]
+        )
+    return block
+
+
+def typecheck_time(functions: int, depth: int) -> float:
+    """
+    Returns the seconds taken to typecheck a program of the given size.
+    """
+    functypes: Dict[str, Tuple[Ftypein, Ftypeout]] = dict()
+    bodies: List[Tuple[str, pt.Symbol, pt.Block]] = []
+    for i in range(functions):
+        name = "f%s" % i
+        functypes[name] = ((pt.Int32_t,), pt.Int32_t)
+        x = pt.Symbol(pt.Int32_t, "x")
+        bodies.append((name, x, nested_body(x, depth, "f%s" % (i - 1) if i else "")))
+    start = time.perf_counter()
+    for name, x, block in bodies:
+        Function(name, (x,), pt.Int32_t, block, functypes)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depth", type=int, default=16)
+    parser.add_argument(
+        "--functions", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000]
+    )
+    args = parser.parse_args()
+    print("%10s %12s %16s" % ("functions", "seconds", "us per function"))
+    for functions in args.functions:
+        seconds = typecheck_time(functions, args.depth)
+        print("%10d %12.4f %16.1f" % (functions, seconds, seconds / functions * 1e6))
+
+
+if __name__ == "__main__":
+    main()
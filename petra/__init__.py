@@ -4,17 +4,21 @@ This package defines the Petra library.
 
 from .arithmetic import Add, Sub, Mul, Div, Mod
 from .block import Block
+from .cache import ObjectCache
 from .call import Call
-from .conditionals import If, While
-from .dereference import Deref
+from .conditionals import For, If, While
+from .dereference import Deref, ElementPtr, FieldPtr, Offset, Store
 from .aggregate import GetElement, SetElement
-from .constant import Bool, Float32, Float64, Int8, Int16, Int32, Int64
+from .constant import Bool, Float32, Float64, Int8, Int16, Int32, Int64, Vector
 from .expr import Var
+from .profile import Profile
 from .program import Program
-from .statement import Assign, DefineVar, Return
+from .stats import CompileStats
+from .statement import Assign, DefineVar, Return, record_locations
 from .symbol import Symbol
-from .validate import ValidateError
+from .validate import ValidateError, trusted
 from .truth import And, Eq, Gt, Gte, Lt, Lte, Neq, Not, Or
+from .vector import ExtractLane, InsertLane, Shuffle, Splat, VectorLoad, VectorStore
 from .type import (
     Bool_t,
     Float32_t,
@@ -26,5 +30,6 @@ from .type import (
     PointerType,
     StructType,
     ArrayType,
+    VectorType,
 )
 from .typecheck import TypeCheckError
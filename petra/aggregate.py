@@ -6,7 +6,7 @@ import re
 
 from abc import ABC, abstractmethod
 from llvmlite import ir
-from typing import Optional, Dict
+from typing import Optional, Dict, Sequence
 
 from .codegen import CodegenContext
 from .validate import ValidateError
@@ -58,6 +58,9 @@ class GetElement(Expr):
         assert self.idx is not None
         return builder.extract_value(struct, self.idx)
 
+    def children(self) -> Sequence[Expr]:
+        return [self.struct]
+
 
 class SetElement(Expr):
     """
@@ -100,3 +103,6 @@ class SetElement(Expr):
         value = self.value.codegen(builder, ctx)
         assert self.idx is not None
         return builder.insert_value(struct, value, self.idx)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.struct, self.value]
@@ -3,23 +3,84 @@ This file defines Petra arithmetic.
 """
 
 from llvmlite import ir
-from typing import Optional
+from typing import Callable, Dict, Optional, Sequence
 
 from .codegen import CodegenContext
+from .constant import Constant, int_value
 from .expr import Expr
-from .type import Int8_t, Int16_t, Int32_t, Int64_t, Type
+from .simplify import SimplifyContext, replace, wrap
+from .type import (
+    FloatType,
+    Int8_t,
+    Int16_t,
+    Int32_t,
+    Int64_t,
+    IntType,
+    Type,
+    VectorType,
+)
 from .typecheck import TypeContext, TypeCheckError
+from .validate import validate_fastmath
+
+# Floating point instructions for each integer instruction.
+_FloatOp = Callable[[ir.IRBuilder, ir.Value, ir.Value, Sequence[str]], ir.Value]
+
+_float_ops: Dict[str, _FloatOp] = {
+    "add": lambda builder, l, r, flags: builder.fadd(l, r, flags=flags),
+    "sub": lambda builder, l, r, flags: builder.fsub(l, r, flags=flags),
+    "mul": lambda builder, l, r, flags: builder.fmul(l, r, flags=flags),
+    "sdiv": lambda builder, l, r, flags: builder.fdiv(l, r, flags=flags),
+    "srem": lambda builder, l, r, flags: builder.frem(l, r, flags=flags),
+}
+
+
+def is_float(t: Type) -> bool:
+    """
+    Returns whether t is a floating point type or vector of them.
+    """
+    if isinstance(t, VectorType):
+        t = t.element
+    return isinstance(t, FloatType)
+
+
+def _fold(op: str, left: int, right: int, bits: int) -> Optional[int]:
+    """
+    Returns the result of the operation as LLVM computes it, or None if it is
+    undefined.
+    """
+    if op == "add":
+        return wrap(left + right, bits)
+    if op == "sub":
+        return wrap(left - right, bits)
+    if op == "mul":
+        return wrap(left * right, bits)
+    # Division by zero and overflowing division are undefined.
+    if right == 0 or (left == -(1 << (bits - 1)) and right == -1):
+        return None
+    # Signed division rounds towards zero and the remainder takes the sign of
+    # the dividend, unlike Python's // and %.
+    quotient = abs(left) // abs(right)
+    if (left < 0) != (right < 0):
+        quotient = -quotient
+    if op == "sdiv":
+        return quotient
+    assert op == "srem"
+    return left - quotient * right
 
 
 class ArithmeticBinop(Expr):
     """
     A Petra binary operation of two arithmetic expressions.
+
+    Floating point operations carry the LLVM fast-math flags given in
+    fastmath, in addition to those of the enclosing function.
     """
 
-    def __init__(self, left: Expr, right: Expr, op: str):
+    def __init__(self, left: Expr, right: Expr, op: str, fastmath: Sequence[str] = ()):
         self.left = left
         self.right = right
         self.op = op
+        self.fastmath = tuple(fastmath)
         self.t: Optional[Type] = None
         self.validate()
 
@@ -29,8 +90,7 @@ class ArithmeticBinop(Expr):
         raise Exception("Expected type to exist - was typecheck called?")
 
     def validate(self) -> None:
-        self.left.validate()
-        self.right.validate()
+        validate_fastmath(self.fastmath)
 
     def typecheck(self, ctx: TypeContext) -> None:
         self.left.typecheck(ctx)
@@ -45,6 +105,15 @@ class ArithmeticBinop(Expr):
             self.t = Int32_t
         elif (t_left, t_right) == (Int64_t, Int64_t):
             self.t = Int64_t
+        elif t_left == t_right and isinstance(t_left, FloatType):
+            self.t = t_left
+        elif (
+            t_left == t_right
+            and isinstance(t_left, VectorType)
+            and isinstance(t_left.element, (IntType, FloatType))
+        ):
+            # Vectors are operated on elementwise.
+            self.t = t_left
         else:
             raise TypeCheckError(
                 "Incompatible types for arithmetic binary operation: %s and %s"
@@ -54,17 +123,48 @@ class ArithmeticBinop(Expr):
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
         left = self.left.codegen(builder, ctx)
         right = self.right.codegen(builder, ctx)
+        if is_float(self.get_type()):
+            flags = ctx.fastmath_flags(self.fastmath)
+            return _float_ops[self.op](builder, left, right, flags)
         # FIXME: figure out a way to be able to type check this
         return getattr(builder, self.op)(left, right)  # type: ignore
 
+    def children(self) -> Sequence[Expr]:
+        return [self.left, self.right]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        node = replace(
+            self, left=self.left.simplify(ctx), right=self.right.simplify(ctx)
+        )
+        t = node.get_type()
+        if not isinstance(t, IntType):
+            return node
+        left, right = int_value(node.left), int_value(node.right)
+        if left is not None and right is not None:
+            value = _fold(node.op, left, right, t.bits)
+            if value is not None:
+                ctx.removed += 2
+                return Constant(value, t)
+        # Identities: x + 0, 0 + x, x - 0, x * 1, 1 * x and x / 1.
+        if right == 0 and node.op in ("add", "sub"):
+            ctx.removed += 2
+            return node.left
+        if right == 1 and node.op in ("mul", "sdiv"):
+            ctx.removed += 2
+            return node.left
+        if (left, node.op) in ((0, "add"), (1, "mul")):
+            ctx.removed += 2
+            return node.right
+        return node
+
 
 class Add(ArithmeticBinop):
     """
     Addition operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, "add")
+    def __init__(self, left: Expr, right: Expr, fastmath: Sequence[str] = ()):
+        super().__init__(left, right, "add", fastmath)
 
 
 class Sub(ArithmeticBinop):
@@ -72,8 +172,8 @@ class Sub(ArithmeticBinop):
     Subtraction operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, "sub")
+    def __init__(self, left: Expr, right: Expr, fastmath: Sequence[str] = ()):
+        super().__init__(left, right, "sub", fastmath)
 
 
 class Mul(ArithmeticBinop):
@@ -81,8 +181,8 @@ class Mul(ArithmeticBinop):
     Multiplication operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, "mul")
+    def __init__(self, left: Expr, right: Expr, fastmath: Sequence[str] = ()):
+        super().__init__(left, right, "mul", fastmath)
 
 
 class Div(ArithmeticBinop):
@@ -90,8 +190,8 @@ class Div(ArithmeticBinop):
     Division operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, "sdiv")
+    def __init__(self, left: Expr, right: Expr, fastmath: Sequence[str] = ()):
+        super().__init__(left, right, "sdiv", fastmath)
 
 
 class Mod(ArithmeticBinop):
@@ -99,5 +199,5 @@ class Mod(ArithmeticBinop):
     Modulus operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, "srem")
+    def __init__(self, left: Expr, right: Expr, fastmath: Sequence[str] = ()):
+        super().__init__(left, right, "srem", fastmath)
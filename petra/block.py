@@ -3,12 +3,13 @@ This file defines Petra blocks.
 """
 
 from llvmlite import ir
-from typing import List, Union
+from typing import List, Sequence, Union
 
 from .codegen import CodegenContext
 from .expr import Expr
-from .statement import Return, Statement
-from .validate import ValidateError
+from .simplify import SimplifyContext, replace
+from .statement import DefineVar, Return, Statement
+from .validate import ValidateError, is_trusted
 from .typecheck import TypeContext
 
 
@@ -25,9 +26,10 @@ class Block(object):
         # TODO: This needs to be updated to take branching logic into account.
         # It can be viewed as a DAG where every path must end in a return with
         # nothing after.
+        if is_trusted():
+            return
         found_return = False
         for statement in self.statements:
-            statement.validate()
             if found_return:
                 raise ValidateError("Found inaccessible statement.")
             if isinstance(statement, Return):
@@ -39,4 +41,81 @@ class Block(object):
 
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> None:
         for statement in self.statements:
+            if (
+                ctx.subprogram is not None
+                and isinstance(statement, Statement)
+                and statement.location is not None
+            ):
+                ctx.locate(builder, statement.location)
             statement.codegen(builder, ctx)
+        # End the lifetimes of the variables defined in the block, unless it
+        # returned.
+        if builder.block.is_terminated:
+            return
+        for statement in self.statements:
+            if isinstance(statement, DefineVar):
+                ctx.lifetime_end(builder, ctx.vars[statement.symbol])
+
+    def children(self) -> Sequence[Union[Expr, Statement]]:
+        return self.statements
+
+    def simplify(self, ctx: SimplifyContext) -> "Block":
+        """
+        Returns the equivalent block to use in place of self.
+        """
+        statements: List[Union[Expr, Statement]] = []
+        remaining = iter(self.statements)
+        returned = False
+        for statement in remaining:
+            simplified: List[Union[Expr, Statement]]
+            if isinstance(statement, Expr):
+                simplified = [statement.simplify(ctx)]
+            else:
+                simplified = statement.simplify(ctx)
+            for s in simplified:
+                # Statements after a return, e.g. in a pruned branch, are dead.
+                if returned:
+                    ctx.discard(s)
+                else:
+                    statements.append(s)
+                    returned = _returns(s)
+            if returned:
+                break
+        for statement in remaining:
+            ctx.discard(statement)
+        return replace(self, statements=statements)
+
+
+class NestedBlock(Statement):
+    """
+    A nested block whose variables are local to it. Simplification replaces
+    an if with a constant predicate by a scope holding the branch taken.
+    """
+
+    def __init__(self, block: Block):
+        self.block = block
+        self.validate()
+
+    def validate(self) -> None:
+        pass
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.block.typecheck(ctx.child())
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> None:
+        self.block.codegen(builder, ctx)
+
+    def children(self) -> Sequence[Block]:
+        return [self.block]
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, Statement]]:
+        return [replace(self, block=self.block.simplify(ctx))]
+
+
+def _returns(statement: Union[Expr, Statement]) -> bool:
+    """
+    Returns whether statement always returns, as far as simplification knows.
+    """
+    if isinstance(statement, NestedBlock):
+        return any(_returns(s) for s in statement.block.statements)
+    return isinstance(statement, Return)
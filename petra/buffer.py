@@ -0,0 +1,150 @@
+"""
+This file defines zero-copy access to objects supporting the buffer protocol.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import struct
+import sys
+
+from types import TracebackType
+from typing import Callable, Optional, Tuple, Type as PyType, cast
+
+from .type import BoolType, FloatType, IntType, Type
+
+
+class _Py_buffer(ctypes.Structure):
+    _fields_ = [
+        ("buf", ctypes.c_void_p),
+        ("obj", ctypes.c_void_p),
+        ("len", ctypes.c_ssize_t),
+        ("itemsize", ctypes.c_ssize_t),
+        ("readonly", ctypes.c_int),
+        ("ndim", ctypes.c_int),
+        ("format", ctypes.c_char_p),
+        ("shape", ctypes.POINTER(ctypes.c_ssize_t)),
+        ("strides", ctypes.POINTER(ctypes.c_ssize_t)),
+        ("suboffsets", ctypes.POINTER(ctypes.c_ssize_t)),
+        ("internal", ctypes.c_void_p),
+    ]
+    buf: Optional[int]
+    len: int
+    itemsize: int
+    readonly: int
+    ndim: int
+    format: Optional[bytes]
+    shape: "ctypes._Pointer[ctypes.c_ssize_t]"
+    strides: "ctypes._Pointer[ctypes.c_ssize_t]"
+
+    def __init__(self) -> None:
+        super().__init__()
+
+
+_PyBUF_WRITABLE = 0x0001
+_PyBUF_FORMAT = 0x0004
+_PyBUF_STRIDES = 0x0018
+_PyBUF_RECORDS_RO = _PyBUF_STRIDES | _PyBUF_FORMAT
+
+_Py_buffer_p = ctypes.POINTER(_Py_buffer)
+
+_PyObject_GetBuffer = ctypes.pythonapi.PyObject_GetBuffer
+_PyObject_GetBuffer.argtypes = [ctypes.py_object, _Py_buffer_p, ctypes.c_int]
+_PyObject_GetBuffer.restype = ctypes.c_int
+_get_buffer = cast(Callable[[object, object, int], int], _PyObject_GetBuffer)
+
+_PyBuffer_Release = ctypes.pythonapi.PyBuffer_Release
+_PyBuffer_Release.argtypes = [_Py_buffer_p]
+_PyBuffer_Release.restype = None
+_release_buffer = cast(Callable[[object], None], _PyBuffer_Release)
+
+# Native byte order prefixes of struct format strings.
+_native_prefixes = "@=" + ("<" if sys.byteorder == "little" else ">!")
+
+
+class Buffer(object):
+    """
+    A view of an object's memory through the buffer protocol, e.g. a NumPy
+    array, memoryview, bytearray or mmap. No data is copied; the view holds the
+    exporter's memory in place until it is released.
+    """
+
+    def __init__(self, obj: object, writable: bool = False):
+        self._view = _Py_buffer()
+        self._released = True
+        flags = _PyBUF_RECORDS_RO | (_PyBUF_WRITABLE if writable else 0)
+        # Raises TypeError or BufferError if obj can't provide such a view.
+        _get_buffer(obj, ctypes.byref(self._view), flags)
+        self._released = False
+        view = self._view
+        self.address: int = view.buf or 0
+        self.nbytes: int = view.len
+        self.itemsize: int = view.itemsize
+        self.readonly = bool(view.readonly)
+        self.format = view.format.decode("ascii") if view.format else "B"
+        # Indexing a pointer to c_ssize_t gives ints.
+        self.shape = tuple(cast(int, view.shape[i]) for i in range(view.ndim))
+        self.strides = tuple(cast(int, view.strides[i]) for i in range(view.ndim))
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            _release_buffer(ctypes.byref(self._view))
+
+    def __enter__(self) -> Buffer:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[PyType[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.release()
+
+    def __del__(self) -> None:
+        self.release()
+
+    def c_contiguous(self) -> bool:
+        stride = self.itemsize
+        for extent, actual in zip(reversed(self.shape), reversed(self.strides)):
+            if extent > 1 and actual != stride:
+                return False
+            stride *= extent
+        return True
+
+    def flat(self) -> Tuple[int, int]:
+        """
+        Returns the number of elements and the stride in bytes between them,
+        viewing a C-contiguous buffer of any dimension as one-dimensional.
+        """
+        if len(self.shape) == 1:
+            return (self.shape[0], self.strides[0])
+        if not self.c_contiguous():
+            raise ValueError(
+                "Buffers with more than one dimension must be C-contiguous"
+            )
+        return (self.nbytes // self.itemsize, self.itemsize)
+
+    def check_element_type(self, t: Type) -> None:
+        """
+        Raise TypeError unless the elements of the buffer have type t.
+        """
+        fmt = self.format
+        if len(fmt) > 1 and fmt[0] in _native_prefixes:
+            fmt = fmt[1:]
+        if len(fmt) != 1:
+            ok = False
+        elif isinstance(t, BoolType):
+            ok = fmt == "?"
+        elif isinstance(t, IntType):
+            ok = fmt in "bhilqn" and struct.calcsize(fmt) * 8 == t.bits
+        elif isinstance(t, FloatType):
+            ok = fmt == {32: "f", 64: "d"}[t.bits]
+        else:
+            ok = False
+        if not ok:
+            raise TypeError(
+                "Buffer of format '%s' does not hold elements of type %s"
+                % (self.format, t)
+            )
@@ -0,0 +1,124 @@
+"""
+This file defines the on-disk object cache for compiled Petra programs.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+from llvmlite import binding
+from typing import Dict, List, Match, Optional, Tuple
+
+# Symbol.unique_name() embeds a process-wide counter, so two identical programs
+# built in different orders differ only in these ids.
+_unique_name_re = re.compile(r'%"?_(\d+)_')
+
+
+def canonical_ir(llvm_ir: str) -> str:
+    """
+    Renumber symbol ids in order of appearance so that equivalent programs
+    produce identical IR.
+    """
+    ids: Dict[str, int] = {}
+
+    def renumber(match: Match[str]) -> str:
+        new_id = ids.setdefault(match.group(1), len(ids))
+        return match.group(0).replace(match.group(1), str(new_id), 1)
+
+    return _unique_name_re.sub(renumber, llvm_ir)
+
+
+class ObjectCache(object):
+    """
+    A directory of compiled objects, keyed by a hash of the canonical IR and
+    the target it was compiled for. The directory is bounded to max_size bytes
+    by evicting the least recently used objects.
+    """
+
+    def __init__(self, directory: str, max_size: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(
+        self,
+        llvm_ir: str,
+        triple: str,
+        cpu: str,
+        features: str,
+        opt_level: int,
+        size_level: int,
+    ) -> str:
+        h = hashlib.sha256()
+        h.update(canonical_ir(llvm_ir).encode("utf-8"))
+        h.update(
+            repr(
+                (
+                    binding.llvm_version_info,
+                    triple,
+                    cpu,
+                    features,
+                    opt_level,
+                    size_level,
+                )
+            ).encode("utf-8")
+        )
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".o")
+
+    def load(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Bump the modification time so eviction is least recently used.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return data
+
+    def store(self, key: str, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        entries: List[Tuple[float, int, str]] = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".o"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".o"):
+                os.unlink(entry.path)
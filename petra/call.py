@@ -2,15 +2,14 @@
 This file defines Petra function call expressions and statements.
 """
 
-import re
-
 from llvmlite import ir
-from typing import List, Optional, Tuple, Union
+from typing import List, Optional, Sequence, Tuple, Union
 
 from .codegen import CodegenContext
 from .expr import Expr
+from .simplify import SimplifyContext, replace
 from .statement import Statement
-from .validate import ValidateError
+from .validate import validate_name
 from .type import Type
 from .typecheck import TypeContext, TypeCheckError
 
@@ -34,17 +33,14 @@ class Call(Expr):
         raise Exception("Expected type to exist - was typecheck called?")
 
     def validate(self) -> None:
-        if not re.match(r"^[a-z][a-zA-Z0-9_]*$", self.name):
-            raise ValidateError(
-                "Function call to '%s' does not match regex "
-                "^[a-z][a-zA-Z0-9_]*$" % self.name
-            )
+        validate_name("Function call to", self.name)
 
     def typecheck(self, ctx: TypeContext) -> None:
         # check existence of name
         if self.name not in ctx.functypes:
             raise TypeCheckError("Undeclared function '%s'" % self.name)
-        (t_in, t_out) = ctx.functypes[self.name]
+        ctx.calls.add(self.name)
+        t_in, t_out = ctx.functypes[self.name]
         # check argument types
         if len(self.args) != len(t_in):
             raise TypeCheckError(
@@ -67,3 +63,9 @@ class Call(Expr):
         args = tuple(map(codegen_arg, self.args))
         func = ctx.funcs[self.name]
         return builder.call(func, args)
+
+    def children(self) -> Sequence[Expr]:
+        return list(self.args)
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        return replace(self, args=[arg.simplify(ctx) for arg in self.args])
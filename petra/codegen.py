@@ -2,21 +2,257 @@
 This file defines the codegen context and helpers.
 """
 
+import os
+
 from llvmlite import ir
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, cast
 
 from .symbol import Symbol
 from .type import Ftypein, Ftypeout, Type
 
+_i8_ptr = ir.PointerType(ir.IntType(8))
+_lifetime_type = ir.FunctionType(ir.VoidType(), [ir.IntType(64), _i8_ptr])
+# The size of an object in lifetime markers; -1 stands for the whole object.
+_whole_object = ir.Constant(ir.IntType(64), -1)
+_i64 = ir.IntType(64)
+# The calls of a profiled function and the cycles spent in it.
+_profile_type = ir.ArrayType(_i64, 2)
+_readcyclecounter_type = ir.FunctionType(_i64, [])
+_i32 = ir.IntType(32)
+
+# The Python file and line a statement was constructed on.
+Location = Tuple[str, int]
+
+
+def profile_name(func: str) -> str:
+    """
+    Returns the name of the global holding a profiled function's counters.
+    """
+    return "__petra_profile_%s" % func
+
+
+def _debug_file(module: ir.Module, filename: str) -> ir.DIValue:
+    directory, name = os.path.split(filename)
+    return module.add_debug_info("DIFile", {"filename": name, "directory": directory})
+
+
+def compile_unit(module: ir.Module) -> ir.DIValue:
+    """
+    Returns the debug info compile unit of module, adding it on first use.
+    Only line tables are emitted.
+    """
+    units = module.namedmetadata.get("llvm.dbg.cu")
+    if units is not None:
+        return cast(ir.DIValue, units.operands[0])
+    unit = module.add_debug_info(
+        "DICompileUnit",
+        {
+            "language": ir.DIToken("DW_LANG_C99"),
+            "file": _debug_file(module, module.name),
+            "producer": "petra",
+            "runtimeVersion": 0,
+            "isOptimized": False,
+            "emissionKind": ir.DIToken("LineTablesOnly"),
+        },
+        is_distinct=True,
+    )
+    module.add_named_metadata("llvm.dbg.cu", unit)
+    flags = [("Dwarf Version", 4), ("Debug Info Version", 3)]
+    for flag, value in flags:
+        # Behavior 2 warns when modules with different values are linked.
+        module.add_named_metadata(
+            "llvm.module.flags", [ir.Constant(_i32, 2), flag, ir.Constant(_i32, value)]
+        )
+    return unit
+
 
 class CodegenContext(object):
     """
     A context of variables for use in codegen.
     """
 
-    def __init__(self, funcs: Dict[str, ir.Function]):
+    def __init__(
+        self,
+        funcs: Dict[str, ir.Function],
+        entry: ir.Block,
+        fastmath: Sequence[str] = (),
+    ):
         self.vars: Dict[Symbol, ir.Value] = dict()
         self.funcs: Dict[str, ir.Function] = funcs
+        # A block of allocas ending in a branch to the function body.
+        self.entry = entry
+        # Fast-math flags for every floating point operation in the function.
+        self.fastmath = tuple(fastmath)
+        # The counters of a profiled function and its cycle count on entry.
+        self.profile: Optional[Tuple[ir.Value, ir.Value]] = None
+        # The debug info scope of a function with debug info, and its scopes
+        # for statements in other files, by file name.
+        self.subprogram: Optional[ir.DIValue] = None
+        self.scopes: Dict[str, ir.DIValue] = dict()
+
+    def fastmath_flags(self, flags: Sequence[str]) -> Tuple[str, ...]:
+        """
+        Returns the function's fast-math flags combined with an operation's.
+        """
+        return self.fastmath + tuple(f for f in flags if f not in self.fastmath)
+
+    def alloca(self, t: ir.Type, name: str = "") -> ir.Value:
+        """
+        Allocate stack space in the function's entry block.
+
+        Entry block allocas are allocated once per call rather than once per
+        loop iteration, and mem2reg can promote them to registers.
+        """
+        builder = ir.IRBuilder(self.entry)
+        assert self.entry.terminator is not None
+        builder.position_before(self.entry.terminator)
+        return builder.alloca(t, name=name)
+
+    def start_debug_info(
+        self, builder: ir.IRBuilder, func: ir.Function, location: Location
+    ) -> None:
+        """
+        Give func debug info, placing it at location, for locate() to give
+        each statement's instructions its location.
+        """
+        module = builder.module
+        filename, line = location
+        self.subprogram = module.add_debug_info(
+            "DISubprogram",
+            {
+                "name": func.name,
+                "file": _debug_file(module, filename),
+                "line": line,
+                "type": module.add_debug_info(
+                    "DISubroutineType", {"types": module.add_metadata([])}
+                ),
+                "isLocal": False,
+                "isDefinition": True,
+                "scopeLine": line,
+                "unit": compile_unit(module),
+                "spFlags": ir.DIToken("DISPFlagDefinition"),
+            },
+            is_distinct=True,
+        )
+        self.scopes[filename] = self.subprogram
+        func.set_metadata("dbg", self.subprogram)
+        self.locate(builder, location)
+
+    def locate(self, builder: ir.IRBuilder, location: Location) -> None:
+        """
+        Give the instructions emitted next the given location, if the function
+        has debug info.
+        """
+        if self.subprogram is None:
+            return
+        module = builder.module
+        filename, line = location
+        scope = self.scopes.get(filename)
+        if scope is None:
+            scope = module.add_debug_info(
+                "DILexicalBlockFile",
+                {
+                    "scope": self.subprogram,
+                    "file": _debug_file(module, filename),
+                    "discriminator": 0,
+                },
+            )
+            self.scopes[filename] = scope
+        builder.debug_metadata = module.add_debug_info(
+            "DILocation", {"line": line, "column": 0, "scope": scope}
+        )
+
+    def start_profile(self, builder: ir.IRBuilder, name: str) -> None:
+        """
+        Count a call of the named function and read the cycle counter, for
+        end_profile() to add the cycles spent in the call.
+        """
+        counters = ir.GlobalVariable(builder.module, _profile_type, profile_name(name))
+        counters.initializer = ir.Constant(_profile_type, None)
+        calls = self._counter(builder, counters, 0)
+        builder.store(builder.add(builder.load(calls), ir.Constant(_i64, 1)), calls)
+        start = self.alloca(_i64, name="profile_start")
+        builder.store(self._read_cycles(builder), start)
+        self.profile = (counters, start)
+
+    def end_profile(self, builder: ir.IRBuilder) -> None:
+        """
+        Add the cycles since start_profile() to a profiled function's counters.
+        """
+        if self.profile is None:
+            return
+        counters, start = self.profile
+        elapsed = builder.sub(self._read_cycles(builder), builder.load(start))
+        cycles = self._counter(builder, counters, 1)
+        builder.store(builder.add(builder.load(cycles), elapsed), cycles)
+
+    def _counter(self, builder: ir.IRBuilder, counters: ir.Value, i: int) -> ir.Value:
+        indices = [ir.Constant(ir.IntType(32), 0), ir.Constant(ir.IntType(32), i)]
+        return builder.gep(counters, indices, inbounds=True)
+
+    def _read_cycles(self, builder: ir.IRBuilder) -> ir.Value:
+        module = builder.module
+        intrinsic = module.globals.get("llvm.readcyclecounter")
+        if intrinsic is None:
+            intrinsic = ir.Function(
+                module, _readcyclecounter_type, "llvm.readcyclecounter"
+            )
+        return builder.call(intrinsic, [])
+
+    def lifetime_start(self, builder: ir.IRBuilder, ptr: ir.Value) -> None:
+        self._lifetime(builder, "llvm.lifetime.start", ptr)
+
+    def lifetime_end(self, builder: ir.IRBuilder, ptr: ir.Value) -> None:
+        self._lifetime(builder, "llvm.lifetime.end", ptr)
+
+    def _lifetime(self, builder: ir.IRBuilder, intrinsic: str, ptr: ir.Value) -> None:
+        marker = builder.module.declare_intrinsic(
+            intrinsic, [_i8_ptr], fnty=_lifetime_type
+        )
+        builder.call(marker, [_whole_object, builder.bitcast(ptr, _i8_ptr)])
+
+
+class _VolatileLoad(ir.LoadInstr):
+    def descr(self, buf: List[str]) -> None:
+        text: List[str] = []
+        super().descr(text)
+        buf.append(text[0].replace("load", "load volatile", 1))
+
+
+class _VolatileStore(ir.StoreInstr):
+    def descr(self, buf: List[str]) -> None:
+        text: List[str] = []
+        super().descr(text)
+        buf.append(text[0].replace("store", "store volatile", 1))
+
+
+def load(
+    builder: ir.IRBuilder, ptr: ir.Value, align: Optional[int], volatile: bool
+) -> ir.Value:
+    """
+    Emit a load. llvmlite's instructions have no volatile flag, so a volatile
+    load is marked by the subclass printing it.
+    """
+    instr = builder.load(ptr, align=align)
+    if volatile:
+        instr.__class__ = _VolatileLoad
+    return instr
+
+
+def store(
+    builder: ir.IRBuilder,
+    value: ir.Value,
+    ptr: ir.Value,
+    align: Optional[int],
+    volatile: bool,
+) -> None:
+    """
+    Emit a store. llvmlite's instructions have no volatile flag, so a volatile
+    store is marked by the subclass printing it.
+    """
+    instr = builder.store(value, ptr, align=align)
+    if volatile:
+        instr.__class__ = _VolatileStore
 
 
 def convert_func_type(t_in: Ftypein, t_out: Ftypeout) -> ir.FunctionType:
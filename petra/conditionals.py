@@ -3,17 +3,21 @@ This file defines Petra conditional control flow.
 """
 
 import contextlib
-from typing import ContextManager, Callable
+from typing import Callable, Iterator, List, Optional, Sequence, Union
 
 from llvmlite import ir
 from llvmlite.ir import builder
 
-from .block import Block
+from .block import Block, NestedBlock
 from .codegen import CodegenContext
+from .constant import Constant, int_value
 from .expr import Expr
+from .simplify import SimplifyContext, replace
 from .statement import Statement
-from .type import Bool_t
+from .symbol import Symbol
+from .type import Bool_t, IntType
 from .typecheck import TypeContext, TypeCheckError
+from .validate import ValidateError
 
 
 class If(Statement):
@@ -28,18 +32,16 @@ class If(Statement):
         self.validate()
 
     def validate(self) -> None:
-        self.pred.validate()
-        self.then_block.validate()
-        self.else_block.validate()
+        pass
 
     def typecheck(self, ctx: TypeContext) -> None:
         self.pred.typecheck(ctx)
         t_pred = self.pred.get_type()
         if t_pred != Bool_t:
             raise TypeCheckError("If predicate cannot have type %s" % str(t_pred))
-        then_ctx = ctx.copy()
+        then_ctx = ctx.child()
         self.then_block.typecheck(then_ctx)
-        else_ctx = ctx.copy()
+        else_ctx = ctx.child()
         self.else_block.typecheck(else_ctx)
 
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> None:
@@ -50,6 +52,33 @@ class If(Statement):
             with else_case:
                 self.else_block.codegen(builder, ctx)
 
+    def children(self) -> Sequence[Union[Expr, Block]]:
+        return [self.pred, self.then_block, self.else_block]
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, Statement]]:
+        pred = self.pred.simplify(ctx)
+        if isinstance(pred, Constant):
+            # Keep the branch taken as a scope of its own, so that its
+            # variables still end with it and don't clash with the enclosing
+            # block's.
+            taken, pruned = self.then_block, self.else_block
+            if not pred.value:
+                taken, pruned = pruned, taken
+            ctx.discard(pruned)
+            # The predicate. The scope takes the place of the if.
+            ctx.removed += 1
+            scope = NestedBlock(taken.simplify(ctx))
+            scope.location = self.location
+            return [scope]
+        return [
+            replace(
+                self,
+                pred=pred,
+                then_block=self.then_block.simplify(ctx),
+                else_block=self.else_block.simplify(ctx),
+            )
+        ]
+
 
 def _label_suffix(label: str, suffix: str) -> str:
     """Returns (label + suffix) or a truncated version if it's too long.
@@ -67,10 +96,8 @@ def _label_suffix(label: str, suffix: str) -> str:
         return label + suffix
 
 
-@contextlib.contextmanager  # type: ignore
-def while_then(
-    self: ir.IRBuilder, pred: Callable[[], ir.Value]
-) -> ContextManager[ir.Block]:
+@contextlib.contextmanager
+def while_then(self: ir.IRBuilder, pred: Callable[[], ir.Value]) -> Iterator[ir.Block]:
     """
     A context manager which sets up a conditional basic block based
     on the given predicate (a i1 value).  If the conditional block
@@ -98,15 +125,14 @@ class While(Statement):
         self.validate()
 
     def validate(self) -> None:
-        self.pred.validate()
-        self.while_block.validate()
+        pass
 
     def typecheck(self, ctx: TypeContext) -> None:
         self.pred.typecheck(ctx)
         t_pred = self.pred.get_type()
         if t_pred != Bool_t:
             raise TypeCheckError("While predicate cannot have type %s" % str(t_pred))
-        while_ctx = ctx.copy()
+        while_ctx = ctx.child()
         self.while_block.typecheck(while_ctx)
 
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> None:
@@ -115,3 +141,184 @@ class While(Statement):
 
         with while_then(builder, pred):
             self.while_block.codegen(builder, ctx)
+
+    def children(self) -> Sequence[Union[Expr, Block]]:
+        return [self.pred, self.while_block]
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, Statement]]:
+        pred = self.pred.simplify(ctx)
+        if isinstance(pred, Constant) and not pred.value:
+            ctx.discard(replace(self, pred=pred))
+            return []
+        return [replace(self, pred=pred, while_block=self.while_block.simplify(ctx))]
+
+
+def _loop_metadata(
+    module: ir.Module, vectorize: Optional[bool], unroll: Optional[int]
+) -> ir.Value:
+    """
+    Returns a new loop ID for the llvm.loop metadata of a loop's latch.
+    """
+    properties = [
+        module.add_metadata([ir.MetaDataString(module, "llvm.loop.mustprogress")])
+    ]
+    if vectorize is not None:
+        properties.append(
+            module.add_metadata(
+                [
+                    ir.MetaDataString(module, "llvm.loop.vectorize.enable"),
+                    ir.Constant(ir.IntType(1), vectorize),
+                ]
+            )
+        )
+    if unroll is not None:
+        properties.append(
+            module.add_metadata(
+                [
+                    ir.MetaDataString(module, "llvm.loop.unroll.count"),
+                    ir.Constant(ir.IntType(32), unroll),
+                ]
+            )
+        )
+    # Loop IDs are distinct nodes referring to themselves, which add_metadata
+    # can't create since it merges equal nodes.
+    loop_id = ir.values.MDValue(module, [], name=str(len(module.metadata)))
+    loop_id.operands = (loop_id,) + tuple(properties)
+    return loop_id
+
+
+class For(Statement):
+    """
+    A counted loop running block with symbol set to start, start + step, ...
+    while it is less than stop (greater than stop if step is negative).
+
+    start, stop and step are evaluated once, before the loop. symbol is defined
+    in block and can't be assigned to. The loop variable must not overflow.
+
+    step must not be 0. A step that is, or simplifies to, a constant 0 raises
+    ValidateError. A step that is only 0 at run time is treated as negative,
+    so the loop never runs if start <= stop and runs forever otherwise.
+
+    vectorize and unroll, if given, are passed to LLVM's loop vectorizer and
+    unroller as hints.
+    """
+
+    def __init__(
+        self,
+        symbol: Symbol,
+        start: Expr,
+        stop: Expr,
+        step: Expr,
+        block: Block,
+        vectorize: Optional[bool] = None,
+        unroll: Optional[int] = None,
+    ):
+        self.symbol = symbol
+        self.start = start
+        self.stop = stop
+        self.step = step
+        self.block = block
+        self.vectorize = vectorize
+        self.unroll = unroll
+        self.validate()
+
+    def validate(self) -> None:
+        if int_value(self.step) == 0:
+            raise ValidateError("For loop step cannot be 0")
+        if self.unroll is not None and self.unroll < 1:
+            raise ValidateError("For loop unroll count must be positive")
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        t = self.symbol.get_type()
+        if not isinstance(t, IntType):
+            raise TypeCheckError("For loop variable cannot have type %s" % t)
+        for e in (self.start, self.stop, self.step):
+            e.typecheck(ctx)
+            if e.get_type() != t:
+                raise TypeCheckError(
+                    "For loop bound of type %s does not match loop variable '%s' "
+                    "of type %s" % (e.get_type(), self.symbol, t)
+                )
+        if self.symbol in ctx.variables:
+            raise TypeCheckError("Variable '%s' declared multiple times" % self.symbol)
+        for_ctx = ctx.child()
+        for_ctx.variables.add(self.symbol)
+        for_ctx.loop_variables.add(self.symbol)
+        self.block.typecheck(for_ctx)
+
+    def _compare(
+        self, builder: ir.IRBuilder, i: ir.Value, stop: ir.Value, step: ir.Value
+    ) -> ir.Value:
+        """
+        Returns whether the loop continues with the loop variable set to i.
+        """
+        constant_step = int_value(self.step)
+        if constant_step is not None:
+            return builder.icmp_signed("<" if constant_step > 0 else ">", i, stop)
+        up = builder.icmp_signed(">", step, ir.Constant(step.type, 0))
+        return builder.select(
+            up, builder.icmp_signed("<", i, stop), builder.icmp_signed(">", i, stop)
+        )
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> None:
+        start = self.start.codegen(builder, ctx)
+        stop = self.stop.codegen(builder, ctx)
+        step = self.step.codegen(builder, ctx)
+        ctx.vars[self.symbol] = ctx.alloca(
+            self.symbol.get_type().llvm_type(), name=self.symbol.unique_name()
+        )
+
+        # guard -> preheader -> body ... -> latch -> body or end
+        name = builder.block.name
+        preheader = builder.append_basic_block(name=_label_suffix(name, ".preheader"))
+        body = builder.append_basic_block(name=_label_suffix(name, ".for"))
+        latch = builder.append_basic_block(name=_label_suffix(name, ".latch"))
+        end = builder.append_basic_block(name=_label_suffix(name, ".endfor"))
+        builder.cbranch(self._compare(builder, start, stop, step), preheader, end)
+        builder.position_at_end(preheader)
+        builder.branch(body)
+
+        builder.position_at_end(body)
+        i = builder.phi(start.type, name=self.symbol.unique_name())
+        i.add_incoming(start, preheader)
+        builder.store(i, ctx.vars[self.symbol])
+        self.block.codegen(builder, ctx)
+        if not builder.block.is_terminated:
+            builder.branch(latch)
+
+        builder.position_at_end(latch)
+        next_i = builder.add(i, step, flags=("nsw",))
+        i.add_incoming(next_i, latch)
+        backedge = builder.cbranch(
+            self._compare(builder, next_i, stop, step), body, end
+        )
+        backedge.set_metadata(
+            "llvm.loop", _loop_metadata(builder.module, self.vectorize, self.unroll)
+        )
+        builder.position_at_end(end)
+
+    def children(self) -> Sequence[Union[Expr, Block]]:
+        return [self.start, self.stop, self.step, self.block]
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, Statement]]:
+        start = self.start.simplify(ctx)
+        stop = self.stop.simplify(ctx)
+        step = self.step.simplify(ctx)
+        start_value, stop_value = int_value(start), int_value(stop)
+        step_value = int_value(step)
+        if step_value == 0:
+            raise ValidateError("For loop step cannot be 0")
+        if (
+            start_value is not None
+            and stop_value is not None
+            and step_value is not None
+        ):
+            if step_value > 0:
+                runs = start_value < stop_value
+            else:
+                runs = start_value > stop_value
+            if not runs:
+                ctx.discard(replace(self, start=start, stop=stop, step=step))
+                return []
+        block = self.block.simplify(ctx)
+        return [replace(self, start=start, stop=stop, step=step, block=block)]
@@ -2,7 +2,7 @@
 This file defines Petra constants.
 """
 
-from typing import Generic, TypeVar
+from typing import Generic, Optional, Sequence, Tuple, TypeVar, cast
 from llvmlite import ir
 
 from .codegen import CodegenContext
@@ -16,8 +16,11 @@ from .type import (
     Int16_t,
     Int32_t,
     Int64_t,
+    IntType,
+    ScalarType,
     Type,
     ValueType,
+    VectorType,
 )
 from .typecheck import TypeContext
 
@@ -51,6 +54,15 @@ class Constant(Expr, Generic[_VT]):
         return ir.Constant(self.t.llvm_type(), self.value)
 
 
+def int_value(e: Expr) -> Optional[int]:
+    """
+    Returns the value of e if it is an integer constant, and None otherwise.
+    """
+    if isinstance(e, Constant) and isinstance(e.get_type(), IntType):
+        return cast(int, e.value)
+    return None
+
+
 class Int8(Constant[int]):
     """
     An Int8_t constant.
@@ -112,3 +124,12 @@ class Bool(Constant[bool]):
 
     def __init__(self, value: bool):
         super().__init__(value, Bool_t)
+
+
+class Vector(Constant[Tuple[object, ...]]):
+    """
+    A VectorType constant with one value per lane.
+    """
+
+    def __init__(self, element: ScalarType, values: Sequence[object]):
+        super().__init__(tuple(values), VectorType(element, len(values)))
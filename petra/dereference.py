@@ -1,24 +1,51 @@
 """
-This file defines the pointer dereference class.
+This file defines pointer dereference, addressing and store classes.
 """
 
-import re
-
-from abc import ABC, abstractmethod
 from llvmlite import ir
-from typing import Optional
+from typing import List, Optional, Sequence, Union
 
-from .codegen import CodegenContext
+from .codegen import CodegenContext, load, store
+from .constant import int_value
 from .validate import ValidateError
-from .symbol import Symbol
-from .expr import Expr, Var
-from .type import Type, PointerType
+from .simplify import SimplifyContext, replace
+from .statement import Statement
+from .expr import Expr
+from .type import ArrayType, Int32_t, IntType, PointerType, StructType, Type
 from .typecheck import TypeContext, TypeCheckError
 
 
+def _validate_align(align: Optional[int]) -> None:
+    if align is not None and (align < 1 or align & (align - 1) != 0):
+        raise ValidateError("Alignment must be a power of two, not %s" % align)
+
+
+def _pointer_type(ptr: Expr) -> PointerType:
+    t_ptr = ptr.get_type()
+    if not isinstance(t_ptr, PointerType):
+        raise TypeCheckError("%s is not a PointerType" % str(t_ptr))
+    return t_ptr
+
+
+def _check_index(kind: str, index: Expr) -> None:
+    t_index = index.get_type()
+    if not isinstance(t_index, IntType):
+        raise TypeCheckError("%s must be an integer, not %s" % (kind, t_index))
+
+
 class Deref(Expr):
-    def __init__(self, ptr: Expr):
+    """
+    Loads the value a pointer points to.
+
+    align is the alignment the pointer is known to have, in bytes; by default
+    it is the ABI alignment of the value's type. Volatile loads are never
+    removed, merged or reordered with other volatile accesses.
+    """
+
+    def __init__(self, ptr: Expr, align: Optional[int] = None, volatile: bool = False):
         self.ptr = ptr
+        self.align = align
+        self.volatile = volatile
         self.validate()
 
     def get_type(self) -> Type:
@@ -28,14 +55,204 @@ class Deref(Expr):
         else:
             assert False
 
+    def validate(self) -> None:
+        _validate_align(self.align)
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.ptr.typecheck(ctx)
+        _pointer_type(self.ptr)
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
+        ptr = self.ptr.codegen(builder, ctx)
+        return load(builder, ptr, self.align, self.volatile)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.ptr]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        return replace(self, ptr=self.ptr.simplify(ctx))
+
+
+class Offset(Expr):
+    """
+    Pointer arithmetic: a pointer offset elements past ptr.
+
+    As in C, the result must point into, or just past, the same object as
+    ptr.
+    """
+
+    def __init__(self, ptr: Expr, offset: Expr):
+        self.ptr = ptr
+        self.offset = offset
+        self.validate()
+
+    def get_type(self) -> Type:
+        return self.ptr.get_type()
+
     def validate(self) -> None:
         pass
 
     def typecheck(self, ctx: TypeContext) -> None:
-        t_ptr = self.ptr.get_type()
-        if not isinstance(t_ptr, PointerType):
-            raise TypeCheckError("%s is not a PointerType" % str(t_ptr))
+        self.ptr.typecheck(ctx)
+        self.offset.typecheck(ctx)
+        _pointer_type(self.ptr)
+        _check_index("Pointer offset", self.offset)
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
+        ptr = self.ptr.codegen(builder, ctx)
+        offset = self.offset.codegen(builder, ctx)
+        return builder.gep(ptr, [offset], inbounds=True)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.ptr, self.offset]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        node = replace(
+            self, ptr=self.ptr.simplify(ctx), offset=self.offset.simplify(ctx)
+        )
+        if int_value(node.offset) == 0:
+            ctx.removed += 2
+            return node.ptr
+        return node
+
+
+class ElementPtr(Expr):
+    """
+    A pointer to the element at index of the array ptr points to.
+    """
+
+    def __init__(self, ptr: Expr, index: Expr):
+        self.ptr = ptr
+        self.index = index
+        self.t: Optional[Type] = None
+        self.validate()
+
+    def get_type(self) -> Type:
+        if isinstance(self.t, Type):
+            return self.t
+        raise Exception("Expected type to exist - was typecheck called?")
+
+    def validate(self) -> None:
+        pass
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.ptr.typecheck(ctx)
+        self.index.typecheck(ctx)
+        t_array = _pointer_type(self.ptr).pointee
+        if not isinstance(t_array, ArrayType):
+            raise TypeCheckError("%s is not an ArrayType" % str(t_array))
+        _check_index("Array index", self.index)
+        index = int_value(self.index)
+        if index is not None and not 0 <= index < t_array.length:
+            raise TypeCheckError("Index %s out of range for %s" % (index, t_array))
+        self.t = PointerType(t_array.element)
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
+        ptr = self.ptr.codegen(builder, ctx)
+        index = self.index.codegen(builder, ctx)
+        zero = ir.Constant(index.type, 0)
+        return builder.gep(ptr, [zero, index], inbounds=True)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.ptr, self.index]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        return replace(self, ptr=self.ptr.simplify(ctx), index=self.index.simplify(ctx))
+
+
+class FieldPtr(Expr):
+    """
+    A pointer to a field, by index or name, of the struct ptr points to.
+    """
+
+    def __init__(
+        self, ptr: Expr, idx: Optional[int] = None, name: Optional[str] = None
+    ):
+        self.ptr = ptr
+        self.idx = idx
+        self.name = name
+        self.t: Optional[Type] = None
+        self.validate()
+
+    def get_type(self) -> Type:
+        if isinstance(self.t, Type):
+            return self.t
+        raise Exception("Expected type to exist - was typecheck called?")
+
+    def validate(self) -> None:
+        if self.idx is None and self.name is None:
+            raise ValidateError("FieldPtr needs a field index or name")
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.ptr.typecheck(ctx)
+        t_struct = _pointer_type(self.ptr).pointee
+        if not isinstance(t_struct, StructType):
+            raise TypeCheckError("%s is not a StructType" % str(t_struct))
+        if self.idx is None and self.name is not None:
+            if self.name not in t_struct.name_to_index:
+                raise TypeCheckError("%s has no field '%s'" % (t_struct, self.name))
+            self.idx = t_struct.name_to_index[self.name]
+        assert self.idx is not None
+        if not 0 <= self.idx < len(t_struct.elements):
+            raise TypeCheckError("Field %s out of range for %s" % (self.idx, t_struct))
+        self.t = PointerType(t_struct.elements[self.idx])
 
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
         ptr = self.ptr.codegen(builder, ctx)
-        return builder.load(ptr)
+        assert self.idx is not None
+        i32 = Int32_t.llvm_type()
+        indices = [ir.Constant(i32, 0), ir.Constant(i32, self.idx)]
+        return builder.gep(ptr, indices, inbounds=True)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.ptr]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        return replace(self, ptr=self.ptr.simplify(ctx))
+
+
+class Store(Statement):
+    """
+    Stores a value to the location a pointer points to.
+
+    align and volatile are as for Deref.
+    """
+
+    def __init__(
+        self,
+        ptr: Expr,
+        value: Expr,
+        align: Optional[int] = None,
+        volatile: bool = False,
+    ):
+        self.ptr = ptr
+        self.value = value
+        self.align = align
+        self.volatile = volatile
+        self.validate()
+
+    def validate(self) -> None:
+        _validate_align(self.align)
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.ptr.typecheck(ctx)
+        self.value.typecheck(ctx)
+        t_ptr = _pointer_type(self.ptr)
+        if self.value.get_type() != t_ptr.pointee:
+            raise TypeCheckError(
+                "Cannot store expression of type %s through %s"
+                % (self.value.get_type(), t_ptr)
+            )
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> None:
+        ptr = self.ptr.codegen(builder, ctx)
+        value = self.value.codegen(builder, ctx)
+        store(builder, value, ptr, self.align, self.volatile)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.ptr, self.value]
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, Statement]]:
+        return [
+            replace(self, ptr=self.ptr.simplify(ctx), value=self.value.simplify(ctx))
+        ]
@@ -6,9 +6,10 @@ import re
 
 from abc import ABC, abstractmethod
 from llvmlite import ir
-from typing import Optional
+from typing import Optional, Sequence
 
 from .codegen import CodegenContext
+from .simplify import SimplifyContext
 from .validate import ValidateError
 from .symbol import Symbol
 from .type import Type
@@ -37,6 +38,9 @@ class Expr(ABC):
         This performs structural checks on the validity of an expression (e.g. an
         arithemtic expression has a valid operator). It does not perform semantics checks.
 
+        Subexpressions are validated when they are constructed, so only the
+        expression itself is checked.
+
         """
         pass
 
@@ -59,6 +63,20 @@ class Expr(ABC):
         """
         pass
 
+    def children(self) -> Sequence["Expr"]:
+        """
+        Returns the subexpressions of the expression.
+        """
+        return []
+
+    def simplify(self, ctx: SimplifyContext) -> "Expr":
+        """Simplify the expression.
+
+        Returns an equivalent, typechecked expression to use in place of self.
+        self and its subexpressions are left unchanged.
+        """
+        return self
+
 
 class Var(Expr):
     """
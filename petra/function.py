@@ -2,18 +2,47 @@
 This file defines Petra functions.
 """
 
-import re
-
 from llvmlite import ir
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
 
 from .block import Block
-from .codegen import CodegenContext
+from .codegen import CodegenContext, Location
+from .dereference import Deref, ElementPtr, FieldPtr, Offset
+from .expr import Expr, Var
+from .simplify import SimplifyContext
 from .statement import Statement, Return
 from .symbol import Symbol
-from .type import Ftypein, Ftypeout, Type
+from .type import Ftypein, Ftypeout, PointerType, Type
 from .typecheck import TypeContext, TypeCheckError
-from .validate import ValidateError
+from .validate import validate_fastmath, validate_name
+from .vector import VectorLoad
+
+
+def written_pointers(block: Block, pointers: Set[Symbol]) -> Set[Symbol]:
+    """
+    Returns the pointer variables that block may write through.
+
+    A pointer is only known not to be written through if it is used solely
+    for loads, possibly after pointer arithmetic. Any other use, e.g. a store,
+    a call or a copy into another variable, counts as a write.
+    """
+    written: Set[Symbol] = set()
+    # Nodes to visit, with whether their value is only loaded from.
+    stack: List[Tuple[Union[Expr, Statement, Block], bool]] = [(block, False)]
+    while stack:
+        node, loaded = stack.pop()
+        if isinstance(node, Var):
+            if not loaded and node.symbol in pointers:
+                written.add(node.symbol)
+            continue
+        loaded_ptr: Optional[Expr] = None
+        if isinstance(node, (Deref, VectorLoad)) or (
+            loaded and isinstance(node, (Offset, ElementPtr, FieldPtr))
+        ):
+            loaded_ptr = node.ptr
+        for child in node.children():
+            stack.append((child, child is loaded_ptr))
+    return written
 
 
 class Function(object):
@@ -28,11 +57,13 @@ class Function(object):
         t_out: Ftypeout,
         block: Block,
         functypes: Dict[str, Tuple[Ftypein, Ftypeout]],
+        fastmath: Sequence[str] = (),
     ):
         self.name = name
         self.args = args
         self.t_out = t_out
         self.block = block
+        self.fastmath = tuple(fastmath)
         self.validate()
         # Initial typecontext should contain arguments
         ctx = TypeContext(functypes, t_out)
@@ -41,34 +72,68 @@ class Function(object):
                 raise TypeCheckError("Parameter '%s' declared multiple times" % arg)
             ctx.variables.add(arg)
         self.typecheck(ctx)
+        # Functions called from this one, e.g. for finding reachable functions.
+        self.calls = ctx.calls
+        # Number of nodes removed by simplification.
+        self.removed = self.simplify()
+        # Whether the function may write through each argument.
+        pointers = {arg for arg in args if isinstance(arg.get_type(), PointerType)}
+        written = written_pointers(self.block, pointers) if pointers else set()
+        self.written = tuple(arg in written for arg in args)
 
     def validate(self) -> None:
-        # check for valid name
-        if not re.match(r"^[a-z][a-zA-Z0-9_]*$", self.name):
-            raise ValidateError(
-                "Function name '%s' does not match regex "
-                "^[a-z][a-zA-Z0-9_]*$" % self.name
-            )
-        # check for valid arg names
-        for arg in self.args:
-            if not re.match(r"^[a-z][a-zA-Z0-9_]*$", arg.name):
-                raise ValidateError(
-                    "Argument '%s' does not match regex "
-                    "^[a-z][a-zA-Z0-9_]*$" % arg.name
-                )
-        self.block.validate()
+        # Arguments and the block were validated when they were constructed.
+        validate_name("Function name", self.name)
+        validate_fastmath(self.fastmath)
 
     def typecheck(self, ctx: TypeContext) -> None:
         self.block.typecheck(ctx)
 
-    def codegen(self, module: ir.Module, funcs: Dict[str, ir.Function]) -> None:
+    def location(self) -> Location:
+        """
+        Returns the location of the function's first statement that has one.
+        """
+        for statement in self.block.statements:
+            if isinstance(statement, Statement) and statement.location is not None:
+                return statement.location
+        return ("<petra>", 0)
+
+    def simplify(self) -> int:
+        """
+        Simplify the typechecked body and return the number of nodes removed.
+
+        Simplified nodes are copies, so the block passed in is left as it was
+        built and can be used again, e.g. in another program.
+        """
+        ctx = SimplifyContext()
+        self.block = self.block.simplify(ctx)
+        return ctx.removed
+
+    def codegen(
+        self,
+        module: ir.Module,
+        funcs: Dict[str, ir.Function],
+        profile: bool = False,
+        debug_info: bool = False,
+    ) -> None:
+        """
+        Emit the function into module. With profile, the function counts its
+        calls and the cycles spent in them, including in the functions it
+        calls; see Profile. With debug_info, its instructions get line info
+        for the statements they came from.
+        """
+        entry = funcs[self.name].append_basic_block(name="entry")
         block = funcs[self.name].append_basic_block(name="start")
+        ir.IRBuilder(entry).branch(block)
         builder = ir.IRBuilder(block)
-        ctx = CodegenContext(funcs)
+        ctx = CodegenContext(funcs, entry, self.fastmath)
+        if debug_info:
+            ctx.start_debug_info(builder, funcs[self.name], self.location())
         # Treat function arguments as variables declared at the beginning.
         for i, arg in enumerate(self.args):
-            var = builder.alloca(arg.get_type().llvm_type(), name=arg.unique_name())
-            # FIXME: I'm not sure why I can't get this to type check
-            builder.store(funcs[self.name].args[i], var)  # type: ignore
+            var = ctx.alloca(arg.get_type().llvm_type(), name=arg.unique_name())
+            builder.store(funcs[self.name].args[i], var)
             ctx.vars[arg] = var
+        if profile:
+            ctx.start_profile(builder, self.name)
         self.block.codegen(builder, ctx)
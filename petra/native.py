@@ -0,0 +1,182 @@
+"""
+This file defines the mapping of Petra types to ctypes for calling compiled code.
+"""
+
+import ctypes
+
+from llvmlite import binding
+from typing import Dict, List, Optional, Sequence, Tuple, Type as PyType, cast
+
+from .buffer import Buffer
+
+from .type import (
+    ArrayType,
+    BoolType,
+    FloatType,
+    Ftypein,
+    Ftypeout,
+    IntType,
+    PointerType,
+    StructType,
+    Type,
+)
+
+# A ctypes type, e.g. c_int32 or POINTER(c_double).
+CType = PyType["ctypes._CData"]
+
+_int_ctypes: Dict[int, CType] = {
+    8: ctypes.c_int8,
+    16: ctypes.c_int16,
+    32: ctypes.c_int32,
+    64: ctypes.c_int64,
+}
+
+_struct_ctypes: Dict[StructType, CType] = dict()
+
+# Buffer formats of untyped memory.
+_raw_formats = ("B", "c")
+
+
+def ctype(t: Type) -> CType:
+    """
+    Returns the ctypes type with the same memory layout as t.
+    """
+    if isinstance(t, BoolType):
+        return ctypes.c_bool
+    if isinstance(t, IntType):
+        return _int_ctypes[t.bits]
+    if isinstance(t, FloatType):
+        return ctypes.c_float if t.bits == 32 else ctypes.c_double
+    if isinstance(t, PointerType):
+        return ctypes.POINTER(ctype(t.pointee))
+    if isinstance(t, ArrayType):
+        # FIXME: typeshed's ctypes stubs can't type array types
+        return ctype(t.element) * t.length  # type: ignore
+    if isinstance(t, StructType):
+        if t not in _struct_ctypes:
+            fields: List[Tuple[str, CType]] = [
+                (name, ctype(t.elements[i])) for name, i in t.name_to_index.items()
+            ]
+            # FIXME: typeshed's ctypes stubs can't type dynamic structures
+            struct = type("Struct", (ctypes.Structure,), {"_fields_": fields})  # type: ignore
+            _struct_ctypes[t] = struct
+        return _struct_ctypes[t]
+    raise TypeError("No ctypes equivalent for type %s" % t)
+
+
+def _ctype_by_value(t: Type) -> CType:
+    # LLVM passes first-class aggregates in registers field by field, which does
+    # not match the C calling convention ctypes uses for structs and arrays.
+    if isinstance(t, (StructType, ArrayType)):
+        raise TypeError(
+            "Type %s cannot be passed by value to native code; pass a pointer" % t
+        )
+    return ctype(t)
+
+
+def cfunctype(t_in: Ftypein, t_out: Ftypeout) -> PyType["ctypes._CFunctionType"]:
+    """
+    Returns the ctypes prototype for a function of the given type.
+    """
+    restype: Optional[CType] = None
+    if isinstance(t_out, Type):
+        restype = _ctype_by_value(t_out)
+    return ctypes.CFUNCTYPE(restype, *(_ctype_by_value(t) for t in t_in))
+
+
+def _view(obj: object, writable: bool, i: int) -> Optional[Buffer]:
+    """
+    Returns a view of obj, or None if obj doesn't support the buffer protocol.
+    """
+    try:
+        return Buffer(obj, writable=writable)
+    except Exception as error:
+        if writable:
+            # Find out whether obj is a buffer that just isn't writable.
+            readonly = _view(obj, False, i)
+            if readonly is None:
+                return None
+            readonly.release()
+            raise TypeError(
+                "Argument %s is a read-only buffer, but the function may write "
+                "through it" % i
+            ) from error
+        if isinstance(error, TypeError):
+            return None
+        raise
+
+
+class NativeCallable(object):
+    """
+    A compiled function, called through ctypes. It keeps the execution engine
+    holding its code alive, so it can be called for as long as it is
+    referenced, even once its program is gone or has changed.
+    """
+
+    def __init__(self, engine: binding.ExecutionEngine, cfunc: "ctypes._CFunctionType"):
+        self.engine = engine
+        self.cfunc = cfunc
+
+    def __call__(self, *args: object) -> object:
+        return cast(object, self.cfunc(*args))
+
+
+class BufferCallable(NativeCallable):
+    """
+    A native function taking pointers, which accepts objects supporting the
+    buffer protocol, e.g. NumPy arrays, memoryviews, bytearrays and mmaps, for
+    pointers to scalars. Their memory is passed without copying, once checked
+    to be C-contiguous and aligned, to hold elements of the pointee type unless
+    they are untyped bytes, and to be writable if the function may write
+    through the pointer.
+
+    Other arguments, including ctypes pointers, are converted by ctypes.
+    """
+
+    def __init__(
+        self,
+        engine: binding.ExecutionEngine,
+        cfunc: "ctypes._CFunctionType",
+        t_in: Ftypein,
+        written: Sequence[bool],
+    ):
+        super().__init__(engine, cfunc)
+        # The index, pointer type and whether it may be written, per argument
+        # that may be a buffer.
+        self.pointers: List[Tuple[int, PointerType, bool]] = [
+            (i, t, w)
+            for i, (t, w) in enumerate(zip(t_in, written))
+            if isinstance(t, PointerType)
+            and isinstance(t.pointee, (IntType, FloatType, BoolType))
+        ]
+
+    def __call__(self, *args: object) -> object:
+        cargs = list(args)
+        buffers: List[Buffer] = []
+        try:
+            for i, t, writable in self.pointers:
+                # ctypes pointers export the memory holding the address.
+                if i >= len(cargs) or isinstance(
+                    cargs[i], (type(None), ctypes._Pointer, ctypes.c_void_p)
+                ):
+                    continue
+                buf = _view(cargs[i], writable, i)
+                if buf is None:
+                    continue
+                buffers.append(buf)
+                # Raw bytes, e.g. from bytes, bytearray or mmap, may hold
+                # elements of any type.
+                if buf.format not in _raw_formats:
+                    buf.check_element_type(t.pointee)
+                if not buf.c_contiguous():
+                    raise ValueError("Argument %s is not a C-contiguous buffer" % i)
+                align = ctypes.alignment(ctype(t.pointee))
+                if buf.address % align != 0:
+                    raise ValueError(
+                        "Argument %s is not aligned to %s bytes" % (i, align)
+                    )
+                cargs[i] = ctypes.cast(buf.address, ctypes.POINTER(ctype(t.pointee)))
+            return cast(object, self.cfunc(*cargs))
+        finally:
+            for buf in buffers:
+                buf.release()
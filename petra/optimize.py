@@ -0,0 +1,64 @@
+"""
+This file defines the LLVM optimization pipeline.
+"""
+
+from llvmlite import binding
+
+
+def check_opt_level(opt_level: int, size_level: int) -> None:
+    if opt_level not in (0, 1, 2, 3):
+        raise ValueError("Optimization level must be 0, 1, 2 or 3, not %s" % opt_level)
+    if size_level not in (0, 1, 2):
+        raise ValueError("Size level must be 0, 1 or 2, not %s" % size_level)
+
+
+def inlining_threshold(opt_level: int, size_level: int) -> int:
+    """
+    Returns the inliner threshold used by clang for the given levels.
+    """
+    if size_level == 1:
+        return 75
+    if size_level == 2:
+        return 25
+    if opt_level >= 3:
+        return 250
+    return 225
+
+
+def optimize(
+    module: binding.ModuleRef,
+    target_machine: binding.TargetMachine,
+    opt_level: int,
+    size_level: int = 0,
+) -> None:
+    """
+    Run the function and module pass pipelines over module in place.
+
+    The pipeline is the standard one for the given levels (-O0 to -O3, -Os and
+    -Oz): mem2reg, instcombine, GVN, loop optimizations, the vectorizers and
+    the inliner. At opt_level 0 the module is left untouched.
+    """
+    check_opt_level(opt_level, size_level)
+    if opt_level == 0:
+        return
+
+    pmb = binding.create_pass_manager_builder()
+    pmb.opt_level = opt_level
+    pmb.size_level = size_level
+    pmb.inlining_threshold = inlining_threshold(opt_level, size_level)
+    pmb.loop_vectorize = opt_level >= 2 and size_level == 0
+    pmb.slp_vectorize = opt_level >= 2 and size_level == 0
+
+    fpm = binding.create_function_pass_manager(module)
+    target_machine.add_analysis_passes(fpm)
+    pmb.populate(fpm)
+
+    mpm = binding.create_module_pass_manager()
+    target_machine.add_analysis_passes(mpm)
+    pmb.populate(mpm)
+
+    fpm.initialize()
+    for func in module.functions:
+        fpm.run(func)
+    fpm.finalize()
+    mpm.run(module)
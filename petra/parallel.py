@@ -0,0 +1,71 @@
+"""
+This file defines the worker side of parallel compilation.
+
+Workers receive the LLVM IR of one partition of a program as text, so that
+nothing but strings and bytes crosses the process boundary.
+"""
+
+from llvmlite import binding
+from typing import List, Sequence, TypeVar
+
+from .optimize import optimize
+from .target import create_target_machine
+
+_T = TypeVar("_T")
+
+
+def partition(items: Sequence[_T], parts: int) -> List[Sequence[_T]]:
+    """
+    Split items into at most parts contiguous, nearly equal, non-empty slices.
+    """
+    parts = max(1, min(parts, len(items)))
+    size, extra = divmod(len(items), parts)
+    slices: List[Sequence[_T]] = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        slices.append(items[start:end])
+        start = end
+    return slices
+
+
+def compile_object(
+    llvm_ir: str,
+    opt_level: int,
+    size_level: int,
+    triple: str,
+    cpu: str,
+    features: str,
+    reloc: str,
+    codemodel: str,
+) -> bytes:
+    """
+    Optimize a module and emit it as an object file.
+    """
+    target_machine = create_target_machine(
+        opt_level, triple, cpu, features, reloc, codemodel
+    )
+    module = binding.parse_assembly(llvm_ir)
+    optimize(module, target_machine, opt_level, size_level)
+    return target_machine.emit_object(module)
+
+
+def optimize_bitcode(
+    llvm_ir: str,
+    opt_level: int,
+    size_level: int,
+    triple: str,
+    cpu: str,
+    features: str,
+    reloc: str,
+    codemodel: str,
+) -> bytes:
+    """
+    Optimize a module and return it as bitcode.
+    """
+    target_machine = create_target_machine(
+        opt_level, triple, cpu, features, reloc, codemodel
+    )
+    module = binding.parse_assembly(llvm_ir)
+    optimize(module, target_machine, opt_level, size_level)
+    return module.as_bitcode()
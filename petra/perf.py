@@ -0,0 +1,358 @@
+"""
+This file defines perf map and jitdump output, which let Linux perf symbolize
+JIT-compiled code.
+
+perf reads /tmp/perf-<pid>.map for the names and sizes of JIT-compiled
+functions. A jitdump file, recorded by perf record -k mono and merged with
+perf inject --jit, also holds their machine code and line tables. Both are
+made from the ELF objects MCJIT emits: their symbol tables give the size of
+each function and their DWARF .debug_line sections its line table.
+"""
+
+import ctypes
+import mmap
+import os
+import struct
+import threading
+import time
+
+from llvmlite import binding
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, cast
+
+_SHT_SYMTAB = 2
+_SHT_RELA = 4
+_STT_FUNC = 2
+
+_JITDUMP_MAGIC = 0x4A695444
+_JIT_CODE_LOAD = 0
+_JIT_CODE_DEBUG_INFO = 2
+
+# A row of a line table: section index, offset in section, file name, line.
+LineRow = Tuple[int, int, str, int]
+
+
+def _unpack(fmt: str, data: bytes, pos: int) -> Tuple[int, ...]:
+    """
+    Unpacks the integers of a struct format from data at pos.
+    """
+    return cast(Tuple[int, ...], struct.unpack_from(fmt, data, pos))
+
+
+def _uleb128(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return result, pos
+
+
+def _sleb128(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            if byte & 0x40:
+                result -= 1 << shift
+            return result, pos
+
+
+def _cstring(data: bytes, pos: int) -> Tuple[str, int]:
+    end = data.index(b"\0", pos)
+    return data[pos:end].decode("utf-8", "replace"), end + 1
+
+
+class ElfObject(object):
+    """
+    The function symbols and line table of a 64-bit little-endian ELF
+    relocatable object.
+    """
+
+    def __init__(self, data: bytes):
+        if data[:6] != b"\x7fELF\x02\x01":
+            raise ValueError("Not a 64-bit little-endian ELF object")
+        self.data = data
+        self.machine = _unpack("<H", data, 18)[0]
+        shoff = _unpack("<Q", data, 40)[0]
+        shentsize, shnum, shstrndx = _unpack("<HHH", data, 58)
+        # Name, type, offset, size, link and info of each section.
+        self.sections: List[Tuple[str, int, int, int, int, int]] = []
+        headers = [
+            _unpack("<IIQQQQIIQQ", data, shoff + i * shentsize) for i in range(shnum)
+        ]
+        names_offset = headers[shstrndx][4]
+        for name, type_, _, _, offset, size, link, info, _, _ in headers:
+            name_str = _cstring(data, names_offset + name)[0]
+            self.sections.append((name_str, type_, offset, size, link, info))
+        # Section index, value and size of each symbol.
+        self.symbols: List[Tuple[str, int, int, int, int]] = []
+        for _, type_, offset, size, link, _ in self.sections:
+            if type_ != _SHT_SYMTAB:
+                continue
+            names_offset = self.sections[link][2]
+            for pos in range(offset, offset + size, 24):
+                name, info, _, shndx, value, sym_size = _unpack("<IBBHQQ", data, pos)
+                name_str = _cstring(data, names_offset + name)[0]
+                self.symbols.append((name_str, info & 0xF, shndx, value, sym_size))
+
+    def functions(self) -> Dict[str, Tuple[int, int, int]]:
+        """
+        Returns the section index, offset and size of each function.
+        """
+        return {
+            name: (shndx, value, size)
+            for name, type_, shndx, value, size in self.symbols
+            if type_ == _STT_FUNC and size
+        }
+
+    def _section(self, name: str) -> Optional[int]:
+        for i, section in enumerate(self.sections):
+            if section[0] == name:
+                return i
+        return None
+
+    def _relocations(self, target: int) -> Dict[int, Tuple[int, int]]:
+        """
+        Returns the section index and offset that each relocated location in
+        the target section refers to, by offset.
+        """
+        relocations: Dict[int, Tuple[int, int]] = dict()
+        for _, type_, offset, size, _, info in self.sections:
+            if type_ != _SHT_RELA or info != target:
+                continue
+            for pos in range(offset, offset + size, 24):
+                r_offset, r_info, addend = _unpack("<QQq", self.data, pos)
+                _, _, shndx, value, _ = self.symbols[r_info >> 32]
+                relocations[r_offset] = (shndx, value + addend)
+        return relocations
+
+    def line_rows(self) -> List[LineRow]:
+        """
+        Returns the rows of the DWARF 2 to 4 line tables in .debug_line, or
+        no rows if there are none.
+        """
+        index = self._section(".debug_line")
+        if index is None:
+            return []
+        _, _, start, size, _, _ = self.sections[index]
+        relocations = self._relocations(index)
+        rows: List[LineRow] = []
+        pos = start
+        while pos < start + size:
+            unit_length, version = _unpack("<IH", self.data, pos)
+            # 64-bit DWARF and DWARF 5 aren't emitted for Petra programs.
+            if unit_length >= 0xFFFFFFF0 or not 2 <= version <= 4:
+                return rows
+            end = pos + 4 + unit_length
+            rows.extend(self._line_program(pos, end, start, relocations))
+            pos = end
+        return rows
+
+    def _line_program(
+        self,
+        pos: int,
+        end: int,
+        section_start: int,
+        relocations: Dict[int, Tuple[int, int]],
+    ) -> List[LineRow]:
+        data = self.data
+        version, header_length = _unpack("<HI", data, pos + 4)
+        program = pos + 10 + header_length
+        pos += 10
+        min_length = data[pos]
+        pos += 2 if version >= 4 else 1
+        line_base, line_range, opcode_base = _unpack("<xbBB", data, pos)
+        lengths = data[pos + 4 : pos + 3 + opcode_base]
+        pos += 3 + opcode_base
+        directories = [""]
+        while data[pos]:
+            directory, pos = _cstring(data, pos)
+            directories.append(directory)
+        pos += 1
+        files = [""]
+        while data[pos]:
+            name, pos = _cstring(data, pos)
+            directory_index, pos = _uleb128(data, pos)
+            pos = _uleb128(data, _uleb128(data, pos)[1])[1]
+            if directory_index and not name.startswith("/"):
+                name = os.path.join(directories[directory_index], name)
+            files.append(name)
+
+        rows: List[LineRow] = []
+        section, address, file, line = 0, 0, 1, 1
+        pos = program
+        while pos < end:
+            opcode = data[pos]
+            pos += 1
+            if opcode >= opcode_base:
+                adjusted = opcode - opcode_base
+                address += (adjusted // line_range) * min_length
+                line += line_base + adjusted % line_range
+                rows.append((section, address, files[file], line))
+            elif opcode == 0:
+                length, pos = _uleb128(data, pos)
+                extended = data[pos]
+                if extended == 1:
+                    section, address, file, line = 0, 0, 1, 1
+                elif extended == 2:
+                    offset = pos + 1 - section_start
+                    raw = _unpack("<Q", data, pos + 1)[0]
+                    section, address = relocations.get(offset, (0, raw))
+                pos += length
+            elif opcode == 1:
+                rows.append((section, address, files[file], line))
+            elif opcode == 2:
+                advance, pos = _uleb128(data, pos)
+                address += advance * min_length
+            elif opcode == 3:
+                advance, pos = _sleb128(data, pos)
+                line += advance
+            elif opcode == 4:
+                file, pos = _uleb128(data, pos)
+            elif opcode == 8:
+                address += ((255 - opcode_base) // line_range) * min_length
+            elif opcode == 9:
+                address += _unpack("<H", data, pos)[0]
+                pos += 2
+            else:
+                for _ in range(lengths[opcode - 1]):
+                    pos = _uleb128(data, pos)[1]
+        return rows
+
+
+class JitDump(object):
+    """
+    A jitdump file that perf record notices being mapped into the process.
+    """
+
+    def __init__(self, path: str, machine: int):
+        self.file: BinaryIO = open(path, "w+b")
+        self.code_index = 0
+        header = struct.pack(
+            "<IIIIIIQQ",
+            _JITDUMP_MAGIC,
+            1,
+            40,
+            machine,
+            0,
+            os.getpid(),
+            time.monotonic_ns(),
+            0,
+        )
+        self.file.write(header)
+        self.file.flush()
+        # perf finds the file through this executable mapping of it.
+        self.marker = mmap.mmap(
+            self.file.fileno(),
+            len(header),
+            flags=mmap.MAP_PRIVATE,
+            prot=mmap.PROT_READ | mmap.PROT_EXEC,
+        )
+
+    def write_function(
+        self,
+        name: str,
+        address: int,
+        code: bytes,
+        lines: List[Tuple[int, str, int]],
+    ) -> None:
+        """
+        Record the code of a function loaded at address, preceded by its line
+        table of addresses, file names and lines.
+        """
+        timestamp = time.monotonic_ns()
+        if lines:
+            entries = b"".join(
+                struct.pack("<QII", line_address, line, 0)
+                + filename.encode("utf-8")
+                + b"\0"
+                for line_address, filename, line in lines
+            )
+            self._record(
+                _JIT_CODE_DEBUG_INFO,
+                timestamp,
+                struct.pack("<QQ", address, len(lines)) + entries,
+            )
+        body = struct.pack(
+            "<IIQQQQ",
+            os.getpid(),
+            threading.get_native_id(),
+            address,
+            address,
+            len(code),
+            self.code_index,
+        )
+        self._record(
+            _JIT_CODE_LOAD, timestamp, body + name.encode("utf-8") + b"\0" + code
+        )
+        self.code_index += 1
+        self.file.flush()
+
+    def _record(self, id_: int, timestamp: int, body: bytes) -> None:
+        self.file.write(struct.pack("<IIQ", id_, 16 + len(body), timestamp) + body)
+
+
+# The jitdump file of this process, if any, and the process that opened it.
+_jitdump: Optional[JitDump] = None
+_jitdump_pid = 0
+
+
+def perf_map_path() -> str:
+    return "/tmp/perf-%d.map" % os.getpid()
+
+
+def jitdump_path() -> str:
+    return "/tmp/jit-%d.dump" % os.getpid()
+
+
+def _get_jitdump(machine: int) -> JitDump:
+    global _jitdump, _jitdump_pid
+    if _jitdump is None or _jitdump_pid != os.getpid():
+        _jitdump = JitDump(jitdump_path(), machine)
+        _jitdump_pid = os.getpid()
+    return _jitdump
+
+
+def publish(
+    engine: binding.ExecutionEngine,
+    objects: Iterable[bytes],
+    names: Iterable[str],
+    perf_map: bool,
+    jitdump: bool,
+) -> None:
+    """
+    Write the named functions of objects loaded into a finalized engine to
+    the perf map and the jitdump file of the process. Objects other than ELF
+    objects, and functions not in them, are skipped.
+    """
+    wanted = set(names)
+    lines: List[str] = []
+    for data in objects:
+        try:
+            elf = ElfObject(data)
+        except ValueError:
+            continue
+        rows = elf.line_rows() if jitdump else []
+        for name, (section, offset, size) in sorted(elf.functions().items()):
+            if name not in wanted:
+                continue
+            address = engine.get_function_address(name)
+            lines.append("%x %x %s\n" % (address, size, name))
+            if jitdump:
+                function_lines = [
+                    (address + row_offset - offset, filename, line)
+                    for row_section, row_offset, filename, line in rows
+                    if row_section == section and offset <= row_offset < offset + size
+                ]
+                code = ctypes.string_at(address, size)
+                _get_jitdump(elf.machine).write_function(
+                    name, address, code, function_lines
+                )
+    if perf_map and lines:
+        with open(perf_map_path(), "a") as f:
+            f.writelines(lines)
@@ -0,0 +1,61 @@
+"""
+This file defines the profile of a program compiled with profiling.
+"""
+
+import ctypes
+
+from llvmlite import binding
+from typing import Dict, Iterable, Tuple
+
+from .codegen import profile_name
+
+_Counters = ctypes.c_uint64 * 2
+
+
+def _cycles(item: Tuple[str, Tuple[int, int]]) -> int:
+    return item[1][1]
+
+
+class Profile(object):
+    """
+    The counters of the profiled functions of a compiled program.
+
+    Each function counts its calls and the cycles spent in them, as read by
+    llvm.readcyclecounter (rdtsc on x86). Cycles are inclusive: they include
+    the cycles spent in called functions, and a recursive function counts its
+    inner calls again. Counters are updated without synchronization, so calls
+    from several threads at once may be lost.
+    """
+
+    def __init__(self, engine: binding.ExecutionEngine, names: Iterable[str]):
+        # Keeps the engine, and so the counters, alive.
+        self.engine = engine
+        self.counters: Dict[str, ctypes.Array[ctypes.c_uint64]] = dict()
+        for name in names:
+            address = engine.get_global_value_address(profile_name(name))
+            self.counters[name] = _Counters.from_address(address)
+
+    def read(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Returns the calls and cycles of each function.
+        """
+        return {
+            name: (counters[0], counters[1]) for name, counters in self.counters.items()
+        }
+
+    def reset(self) -> None:
+        for counters in self.counters.values():
+            counters[0] = counters[1] = 0
+
+    def report(self) -> str:
+        """
+        Returns a table of the functions that were called, most cycles first.
+        """
+        lines = ["%-24s %12s %16s %12s" % ("function", "calls", "cycles", "per call")]
+        counts = sorted(self.read().items(), key=_cycles, reverse=True)
+        for name, (calls, cycles) in counts:
+            if calls:
+                lines.append(
+                    "%-24s %12d %16d %12.1f" % (name, calls, cycles, cycles / calls)
+                )
+        return "\n".join(lines)
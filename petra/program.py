@@ -3,81 +3,657 @@ This file defines Petra programs.
 """
 
 from __future__ import annotations  # necessary to avoid forward declarations
+import contextlib
+import ctypes
+import functools
+import itertools
+
 from llvmlite import ir, binding
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Callable,
+    Concatenate,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    ParamSpec,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from .block import Block
+from .cache import ObjectCache
 from .codegen import convert_func_type
 from .function import Ftypein, Ftypeout, Function
+from .native import BufferCallable, NativeCallable, cfunctype
+from .optimize import check_opt_level, optimize
+from .parallel import compile_object, optimize_bitcode, partition
+from .perf import publish
+from .profile import Profile
+from .stats import CompileStats
 from .statement import Statement
 from .symbol import Symbol
+from .type import PointerType
+from .target import create_target_machine, get_target_machine, resolve_target
+from .vectorize import Vectorized, VectorizedFunction
+
+
+class FunctionDecls(Dict[str, ir.Function]):
+    """
+    The functions of a module, declaring any other function of the program the
+    first time it is looked up.
+    """
+
+    def __init__(
+        self, module: ir.Module, functypes: Dict[str, Tuple[Ftypein, Ftypeout]]
+    ):
+        super().__init__()
+        self.module = module
+        self.functypes = functypes
+
+    def __missing__(self, name: str) -> ir.Function:
+        t_in, t_out = self.functypes[name]
+        func = ir.Function(self.module, convert_func_type(t_in, t_out), name)
+        self[name] = func
+        return func
+
+
+class CompiledEngine(object):
+    """
+    An execution engine together with the modules that have been added to it.
+    """
+
+    def __init__(
+        self,
+        engine: binding.ExecutionEngine,
+        target_machine: binding.TargetMachine,
+        cache: Optional[ObjectCache],
+        keep_objects: bool = False,
+    ):
+        self.engine = engine
+        self.target_machine = target_machine
+        self.cache = cache
+        self.modules: List[binding.ModuleRef] = []
+        # Number of the program's definitions compiled into the engine.
+        self.compiled = 0
+        # Cache key and cached object (if any) for each module, by module name.
+        self.objects: Dict[str, Tuple[str, Optional[bytes]]] = dict()
+        self.callables: Dict[str, NativeCallable] = dict()
+        self.vectorized: Dict[str, Vectorized] = dict()
+        # Objects loaded since they were last taken, if they are kept.
+        self.loaded: Optional[List[bytes]] = [] if keep_objects else None
+        if cache is not None or keep_objects:
+            engine.set_object_cache(self.notify, self.getbuffer)
+
+    def notify(self, module: binding.ModuleRef, data: bytes) -> None:
+        key = self.objects.get(module.name, ("", None))[0]
+        if self.cache is not None and key:
+            self.cache.store(key, data)
+        if self.loaded is not None:
+            self.loaded.append(data)
+
+    def getbuffer(self, module: binding.ModuleRef) -> Optional[bytes]:
+        data = self.objects.get(module.name, ("", None))[1]
+        if self.loaded is not None and data is not None:
+            self.loaded.append(data)
+        return data
+
+
+Definition = Union[Function, VectorizedFunction]
+
+# Stands in for the phases of a program without stats.
+_untimed = contextlib.nullcontext()
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+
+def operation(
+    name: str,
+) -> Callable[
+    [Callable[Concatenate[Program, _P], _R]], Callable[Concatenate[Program, _P], _R]
+]:
+    """
+    Decorates a method of Program to record its phases in the program's stats
+    as the named operation.
+    """
+
+    def decorate(
+        method: Callable[Concatenate[Program, _P], _R],
+    ) -> Callable[Concatenate[Program, _P], _R]:
+        @functools.wraps(method)
+        def wrapper(self: Program, *args: _P.args, **kwargs: _P.kwargs) -> _R:
+            if self.stats is None:
+                return method(self, *args, **kwargs)
+            with self.stats.operation(name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
 
 
 class Program(object):
     """
     A Petra program. Petra programs can be codegen'ed to LLVM.
-    """
 
-    llvm_initialized: bool = False
+    In incremental mode, functions added after compile() are compiled on the
+    next call in a module of their own and added to the live engine.
 
-    def __init__(self, name: str):
+    In lazy mode, add_func only records functions. They are typechecked and
+    codegen'ed when reachable from the entry points given to to_llvm(),
+    compile(), save_object() or get_callable() (all functions by default), so
+    functions may be added in any order and unused functions cost nothing.
+
+    Given stats, the time taken by each phase of these operations is recorded
+    in it; see CompileStats.
+
+    With profile, every function counts its calls and the cycles spent in them,
+    which can be read from get_profile().
+
+    With debug_info, functions get DWARF line tables mapping their code to the
+    Python lines their statements were constructed on, for statements built
+    inside record_locations(). With perf_map or jitdump, the functions of each
+    compiled engine are written to /tmp/perf-<pid>.map or /tmp/jit-<pid>.dump
+    for Linux perf; see perf.py.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        incremental: bool = False,
+        lazy: bool = False,
+        stats: Optional[CompileStats] = None,
+        profile: bool = False,
+        debug_info: bool = False,
+        perf_map: bool = False,
+        jitdump: bool = False,
+    ):
         self.module = ir.Module(name=name)
         self.functypes: Dict[str, Tuple[Ftypein, Ftypeout]] = dict()
-        self.funcs: Dict[str, ir.Function] = dict()
+        self.funcs: Dict[str, ir.Function] = FunctionDecls(self.module, self.functypes)
+        # Functions typechecked and codegen'ed into the module, in order.
+        self.definitions: Dict[str, Definition] = dict()
+        # Functions recorded in lazy mode but not yet built.
+        self.deferred: Dict[str, Callable[[], Definition]] = dict()
+        self.incremental = incremental
+        self.lazy = lazy
+        self.stats = stats
+        self.profile = profile
+        self.debug_info = debug_info
+        self.perf_map = perf_map
+        self.jitdump = jitdump
+        # Compiled state, valid until the module is next mutated.
+        self._llvm_ir: Optional[str] = None
+        self._engines: Dict[Tuple[int, int, str, str], CompiledEngine] = dict()
+
+    def _phase(
+        self, phase: str, function: Optional[str] = None
+    ) -> ContextManager[None]:
+        if self.stats is None:
+            return _untimed
+        return self.stats.phase(phase, function)
+
+    def _invalidate(self) -> None:
+        self._llvm_ir = None
+        if not self.incremental:
+            self._engines.clear()
 
     def add_func_decl(self, name: str, t_in: Ftypein, t_out: Ftypeout) -> Program:
         if name in self.functypes:
             raise Exception("Function %s already exists in program." % name)
+        self._invalidate()
         self.functypes[name] = (t_in, t_out)
         self.funcs[name] = ir.Function(
             self.module, convert_func_type(t_in, t_out), name
         )
         return self
 
+    @operation("add_func")
     def add_func(
-        self, name: str, args: Tuple[Symbol, ...], t_out: Ftypeout, block: Block,
+        self,
+        name: str,
+        args: Tuple[Symbol, ...],
+        t_out: Ftypeout,
+        block: Block,
+        fastmath: Sequence[str] = (),
     ) -> Program:
+        """
+        Add a function. fastmath gives LLVM fast-math flags, such as "reassoc"
+        and "contract", for every floating point operation in it.
+        """
         if name in self.functypes:
             raise Exception("Function %s already exists in program." % name)
+        self._invalidate()
         t_in = tuple(arg.get_type() for arg in args)
         self.functypes[name] = (t_in, t_out)
+        self._define(
+            name, lambda: Function(name, args, t_out, block, self.functypes, fastmath)
+        )
+        return self
+
+    @operation("add_func")
+    def add_vectorized(self, name: str, scalar: str) -> Program:
+        """
+        Add a function applying the scalar function elementwise over buffers.
+        Call it from Python with get_vectorized().
+        """
+        if name in self.functypes:
+            raise Exception("Function %s already exists in program." % name)
+        func = VectorizedFunction(name, scalar, self.functypes)
+        self._invalidate()
+        self.functypes[name] = func.functype()
+        self._define(name, lambda: func)
+        return self
+
+    def _define(self, name: str, make: Callable[[], Definition]) -> None:
+        if self.lazy:
+            self.deferred[name] = make
+            return
+        t_in, t_out = self.functypes[name]
         self.funcs[name] = ir.Function(
             self.module, convert_func_type(t_in, t_out), name
         )
-        func = Function(name, args, t_out, block, self.functypes)
-        func.codegen(self.module, self.funcs)
-        return self
+        self._build(name, make)
+
+    def _build(self, name: str, make: Callable[[], Definition]) -> Definition:
+        with self._phase("typecheck", name):
+            func = make()
+        with self._phase("codegen", name):
+            func.codegen(self.module, self.funcs, self.profile, self.debug_info)
+        self.definitions[name] = func
+        return func
+
+    def _materialize(self, entry_points: Optional[Iterable[str]] = None) -> None:
+        """
+        Build the deferred functions reachable from entry_points, or all of
+        them if entry_points is None.
+        """
+        if not self.deferred:
+            return
+        if entry_points is None:
+            worklist = list(self.deferred)
+        else:
+            worklist = list(entry_points)
+            for name in worklist:
+                if name not in self.functypes:
+                    raise Exception("Function %s does not exist in program." % name)
+        built = False
+        try:
+            while worklist:
+                name = worklist.pop()
+                make = self.deferred.get(name)
+                if make is None:
+                    continue
+                func = self._build(name, make)
+                del self.deferred[name]
+                worklist.extend(func.calls)
+                built = True
+        finally:
+            # Even if a later function fails, those built so far are in the
+            # module.
+            if built:
+                self._invalidate()
+
+    @operation("to_llvm")
+    def to_llvm(self, entry_points: Optional[Iterable[str]] = None) -> str:
+        self._materialize(entry_points)
+        return self._llvm()
+
+    def _llvm(self) -> str:
+        if self._llvm_ir is None:
+            with self._phase("to_llvm"):
+                self._llvm_ir = str(self.module)
+        return self._llvm_ir
+
+    def _partial_llvm(
+        self, name: str, definitions: Iterable[Union[Function, VectorizedFunction]]
+    ) -> str:
+        """
+        Returns a module defining the given functions, declaring only the
+        functions they call.
+        """
+        module = ir.Module(name=name)
+        funcs = FunctionDecls(module, self.functypes)
+        for func in definitions:
+            with self._phase("codegen", func.name):
+                func.codegen(module, funcs, self.profile, self.debug_info)
+        with self._phase("to_llvm"):
+            return str(module)
+
+    def _delta_llvm(self, start: int) -> str:
+        """
+        Returns a module defining the functions added since the first start.
+        """
+        return self._partial_llvm(
+            "%s.%d" % (self.module.name, start),
+            itertools.islice(self.definitions.values(), start, None),
+        )
+
+    def _partitions_llvm(self, jobs: int) -> List[str]:
+        """
+        Returns the program split into up to jobs modules.
+        """
+        parts = partition(list(self.definitions.values()), jobs)
+        return [
+            self._partial_llvm("%s.part%d" % (self.module.name, i), part)
+            for i, part in enumerate(parts)
+        ]
+
+    def _backing_module(
+        self, target_machine: binding.TargetMachine, opt_level: int, size_level: int
+    ) -> binding.ModuleRef:
+        llvm_ir = self._llvm()
+        with self._phase("parse"):
+            backing_mod = binding.parse_assembly(llvm_ir)
+        with self._phase("optimize"):
+            optimize(backing_mod, target_machine, opt_level, size_level)
+        return backing_mod
+
+    @operation("save_object")
+    def save_object(
+        self,
+        filename: str,
+        opt_level: int = 0,
+        size_level: int = 0,
+        triple: Optional[str] = None,
+        cpu: Optional[str] = None,
+        features: Optional[str] = None,
+        reloc: str = "default",
+        codemodel: str = "default",
+        jobs: int = 1,
+        entry_points: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Compile the program to an object file.
 
-    def to_llvm(self) -> str:
-        return str(self.module)
-
-    def save_object(self, filename: str) -> None:
-        if not self.llvm_initialized:
-            self.llvm_initialized = True
-            binding.initialize()
-            binding.initialize_native_target()
-            binding.initialize_native_asmprinter()
-        # FIXME: Not sure why MyPy can't type check this, maybe a bug
-        target = binding.Target.from_default_triple()  # type: ignore
-        target_machine = target.create_target_machine()
-        backing_mod = binding.parse_assembly(self.to_llvm())
+        By default the object is tuned to the host CPU; pass triple, cpu and
+        features (e.g. cpu="generic", features="") to target another machine.
+
+        With jobs > 1 the program is split into that many modules which are
+        optimized in parallel worker processes, then linked and emitted as one
+        object.
+        """
+        check_opt_level(opt_level, size_level)
+        self._materialize(entry_points)
+        target_machine = get_target_machine(
+            opt_level, triple, cpu, features, reloc, codemodel
+        )
+        if jobs > 1 and len(self.definitions) > 1:
+            triple, cpu, features = resolve_target(triple, cpu, features)
+            options = (opt_level, size_level, triple, cpu, features, reloc, codemodel)
+            partitions = self._partitions_llvm(jobs)
+            with self._phase("optimize"), ProcessPoolExecutor(jobs) as pool:
+                futures = [
+                    pool.submit(optimize_bitcode, llvm_ir, *options)
+                    for llvm_ir in partitions
+                ]
+                bitcodes = [future.result() for future in futures]
+            with self._phase("parse"):
+                backing_mod = binding.parse_bitcode(bitcodes[0])
+                for bitcode in bitcodes[1:]:
+                    backing_mod.link_in(binding.parse_bitcode(bitcode))
+        else:
+            backing_mod = self._backing_module(target_machine, opt_level, size_level)
+        with self._phase("emit"):
+            obj = target_machine.emit_object(backing_mod)
         with open(filename, "wb") as f:
-            f.write(target_machine.emit_object(backing_mod))
-
-    def compile(self) -> binding.ExecutionEngine:
-        if not self.llvm_initialized:
-            self.llvm_initialized = True
-            binding.initialize()
-            binding.initialize_native_target()
-            binding.initialize_native_asmprinter()
-        # FIXME: Not sure why MyPy can't type check this, maybe a bug
-        target = binding.Target.from_default_triple()  # type: ignore
-        target_machine = target.create_target_machine()
-        backing_mod = binding.parse_assembly(self.to_llvm())
+            f.write(obj)
+
+    @operation("compile")
+    def compile(
+        self,
+        opt_level: int = 0,
+        size_level: int = 0,
+        cache: Optional[ObjectCache] = None,
+        cpu: Optional[str] = None,
+        features: Optional[str] = None,
+        jobs: int = 1,
+        entry_points: Optional[Iterable[str]] = None,
+    ) -> binding.ExecutionEngine:
+        """
+        Compile the program into an execution engine.
+
+        The engine is remembered and returned again by later calls with the same
+        options until a function is added to the program. In incremental mode
+        the remembered engine is extended with the added functions instead.
+
+        Code is tuned to the host CPU unless cpu or features are given.
+
+        With jobs > 1 the program is split into that many modules which are
+        compiled to objects in parallel worker processes and loaded into one
+        engine.
+        """
+        self._materialize(entry_points)
+        return self._compile(opt_level, size_level, cache, cpu, features, jobs).engine
+
+    @operation("compile")
+    def get_callable(
+        self,
+        name: str,
+        opt_level: int = 0,
+        size_level: int = 0,
+        cache: Optional[ObjectCache] = None,
+        cpu: Optional[str] = None,
+        features: Optional[str] = None,
+        jobs: int = 1,
+    ) -> NativeCallable:
+        """
+        Returns a native callable for the named function, compiling the program
+        with the given options if necessary.
+
+        The ctypes prototype is derived from the function's Petra type, so
+        arguments are checked and converted by ctypes. Arguments for pointers
+        to scalars may also be NumPy arrays or other objects supporting the
+        buffer protocol, which are passed without copying; see BufferCallable.
+        Callables are cached per engine, and keep it alive so that they stay
+        valid after the program changes or is collected.
+        """
+        self._materialize([name])
+        compiled = self._compile(opt_level, size_level, cache, cpu, features, jobs)
+        if name not in compiled.callables:
+            if name not in self.functypes:
+                raise Exception("Function %s does not exist in program." % name)
+            t_in, t_out = self.functypes[name]
+            address = compiled.engine.get_function_address(name)
+            if address == 0:
+                raise Exception("Function %s has no definition." % name)
+            engine = compiled.engine
+            cfunc = cfunctype(t_in, t_out)(address)
+            native = NativeCallable(engine, cfunc)
+            if any(isinstance(t, PointerType) for t in t_in):
+                func = self.definitions.get(name)
+                written = (True,) * len(t_in)
+                if isinstance(func, Function):
+                    written = func.written
+                native = BufferCallable(engine, cfunc, t_in, written)
+            compiled.callables[name] = native
+        return compiled.callables[name]
+
+    @operation("compile")
+    def get_vectorized(
+        self,
+        name: str,
+        opt_level: int = 2,
+        size_level: int = 0,
+        cache: Optional[ObjectCache] = None,
+        cpu: Optional[str] = None,
+        features: Optional[str] = None,
+        jobs: int = 1,
+    ) -> Vectorized:
+        """
+        Returns a Python callable for a function added with add_vectorized(),
+        compiling the program with the given options if necessary.
+        """
+        self._materialize([name])
+        func = self.definitions.get(name)
+        if not isinstance(func, VectorizedFunction):
+            raise Exception("Function %s is not a vectorized function." % name)
+        compiled = self._compile(opt_level, size_level, cache, cpu, features, jobs)
+        if name not in compiled.vectorized:
+            address = compiled.engine.get_function_address(name)
+            compiled.vectorized[name] = Vectorized(
+                compiled.engine, address, func.t_in, func.t_out
+            )
+        return compiled.vectorized[name]
+
+    @operation("compile")
+    def get_profile(
+        self,
+        opt_level: int = 0,
+        size_level: int = 0,
+        cache: Optional[ObjectCache] = None,
+        cpu: Optional[str] = None,
+        features: Optional[str] = None,
+        jobs: int = 1,
+    ) -> Profile:
+        """
+        Returns the profile of the program compiled with the given options,
+        compiling it if necessary. The program must have been created with
+        profile.
+        """
+        if not self.profile:
+            raise Exception("Program %s is not profiled." % self.module.name)
+        self._materialize()
+        compiled = self._compile(opt_level, size_level, cache, cpu, features, jobs)
+        names = [
+            name
+            for name, func in self.definitions.items()
+            if isinstance(func, Function)
+        ]
+        return Profile(compiled.engine, names)
+
+    def _compile(
+        self,
+        opt_level: int,
+        size_level: int,
+        cache: Optional[ObjectCache],
+        cpu: Optional[str],
+        features: Optional[str],
+        jobs: int,
+    ) -> CompiledEngine:
+        check_opt_level(opt_level, size_level)
+        triple, cpu, features = resolve_target(None, cpu, features)
+        compiled = self._engines.get((opt_level, size_level, cpu, features))
+        if compiled is not None and compiled.compiled == len(self.definitions):
+            return compiled
+        if compiled is None and jobs > 1 and len(self.definitions) > 1:
+            compiled = self._compile_parallel(
+                opt_level, size_level, cache, triple, cpu, features, jobs
+            )
+            self._engines[opt_level, size_level, cpu, features] = compiled
+            return compiled
+        if compiled is None:
+            target_machine = create_target_machine(opt_level, triple, cpu, features)
+            llvm_ir = self._llvm()
+        else:
+            target_machine = compiled.target_machine
+            cache = compiled.cache
+            llvm_ir = self._delta_llvm(compiled.compiled)
+
+        key, cached = "", None
+        if cache is not None:
+            key = cache.key(
+                llvm_ir,
+                triple,
+                cpu,
+                features,
+                opt_level,
+                size_level,
+            )
+            cached = cache.load(key)
+        with self._phase("parse"):
+            backing_mod = binding.parse_assembly(llvm_ir)
+        # A cached object replaces codegen entirely, so only optimize on a miss.
+        if cached is None:
+            with self._phase("optimize"):
+                optimize(backing_mod, target_machine, opt_level, size_level)
+
+        if compiled is None:
+            engine = binding.create_mcjit_compiler(backing_mod, target_machine)
+            compiled = CompiledEngine(
+                engine, target_machine, cache, self.perf_map or self.jitdump
+            )
+            self._engines[opt_level, size_level, cpu, features] = compiled
+        else:
+            compiled.engine.add_module(backing_mod)
+        compiled.objects[backing_mod.name] = (key, cached)
+        compiled.modules.append(backing_mod)
+        compiled.compiled = len(self.definitions)
+        self._finalize(compiled)
+        return compiled
+
+    def _compile_parallel(
+        self,
+        opt_level: int,
+        size_level: int,
+        cache: Optional[ObjectCache],
+        triple: str,
+        cpu: str,
+        features: str,
+        jobs: int,
+    ) -> CompiledEngine:
+        partitions = self._partitions_llvm(jobs)
+        objects: List[Optional[bytes]] = [None] * len(partitions)
+        keys = [""] * len(partitions)
+        if cache is not None:
+            for i, llvm_ir in enumerate(partitions):
+                keys[i] = cache.key(
+                    llvm_ir, triple, cpu, features, opt_level, size_level
+                )
+                objects[i] = cache.load(keys[i])
+        # The JIT code model allows the objects to be loaded anywhere in memory.
+        reloc, codemodel = "default", "jitdefault"
+        options = (opt_level, size_level, triple, cpu, features, reloc, codemodel)
+        with self._phase("jit"), ProcessPoolExecutor(jobs) as pool:
+            futures = {
+                i: pool.submit(compile_object, llvm_ir, *options)
+                for i, llvm_ir in enumerate(partitions)
+                if objects[i] is None
+            }
+            for i, future in futures.items():
+                data = future.result()
+                objects[i] = data
+                if cache is not None:
+                    cache.store(keys[i], data)
+
+        target_machine = create_target_machine(opt_level, triple, cpu, features)
+        backing_mod = binding.parse_assembly(str(ir.Module(name=self.module.name)))
         engine = binding.create_mcjit_compiler(backing_mod, target_machine)
-        engine.finalize_object()
-        engine.run_static_constructors()
-        return engine
+        compiled = CompiledEngine(
+            engine, target_machine, cache, self.perf_map or self.jitdump
+        )
+        for obj in objects:
+            assert obj is not None
+            engine.add_object_file(binding.ObjectFileRef.from_data(obj))
+            if compiled.loaded is not None:
+                compiled.loaded.append(obj)
+        compiled.modules.append(backing_mod)
+        compiled.compiled = len(self.definitions)
+        self._finalize(compiled)
+        return compiled
+
+    def _finalize(self, compiled: CompiledEngine) -> None:
+        """
+        Generate code for the modules added to the engine, and write the
+        functions loaded for perf if asked to.
+        """
+        with self._phase("jit"):
+            compiled.engine.finalize_object()
+            compiled.engine.run_static_constructors()
+        if compiled.loaded:
+            publish(
+                compiled.engine,
+                compiled.loaded,
+                self.definitions,
+                self.perf_map,
+                self.jitdump,
+            )
+            compiled.loaded.clear()
 
     def load_library(self, filename: str) -> None:
         binding.load_library_permanently(filename)
@@ -0,0 +1,76 @@
+"""
+This file defines the simplification context and helpers.
+
+Simplification runs on typechecked functions before codegen. It folds
+constants, removes algebraic identities and prunes branches with constant
+predicates, so that less IR is emitted. Nodes are never changed in place:
+a node whose children are simplified is replaced by a copy, so that code can
+be simplified for one program and used again in another.
+"""
+
+import copy
+
+from typing import TYPE_CHECKING, List, TypeVar, Union, cast
+
+if TYPE_CHECKING:
+    from .block import Block
+    from .expr import Expr
+    from .statement import Statement
+
+
+class SimplifyContext(object):
+    """
+    A context for use in simplification, counting the nodes removed.
+    """
+
+    def __init__(self) -> None:
+        self.removed = 0
+
+    def discard(self, node: Union["Expr", "Statement", "Block"]) -> None:
+        """
+        Count node and everything below it as removed.
+        """
+        self.removed += count_nodes(node)
+
+
+_Node = TypeVar("_Node")
+
+
+def replace(node: _Node, **fields: object) -> _Node:
+    """
+    Returns node if its fields already hold the given values, or else a copy
+    of node with them.
+    """
+    for field, value in fields.items():
+        old = cast(object, getattr(node, field))
+        if isinstance(value, list):
+            # List fields are the same if they hold the same nodes.
+            new_items, old_items = cast(List[object], value), cast(List[object], old)
+            same = len(new_items) == len(old_items) and all(
+                a is b for a, b in zip(new_items, old_items)
+            )
+        else:
+            same = value is old
+        if not same:
+            copied = copy.copy(node)
+            for name, new in fields.items():
+                setattr(copied, name, new)
+            return copied
+    return node
+
+
+def count_nodes(node: Union["Expr", "Statement", "Block"]) -> int:
+    """
+    Returns the number of expressions, statements and blocks in node.
+    """
+    return 1 + sum(count_nodes(child) for child in node.children())
+
+
+def wrap(value: int, bits: int) -> int:
+    """
+    Returns value wrapped to a bits-wide two's complement integer.
+    """
+    value &= (1 << bits) - 1
+    if value >= 1 << (bits - 1):
+        value -= 1 << bits
+    return value
@@ -2,19 +2,44 @@
 This file defines Petra statements.
 """
 
+import contextlib
 import re
+import sys
 
 from abc import ABC, abstractmethod
 from llvmlite import ir
-from typing import Tuple, Union, Optional
+from typing import TYPE_CHECKING, Iterator, List, Sequence, Tuple, Union, Optional
 
-from .codegen import CodegenContext
+from .codegen import CodegenContext, Location
+from .simplify import SimplifyContext, replace
 from .expr import Expr, Var
 from .symbol import Symbol
 from .type import Type
 from .typecheck import TypeContext, TypeCheckError
 from .validate import ValidateError
 
+if TYPE_CHECKING:
+    from .block import Block
+
+_record_locations = False
+
+
+@contextlib.contextmanager
+def record_locations() -> Iterator[None]:
+    """
+    Record the Python line each statement built inside the with block is
+    constructed on, for the line tables of programs with debug_info.
+    Statements built elsewhere have no location.
+    """
+    global _record_locations
+    previous = _record_locations
+    _record_locations = True
+    try:
+        yield
+    finally:
+        _record_locations = previous
+
+
 #
 # Statement
 #
@@ -25,6 +50,17 @@ class Statement(ABC):
     A Petra statement. Petra functions are composed of statements.
     """
 
+    # Where the statement was constructed, for debug info; see
+    # record_locations.
+    location: Optional[Location] = None
+
+    def __new__(cls, *args: object, **kwargs: object) -> "Statement":
+        statement = super().__new__(cls)
+        if _record_locations:
+            frame = sys._getframe(1)
+            statement.location = (frame.f_code.co_filename, frame.f_lineno)
+        return statement
+
     @abstractmethod
     def validate(self) -> None:
         """
@@ -33,6 +69,9 @@ class Statement(ABC):
         This performs structural checks on the validity of an statement. It does not
         perform semantics checks.
 
+        Children are validated when they are constructed, so only the statement
+        itself is checked.
+
         """
         pass
 
@@ -55,6 +94,21 @@ class Statement(ABC):
         """
         pass
 
+    def children(self) -> Sequence[Union[Expr, "Block"]]:
+        """
+        Returns the expressions and blocks directly inside the statement.
+        """
+        return []
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, "Statement"]]:
+        """
+        Simplify the statement.
+
+        Returns the equivalent statements to use in place of self. self is
+        left unchanged.
+        """
+        return [self]
+
 
 #
 # DefineVar
@@ -72,9 +126,7 @@ class DefineVar(Statement):
         self.validate()
 
     def validate(self) -> None:
-        self.symbol.validate()
-        if self.value is not None:
-            self.value.validate()
+        pass
 
     def typecheck(self, ctx: TypeContext) -> None:
         if self.value is not None:
@@ -95,12 +147,22 @@ class DefineVar(Statement):
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> None:
         if self.value is not None:
             value = self.value.codegen(builder, ctx)
-        ctx.vars[self.symbol] = builder.alloca(
+        ctx.vars[self.symbol] = ctx.alloca(
             self.symbol.get_type().llvm_type(), name=self.symbol.unique_name()
         )
+        # The variable lives until the end of its block; see Block.codegen.
+        ctx.lifetime_start(builder, ctx.vars[self.symbol])
         if self.value is not None:
             builder.store(value, ctx.vars[self.symbol])
 
+    def children(self) -> Sequence[Expr]:
+        return [] if self.value is None else [self.value]
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, Statement]]:
+        if self.value is not None:
+            return [replace(self, value=self.value.simplify(ctx))]
+        return [self]
+
 
 #
 # Assign
@@ -118,11 +180,14 @@ class Assign(Statement):
         self.validate()
 
     def validate(self) -> None:
-        self.var.validate()
-        self.value.validate()
+        pass
 
     def typecheck(self, ctx: TypeContext) -> None:
         self.var.typecheck(ctx)
+        if self.var.symbol in ctx.loop_variables:
+            raise TypeCheckError(
+                "Cannot assign to loop variable '%s'" % self.var.symbol
+            )
         self.value.typecheck(ctx)
         expected_type = self.value.get_type()
         if self.var.get_type() != expected_type:
@@ -135,6 +200,12 @@ class Assign(Statement):
         value = self.value.codegen(builder, ctx)
         builder.store(value, ctx.vars[self.var.symbol])
 
+    def children(self) -> Sequence[Expr]:
+        return [self.var, self.value]
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, Statement]]:
+        return [replace(self, value=self.value.simplify(ctx))]
+
 
 #
 # Return
@@ -151,8 +222,7 @@ class Return(Statement):
         self.validate()
 
     def validate(self) -> None:
-        if isinstance(self.e, Expr):
-            self.e.validate()
+        pass
 
     def typecheck(self, ctx: TypeContext) -> None:
         if isinstance(self.e, Expr):
@@ -174,6 +244,16 @@ class Return(Statement):
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> None:
         if isinstance(self.e, Expr):
             value = self.e.codegen(builder, ctx)
+            ctx.end_profile(builder)
             builder.ret(value)
         else:
+            ctx.end_profile(builder)
             builder.ret_void()
+
+    def children(self) -> Sequence[Expr]:
+        return [self.e] if isinstance(self.e, Expr) else []
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, Statement]]:
+        if isinstance(self.e, Expr):
+            return [replace(self, e=self.e.simplify(ctx))]
+        return [self]
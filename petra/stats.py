@@ -0,0 +1,220 @@
+"""
+This file defines the compile statistics collected by Petra programs.
+"""
+
+import re
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from llvmlite import binding
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, cast
+
+# A row of an LLVM timing report: columns of "seconds (percent%)", then a name.
+_timing_row_re = re.compile(r"^\s*((?:[\d.]+ \(\s*[\d.]+%\)\s+)+)(\S.*?)\s*$")
+_timing_column_re = re.compile(r"([\d.]+) \(")
+
+
+def parse_pass_timings(report: str) -> Dict[str, float]:
+    """
+    Returns the wall clock seconds of each pass in an LLVM pass execution
+    timing report, summed over passes of the same name.
+    """
+    seconds: Dict[str, float] = dict()
+    in_pass_section = False
+    for line in report.splitlines():
+        if "timing report" in line:
+            in_pass_section = "Pass execution timing report" in line
+            continue
+        match = _timing_row_re.match(line)
+        if not in_pass_section or match is None:
+            continue
+        # Both groups take part in every match.
+        columns, name = cast(Tuple[str, str], match.groups())
+        if name == "Total":
+            continue
+        wall = float(cast(List[str], _timing_column_re.findall(columns))[-1])
+        seconds[name] = seconds.get(name, 0.0) + wall
+    return seconds
+
+
+class PhaseRecord(object):
+    """
+    The time taken by one phase of an operation on a program, for a single
+    function if function is given. peak_bytes is the peak Python memory
+    allocated during the phase beyond what was allocated when it started, or
+    None if memory isn't being traced.
+    """
+
+    def __init__(
+        self,
+        operation: str,
+        phase: str,
+        function: Optional[str],
+        seconds: float,
+        peak_bytes: Optional[int],
+    ):
+        self.operation = operation
+        self.phase = phase
+        self.function = function
+        self.seconds = seconds
+        self.peak_bytes = peak_bytes
+
+    def __repr__(self) -> str:
+        return "PhaseRecord(%r, %r, %r, %r, %r)" % (
+            self.operation,
+            self.phase,
+            self.function,
+            self.seconds,
+            self.peak_bytes,
+        )
+
+
+Hook = Callable[[PhaseRecord], None]
+
+
+class CompileStats(object):
+    """
+    Statistics of the operations on a program: add_func, to_llvm, compile
+    (including get_callable) and save_object. Pass it to Program to collect
+    them.
+
+    Each operation records a PhaseRecord per phase it runs, and one for the
+    whole operation with phase "total". The phases are
+
+      typecheck  typechecking and simplifying a function
+      codegen    emitting a function into the llvmlite module
+      to_llvm    converting the module to LLVM IR text
+      parse      parsing the IR with LLVM
+      optimize   running the optimization pipeline
+      jit        generating machine code into the execution engine
+      emit       generating an object file
+
+    and typecheck and codegen are recorded per function. With jobs > 1 the
+    worker processes' optimization and code generation are recorded as a
+    single optimize or jit phase.
+
+    With memory, each phase also records its peak Python memory, tracing
+    allocations with tracemalloc while operations run. With pass_timing,
+    LLVM's timing report of the passes run by each operation is kept in
+    pass_reports and summed by pass name in pass_seconds; passes run in worker
+    processes aren't included. Hooks are called with each record as it is
+    made.
+    """
+
+    def __init__(
+        self,
+        memory: bool = False,
+        pass_timing: bool = False,
+        hooks: Sequence[Hook] = (),
+    ):
+        self.memory = memory
+        self.pass_timing = pass_timing
+        self.hooks: List[Hook] = list(hooks)
+        self.records: List[PhaseRecord] = []
+        self.pass_reports: List[str] = []
+        self.pass_seconds: Dict[str, float] = dict()
+        self._operation: Optional[str] = None
+        # Peak memory of the phases in progress, innermost last.
+        self._peaks: List[int] = []
+
+    @contextmanager
+    def operation(self, name: str) -> Iterator[None]:
+        """
+        Record the phases run inside as part of the named operation, unless
+        they are already part of another one.
+        """
+        if self._operation is not None:
+            yield
+            return
+        self._operation = name
+        tracing = self.memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if self.pass_timing:
+            binding.set_time_passes(True)
+        try:
+            with self.phase("total"):
+                yield
+        finally:
+            self._operation = None
+            if self.pass_timing:
+                self._add_pass_report(binding.report_and_reset_timings())
+                binding.set_time_passes(False)
+            if tracing:
+                tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, phase: str, function: Optional[str] = None) -> Iterator[None]:
+        operation = self._operation or phase
+        peak_bytes = None
+        traced = self.memory and tracemalloc.is_tracing()
+        if traced:
+            start_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            self._peaks.append(start_bytes)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if traced:
+                peak = max(tracemalloc.get_traced_memory()[1], self._peaks.pop())
+                # Resetting the peak for an inner phase hides it from this one.
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                peak_bytes = peak - start_bytes
+            self._record(PhaseRecord(operation, phase, function, seconds, peak_bytes))
+
+    def _record(self, record: PhaseRecord) -> None:
+        self.records.append(record)
+        for hook in self.hooks:
+            hook(record)
+
+    def _add_pass_report(self, report: str) -> None:
+        if not report:
+            return
+        self.pass_reports.append(report)
+        for name, seconds in parse_pass_timings(report).items():
+            self.pass_seconds[name] = self.pass_seconds.get(name, 0.0) + seconds
+
+    def phase_seconds(self, operation: Optional[str] = None) -> Dict[str, float]:
+        """
+        Returns the total seconds spent in each phase, of the given operation
+        or of all of them.
+        """
+        seconds: Dict[str, float] = dict()
+        for record in self.records:
+            if operation is None or record.operation == operation:
+                seconds[record.phase] = seconds.get(record.phase, 0.0) + record.seconds
+        return seconds
+
+    def function_seconds(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the total seconds spent in each phase of each function.
+        """
+        seconds: Dict[str, Dict[str, float]] = dict()
+        for record in self.records:
+            if record.function is not None:
+                phases = seconds.setdefault(record.function, dict())
+                phases[record.phase] = phases.get(record.phase, 0.0) + record.seconds
+        return seconds
+
+    def clear(self) -> None:
+        self.records.clear()
+        self.pass_reports.clear()
+        self.pass_seconds.clear()
+
+    def report(self) -> str:
+        """
+        Returns a table of the seconds spent in each phase of each operation.
+        """
+        lines = ["%-12s %-10s %12s" % ("operation", "phase", "seconds")]
+        operations: List[str] = []
+        for record in self.records:
+            if record.operation not in operations:
+                operations.append(record.operation)
+        for operation in operations:
+            for phase, seconds in self.phase_seconds(operation).items():
+                lines.append("%-12s %-10s %12.6f" % (operation, phase, seconds))
+        return "\n".join(lines)
@@ -2,10 +2,8 @@
 This file defines Petra symbols.
 """
 
-import re
-
 from .type import Type
-from .validate import ValidateError
+from .validate import validate_name
 
 _next_id = 0
 
@@ -30,11 +28,7 @@ class Symbol(object):
         return self.t
 
     def validate(self) -> None:
-        if not re.match(r"^[a-z][a-zA-Z0-9_]*$", self.name):
-            raise ValidateError(
-                "Variable name '%s' does not match regex "
-                "^[a-z][a-zA-Z0-9_]*$" % self.name
-            )
+        validate_name("Variable name", self.name)
 
     def unique_name(self) -> str:
         return "_%s_%s" % (self.id, self.name)
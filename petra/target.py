@@ -0,0 +1,104 @@
+"""
+This file defines the process-wide LLVM target machine registry.
+"""
+
+import threading
+
+from llvmlite import binding
+from typing import Dict, Optional, Tuple
+
+_lock = threading.RLock()
+_initialized = False
+_host: Optional[Tuple[str, str]] = None
+_machines: Dict[Tuple[int, str, str, str, str, str], binding.TargetMachine] = dict()
+
+
+def initialize_llvm() -> None:
+    """
+    Initialize LLVM and the native target. Only the first call does any work.
+    """
+    global _initialized
+    with _lock:
+        if not _initialized:
+            binding.initialize()
+            binding.initialize_native_target()
+            binding.initialize_native_asmprinter()
+            _initialized = True
+
+
+def host_cpu() -> Tuple[str, str]:
+    """
+    Returns the name and the features of the host CPU.
+    """
+    global _host
+    with _lock:
+        if _host is None:
+            initialize_llvm()
+            try:
+                features = binding.get_host_cpu_features().flatten()
+            except RuntimeError:
+                # LLVM cannot detect features on every platform.
+                features = ""
+            _host = (binding.get_host_cpu_name(), features)
+        return _host
+
+
+def resolve_target(
+    triple: Optional[str] = None,
+    cpu: Optional[str] = None,
+    features: Optional[str] = None,
+) -> Tuple[str, str, str]:
+    """
+    Fill in the default triple, and the host CPU name and features when
+    targeting the host, for any of triple, cpu and features that are None.
+    """
+    initialize_llvm()
+    default_triple = binding.get_default_triple()
+    if triple is None:
+        triple = default_triple
+    host_name, host_features = host_cpu() if triple == default_triple else ("", "")
+    if cpu is None:
+        cpu = host_name
+    if features is None:
+        features = host_features
+    return (triple, cpu, features)
+
+
+def create_target_machine(
+    opt_level: int = 0,
+    triple: Optional[str] = None,
+    cpu: Optional[str] = None,
+    features: Optional[str] = None,
+    reloc: str = "default",
+    codemodel: str = "jitdefault",
+) -> binding.TargetMachine:
+    """
+    Create a new target machine, tuned to the host CPU unless overridden.
+
+    Execution engines take ownership of their target machine, so they must be
+    given a new one rather than one from get_target_machine().
+    """
+    triple, cpu, features = resolve_target(triple, cpu, features)
+    target = binding.Target.from_triple(triple)
+    return target.create_target_machine(
+        cpu=cpu, features=features, opt=opt_level, reloc=reloc, codemodel=codemodel
+    )
+
+
+def get_target_machine(
+    opt_level: int = 0,
+    triple: Optional[str] = None,
+    cpu: Optional[str] = None,
+    features: Optional[str] = None,
+    reloc: str = "default",
+    codemodel: str = "jitdefault",
+) -> binding.TargetMachine:
+    """
+    Returns a target machine shared by the whole process for the given options.
+    """
+    triple, cpu, features = resolve_target(triple, cpu, features)
+    key = (opt_level, triple, cpu, features, reloc, codemodel)
+    with _lock:
+        if key not in _machines:
+            _machines[key] = create_target_machine(*key)
+        return _machines[key]
@@ -3,28 +3,66 @@ This file defines Petra comparisons and boolean logic.
 """
 
 from llvmlite import ir
-from typing import Optional
+from typing import Callable, Dict, Optional, Sequence, cast
 
+from .arithmetic import ArithmeticBinop, is_float
 from .codegen import CodegenContext
-from .expr import Expr
-from .validate import ValidateError
-from .type import Bool_t, Int8_t, Int16_t, Int32_t, Int64_t, Type
+from .constant import Bool, Constant
+from .expr import Expr, Var
+from .simplify import SimplifyContext, replace
+from .validate import ValidateError, validate_fastmath
+from .type import (
+    Bool_t,
+    BoolType,
+    FloatType,
+    Int8_t,
+    Int16_t,
+    Int32_t,
+    Int64_t,
+    IntType,
+    Type,
+    VectorType,
+)
 from .typecheck import TypeContext, TypeCheckError
 
 #
 # Comparison
 #
 
+_compare: Dict[str, Callable[[int, int], bool]] = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+}
+
 
 class Comparison(Expr):
     """
     Comparison operator.
+
+    Floating point comparisons are ordered, i.e. false if either operand is
+    NaN, when ordered is True, and unordered, i.e. true if either is NaN, when
+    ordered is False. Neq is unordered by default and the others ordered, as in
+    IEEE 754 and C. They carry the LLVM fast-math flags given in fastmath, in addition
+    to those of the enclosing function.
     """
 
-    def __init__(self, left: Expr, right: Expr, op: str):
+    def __init__(
+        self,
+        left: Expr,
+        right: Expr,
+        op: str,
+        ordered: bool = True,
+        fastmath: Sequence[str] = (),
+    ):
         self.left = left
         self.right = right
         self.op = op
+        self.ordered = ordered
+        self.fastmath = tuple(fastmath)
         self.t: Optional[Type] = None
         self.validate()
 
@@ -34,10 +72,9 @@ class Comparison(Expr):
         raise Exception("Expected type to exist - was typecheck called?")
 
     def validate(self) -> None:
-        self.left.validate()
-        self.right.validate()
         if self.op not in ["<", "<=", ">", ">="]:
             raise ValidateError("Invalid operator for comparison: %s" % str(self.op))
+        validate_fastmath(self.fastmath)
 
     def typecheck(self, ctx: TypeContext) -> None:
         self.left.typecheck(ctx)
@@ -51,6 +88,15 @@ class Comparison(Expr):
             (Int64_t, Int64_t),
         ):
             self.t = Bool_t
+        elif t_left == t_right and isinstance(t_left, FloatType):
+            self.t = Bool_t
+        elif (
+            t_left == t_right
+            and isinstance(t_left, VectorType)
+            and isinstance(t_left.element, (IntType, FloatType))
+        ):
+            # Vectors are compared elementwise, giving a vector of Bool_t.
+            self.t = VectorType(Bool_t, t_left.lanes)
         else:
             raise TypeCheckError(
                 "Incompatible types for arithmetic comparison: %s and %s"
@@ -60,16 +106,47 @@ class Comparison(Expr):
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
         left = self.left.codegen(builder, ctx)
         right = self.right.codegen(builder, ctx)
+        if is_float(self.left.get_type()):
+            flags = ctx.fastmath_flags(self.fastmath)
+            if self.ordered:
+                return builder.fcmp_ordered(self.op, left, right, flags=flags)
+            return builder.fcmp_unordered(self.op, left, right, flags=flags)
         return builder.icmp_signed(self.op, left, right)
 
+    def children(self) -> Sequence[Expr]:
+        return [self.left, self.right]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        node = replace(
+            self, left=self.left.simplify(ctx), right=self.right.simplify(ctx)
+        )
+        # Python's float comparisons don't distinguish ordered and unordered.
+        if (
+            isinstance(node.left, Constant)
+            and isinstance(node.right, Constant)
+            and node.get_type() == Bool_t
+            and not is_float(node.left.get_type())
+        ):
+            ctx.removed += 2
+            # Only integer and boolean comparisons get here.
+            left, right = cast(int, node.left.value), cast(int, node.right.value)
+            return Bool(_compare[node.op](left, right))
+        return node
+
 
 class Lt(Comparison):
     """
     Less-than operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, "<")
+    def __init__(
+        self,
+        left: Expr,
+        right: Expr,
+        ordered: bool = True,
+        fastmath: Sequence[str] = (),
+    ):
+        super().__init__(left, right, "<", ordered, fastmath)
 
 
 class Lte(Comparison):
@@ -77,8 +154,14 @@ class Lte(Comparison):
     Less-than-or-equal operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, "<=")
+    def __init__(
+        self,
+        left: Expr,
+        right: Expr,
+        ordered: bool = True,
+        fastmath: Sequence[str] = (),
+    ):
+        super().__init__(left, right, "<=", ordered, fastmath)
 
 
 class Gt(Comparison):
@@ -86,8 +169,14 @@ class Gt(Comparison):
     Greater-than operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, ">")
+    def __init__(
+        self,
+        left: Expr,
+        right: Expr,
+        ordered: bool = True,
+        fastmath: Sequence[str] = (),
+    ):
+        super().__init__(left, right, ">", ordered, fastmath)
 
 
 class Gte(Comparison):
@@ -95,8 +184,14 @@ class Gte(Comparison):
     Greater-than-or-equal operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, ">=")
+    def __init__(
+        self,
+        left: Expr,
+        right: Expr,
+        ordered: bool = True,
+        fastmath: Sequence[str] = (),
+    ):
+        super().__init__(left, right, ">=", ordered, fastmath)
 
 
 #
@@ -110,10 +205,9 @@ class Equality(Comparison):
     """
 
     def validate(self) -> None:
-        self.left.validate()
-        self.right.validate()
         if self.op not in ["==", "!="]:
             raise ValidateError("Invalid operator for equality: %s" % str(self.op))
+        validate_fastmath(self.fastmath)
 
     def typecheck(self, ctx: TypeContext) -> None:
         self.left.typecheck(ctx)
@@ -128,6 +222,14 @@ class Equality(Comparison):
             (Int64_t, Int64_t),
         ):
             self.t = Bool_t
+        elif t_left == t_right and isinstance(t_left, FloatType):
+            self.t = Bool_t
+        elif (
+            t_left == t_right
+            and isinstance(t_left, VectorType)
+            and isinstance(t_left.element, (IntType, FloatType, BoolType))
+        ):
+            self.t = VectorType(Bool_t, t_left.lanes)
         else:
             raise TypeCheckError(
                 "Incompatible types for equality comparison: %s and %s"
@@ -140,23 +242,60 @@ class Eq(Equality):
     Equals operator.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, "==")
+    def __init__(
+        self,
+        left: Expr,
+        right: Expr,
+        ordered: bool = True,
+        fastmath: Sequence[str] = (),
+    ):
+        super().__init__(left, right, "==", ordered, fastmath)
 
 
 class Neq(Equality):
     """
-    Not-equals operator.
+    Not-equals operator. Unordered by default, so NaN != NaN.
     """
 
-    def __init__(self, left: Expr, right: Expr):
-        super().__init__(left, right, "!=")
+    def __init__(
+        self,
+        left: Expr,
+        right: Expr,
+        ordered: bool = False,
+        fastmath: Sequence[str] = (),
+    ):
+        super().__init__(left, right, "!=", ordered, fastmath)
 
 
 #
 # Logical
 #
 
+# The largest right operand, in nodes, that is evaluated unconditionally.
+_max_speculation_cost = 8
+
+
+def _speculation_cost(e: Expr) -> Optional[int]:
+    """
+    Returns the number of nodes in e if it can be evaluated unconditionally,
+    i.e. it has no side effects and cannot trap, or None otherwise.
+    """
+    if isinstance(e, (Constant, Var)):
+        return 1
+    if isinstance(e, Not):
+        cost = _speculation_cost(e.e)
+        return None if cost is None else cost + 1
+    # Division can trap, so only add, sub and mul are speculated.
+    if isinstance(e, (Comparison, Logical)) or (
+        isinstance(e, ArithmeticBinop) and e.op in ("add", "sub", "mul")
+    ):
+        left = _speculation_cost(e.left)
+        right = _speculation_cost(e.right)
+        if left is None or right is None:
+            return None
+        return left + right + 1
+    return None
+
 
 class Logical(Expr):
     """
@@ -175,8 +314,7 @@ class Logical(Expr):
         raise Exception("Expected type to exist - was typecheck called?")
 
     def validate(self) -> None:
-        self.left.validate()
-        self.right.validate()
+        pass
 
     def typecheck(self, ctx: TypeContext) -> None:
         self.left.typecheck(ctx)
@@ -191,6 +329,42 @@ class Logical(Expr):
                 % (str(t_left), str(t_right))
             )
 
+    def _codegen(
+        self, builder: ir.IRBuilder, ctx: CodegenContext, short_circuit: bool, name: str
+    ) -> ir.Value:
+        """
+        Evaluates to short_circuit if left does, and to right otherwise.
+        """
+        short = ir.Constant(Bool_t.llvm_type(), short_circuit)
+        left = self.left.codegen(builder, ctx)
+        cost = _speculation_cost(self.right)
+        if cost is not None and cost <= _max_speculation_cost:
+            # Evaluating right unconditionally is cheaper than branching.
+            right = self.right.codegen(builder, ctx)
+            if short_circuit:
+                return builder.select(left, short, right)
+            return builder.select(left, right, short)
+        left_block = builder.block
+        right_block = builder.append_basic_block(name=name + ".rhs")
+        end_block = builder.append_basic_block(name=name + ".end")
+        if short_circuit:
+            builder.cbranch(left, end_block, right_block)
+        else:
+            builder.cbranch(left, right_block, end_block)
+        builder.position_at_end(right_block)
+        right = self.right.codegen(builder, ctx)
+        # The right operand may have ended in a block of its own.
+        right_block = builder.block
+        builder.branch(end_block)
+        builder.position_at_end(end_block)
+        result = builder.phi(Bool_t.llvm_type())
+        result.add_incoming(short, left_block)
+        result.add_incoming(right, right_block)
+        return result
+
+    def children(self) -> Sequence[Expr]:
+        return [self.left, self.right]
+
 
 class And(Logical):
     """
@@ -198,13 +372,25 @@ class And(Logical):
     """
 
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
-        left = self.left.codegen(builder, ctx)
-        temp = builder.alloca(Bool_t.llvm_type())
-        builder.store(left, temp)
-        with builder.if_then(left):
-            right = self.right.codegen(builder, ctx)
-            builder.store(right, temp)
-        return builder.load(temp)
+        return self._codegen(builder, ctx, False, "and")
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        node = replace(
+            self, left=self.left.simplify(ctx), right=self.right.simplify(ctx)
+        )
+        # true && x is x; false && x is false without evaluating x.
+        if isinstance(node.left, Constant):
+            if node.left.value:
+                ctx.removed += 2
+                return node.right
+            ctx.removed += 1
+            ctx.discard(node.right)
+            return node.left
+        # x && true is x.
+        if isinstance(node.right, Constant) and node.right.value:
+            ctx.removed += 2
+            return node.left
+        return node
 
 
 class Or(Logical):
@@ -213,14 +399,25 @@ class Or(Logical):
     """
 
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
-        left = self.left.codegen(builder, ctx)
-        temp = builder.alloca(Bool_t.llvm_type())
-        builder.store(left, temp)
-        notleft = builder.sub(ir.Constant(Bool_t.llvm_type(), True), left)
-        with builder.if_then(notleft):
-            right = self.right.codegen(builder, ctx)
-            builder.store(right, temp)
-        return builder.load(temp)
+        return self._codegen(builder, ctx, True, "or")
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        node = replace(
+            self, left=self.left.simplify(ctx), right=self.right.simplify(ctx)
+        )
+        # false || x is x; true || x is true without evaluating x.
+        if isinstance(node.left, Constant):
+            if not node.left.value:
+                ctx.removed += 2
+                return node.right
+            ctx.removed += 1
+            ctx.discard(node.right)
+            return node.left
+        # x || false is x.
+        if isinstance(node.right, Constant) and not node.right.value:
+            ctx.removed += 2
+            return node.left
+        return node
 
 
 #
@@ -244,7 +441,7 @@ class Not(Expr):
         raise Exception("Expected type to exist - was typecheck called?")
 
     def validate(self) -> None:
-        self.e.validate()
+        pass
 
     def typecheck(self, ctx: TypeContext) -> None:
         self.e.typecheck(ctx)
@@ -257,3 +454,16 @@ class Not(Expr):
     def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
         value = self.e.codegen(builder, ctx)
         return builder.sub(ir.Constant(Bool_t.llvm_type(), True), value)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.e]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        node = replace(self, e=self.e.simplify(ctx))
+        if isinstance(node.e, Constant):
+            ctx.removed += 1
+            return Bool(not node.e.value)
+        if isinstance(node.e, Not):
+            ctx.removed += 2
+            return node.e.e
+        return node
@@ -1,13 +1,45 @@
 """
 This file defines Petra types.
+
+Types are interned: constructing a type structurally equal to an existing one
+returns the existing instance, so types compare by identity and each LLVM type
+is built only once.
 """
 
+from __future__ import annotations
+
+import threading
+
 from abc import ABC, abstractmethod
 from llvmlite import ir
-from typing import Generic, Optional, Tuple, TypeVar, Union, List, Dict
+from typing import Generic, Optional, Tuple, TypeVar, Union, List, Dict, cast
+from typing import Type as PyType
 
 from .validate import ValidateError
 
+_TypeT = TypeVar("_TypeT", bound="Type")
+
+# Canonical instances keyed by class and structure, shared by all programs.
+# Types are kept alive for the life of the process, like the builtin ones.
+_interned: Dict[Tuple[object, ...], Type] = dict()
+_intern_lock = threading.Lock()
+
+
+def _lookup(cls: PyType[_TypeT], key: Tuple[object, ...]) -> Optional[_TypeT]:
+    t = _interned.get((cls,) + key)
+    return t if isinstance(t, cls) else None
+
+
+def _intern(t: _TypeT, key: Tuple[object, ...]) -> _TypeT:
+    """
+    Returns the canonical instance for key, which is t unless another thread
+    interned an equal type first.
+    """
+    with _intern_lock:
+        canonical = _interned.setdefault((type(t),) + key, t)
+    assert isinstance(canonical, type(t))
+    return canonical
+
 
 class Type(object):
     """
@@ -43,9 +75,21 @@ class IntType(ValueType[int]):
     An integer type.
     """
 
+    bits: int
+    _llvm_type: ir.Type
+
+    def __new__(cls, bits: int) -> IntType:
+        t = _lookup(cls, (bits,))
+        if t is None:
+            t = super().__new__(cls)
+            Type.__init__(t, "Int%d_t" % bits)
+            t.bits = bits
+            t._llvm_type = ir.IntType(bits)
+            t = _intern(t, (bits,))
+        return t
+
     def __init__(self, bits: int):
-        super().__init__("Int%d_t" % bits)
-        self.bits = bits
+        pass  # Initialized once, in __new__.
 
     def validate(self, value: int) -> None:
         exp = self.bits - 1
@@ -56,7 +100,7 @@ class IntType(ValueType[int]):
             )
 
     def llvm_type(self) -> ir.Type:
-        return ir.IntType(self.bits)
+        return self._llvm_type
 
 
 class FloatType(ValueType[float]):
@@ -64,22 +108,29 @@ class FloatType(ValueType[float]):
     A floating point type.
     """
 
+    bits: int
+    _llvm_type: ir.Type
+
+    def __new__(cls, bits: int, name: Optional[str] = None) -> FloatType:
+        t = _lookup(cls, (bits, name))
+        if t is None:
+            if bits not in (32, 64):
+                raise ValidateError("Float bits must be 32 or 64")
+            t = super().__new__(cls)
+            Type.__init__(t, name or "Float%d_t" % bits)
+            t.bits = bits
+            t._llvm_type = ir.FloatType() if bits == 32 else ir.DoubleType()
+            t = _intern(t, (bits, name))
+        return t
+
     def __init__(self, bits: int, name: Optional[str] = None):
-        if bits not in (32, 64):
-            raise ValidateError("Float bits must be 32 or 64")
-        super().__init__(name or "Float%d_t" % bits)
-        self.bits = bits
+        pass  # Initialized once, in __new__.
 
     def validate(self, value: float) -> None:
         pass
 
     def llvm_type(self) -> ir.Type:
-        if self.bits == 32:
-            return ir.FloatType()
-        elif self.bits == 64:
-            return ir.DoubleType()
-        else:
-            assert False
+        return self._llvm_type
 
 
 class BoolType(ValueType[bool]):
@@ -87,8 +138,16 @@ class BoolType(ValueType[bool]):
     A boolean type.
     """
 
+    def __new__(cls) -> BoolType:
+        t = _lookup(cls, ())
+        if t is None:
+            t = super().__new__(cls)
+            Type.__init__(t, "Bool_t")
+            t = _intern(t, ())
+        return t
+
     def __init__(self) -> None:
-        super().__init__("Bool_t")
+        pass  # Initialized once, in __new__.
 
     def validate(self, value: bool) -> None:
         pass
@@ -97,17 +156,33 @@ class BoolType(ValueType[bool]):
         return ir.IntType(1)
 
 
+# The element types of vectors.
+ScalarType = Union[IntType, FloatType, BoolType]
+
+
 class PointerType(Type):
     """
     A pointer type.
     """
 
+    pointee: Type
+    pointer_type: ir.Type
+
+    def __new__(cls, pointee: Type) -> PointerType:
+        t = _lookup(cls, (pointee,))
+        if t is None:
+            t = super().__new__(cls)
+            Type.__init__(t, "PointerType(%s)" % pointee)
+            t.pointee = pointee
+            t.pointer_type = ir.PointerType(pointee.llvm_type())
+            t = _intern(t, (pointee,))
+        return t
+
     def __init__(self, pointee: Type) -> None:
-        super().__init__("PointerType(%s)" % pointee)
-        self.pointee = pointee
+        pass  # Initialized once, in __new__.
 
     def llvm_type(self) -> ir.Type:
-        return ir.PointerType(self.pointee.llvm_type())
+        return self.pointer_type
 
 
 class StructType(Type):
@@ -115,14 +190,27 @@ class StructType(Type):
     A struct type.
     """
 
+    elements: Tuple[Type, ...]
+    name_to_index: Dict[str, int]
+    struct_type: ir.Type
+
+    def __new__(cls, elements: Dict[str, Type]) -> StructType:
+        key = tuple(elements.items())
+        t = _lookup(cls, key)
+        if t is None:
+            t = super().__new__(cls)
+            Type.__init__(t, "StructType(%s)" % elements)
+            t.elements = tuple(elements.values())
+            llvm_elements = [e.llvm_type() for e in elements.values()]
+            t.struct_type = ir.LiteralStructType(llvm_elements)
+            t.name_to_index = {}
+            for i, name in enumerate(elements.keys()):
+                t.name_to_index[name] = i
+            t = _intern(t, key)
+        return t
+
     def __init__(self, elements: Dict[str, Type]) -> None:
-        super().__init__("StructType(%s)" % elements)
-        self.elements = tuple(elements.values())
-        llvm_elements = [t.llvm_type() for t in elements.values()]
-        self.struct_type = ir.LiteralStructType(llvm_elements)
-        self.name_to_index: Dict[str, int] = {}
-        for i, name in enumerate(elements.keys()):
-            self.name_to_index[name] = i
+        pass  # Initialized once, in __new__.
 
     def llvm_type(self) -> ir.Type:
         return self.struct_type
@@ -133,16 +221,69 @@ class ArrayType(Type):
     An array type.
     """
 
+    element: Type
+    length: int
+    array_type: ir.Type
+
+    def __new__(cls, element: Type, length: int) -> ArrayType:
+        t = _lookup(cls, (element, length))
+        if t is None:
+            t = super().__new__(cls)
+            Type.__init__(t, "ArrayType(%s, %s)" % (element, length))
+            t.element = element
+            t.length = length
+            t.array_type = ir.ArrayType(element.llvm_type(), length)
+            t = _intern(t, (element, length))
+        return t
+
     def __init__(self, element: Type, length: int) -> None:
-        super().__init__("ArrayType(%s, %s)" % (element, length))
-        self.element = element
-        self.length = length
-        self.array_type = ir.ArrayType(self.element.llvm_type(), self.length)
+        pass  # Initialized once, in __new__.
 
     def llvm_type(self) -> ir.Type:
         return self.array_type
 
 
+class VectorType(ValueType[Tuple[object, ...]]):
+    """
+    A SIMD vector type of lanes scalar elements.
+    """
+
+    element: ScalarType
+    lanes: int
+    vector_type: ir.Type
+
+    def __new__(cls, element: Type, lanes: int) -> VectorType:
+        t = _lookup(cls, (element, lanes))
+        if t is None:
+            if not isinstance(element, (IntType, FloatType, BoolType)):
+                raise ValidateError("Vector elements must be scalars, not %s" % element)
+            if lanes < 1:
+                raise ValidateError("Vectors must have at least one lane")
+            t = super().__new__(cls)
+            Type.__init__(t, "VectorType(%s, %s)" % (element, lanes))
+            t.element = element
+            t.lanes = lanes
+            t.vector_type = ir.VectorType(element.llvm_type(), lanes)
+            t = _intern(t, (element, lanes))
+        return t
+
+    def __init__(self, element: Type, lanes: int) -> None:
+        pass  # Initialized once, in __new__.
+
+    def validate(self, value: Tuple[object, ...]) -> None:
+        if len(value) != self.lanes:
+            raise ValidateError(
+                "%s value must have %d lanes, not %d" % (self, self.lanes, len(value))
+            )
+        # Each lane holds a value of the element type.
+        element = cast(ValueType[object], self.element)
+        for v in value:
+            element.validate(v)
+
+    def llvm_type(self) -> ir.Type:
+        return self.vector_type
+
+
 # Type aliases for functions.
 Ftypein = Tuple[Type, ...]
 Ftypeout = Union[Tuple[()], Type]
@@ -4,12 +4,34 @@ This file defines the type context and errors.
 
 from __future__ import annotations
 
-from typing import Dict, Set, Tuple
+from typing import Dict, Optional, Set, Tuple
 
 from .symbol import Symbol
 from .type import Ftypein, Ftypeout, Type
 
 
+class Scope(object):
+    """
+    The variables defined in a block, chained to the scope of the enclosing
+    block. Entering a block is O(1) and lookups are O(nesting depth).
+    """
+
+    def __init__(self, parent: Optional[Scope] = None):
+        self.parent = parent
+        self.symbols: Set[Symbol] = set()
+
+    def __contains__(self, symbol: Symbol) -> bool:
+        scope: Optional[Scope] = self
+        while scope is not None:
+            if symbol in scope.symbols:
+                return True
+            scope = scope.parent
+        return False
+
+    def add(self, symbol: Symbol) -> None:
+        self.symbols.add(symbol)
+
+
 class TypeContext(object):
     """
     A typing context for use in typechecking.
@@ -18,14 +40,25 @@ class TypeContext(object):
     def __init__(
         self, functypes: Dict[str, Tuple[Ftypein, Ftypeout]], return_type: Ftypeout
     ):
-        self.variables: Set[Symbol] = set()
+        self.variables = Scope()
+        # Variables of enclosing For loops, which can't be assigned to.
+        self.loop_variables = Scope()
+        # Shared by all nested contexts; functions are never added while
+        # typechecking.
         self.functypes = functypes
         self.return_type = return_type
+        # Names of the functions called, shared by all nested contexts.
+        self.calls: Set[str] = set()
 
-    def copy(self) -> TypeContext:
-        ctx_copy = TypeContext(dict(self.functypes), self.return_type)
-        ctx_copy.variables = set(self.variables)
-        return ctx_copy
+    def child(self) -> TypeContext:
+        """
+        Returns the context of a nested block.
+        """
+        ctx = TypeContext(self.functypes, self.return_type)
+        ctx.variables = Scope(self.variables)
+        ctx.loop_variables = Scope(self.loop_variables)
+        ctx.calls = self.calls
+        return ctx
 
 
 class TypeCheckError(Exception):
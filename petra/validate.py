@@ -1,7 +1,59 @@
 """
-This file defines the ValidateError exception.
+This file defines the ValidateError exception, trusted mode and shared
+structural checks.
 """
 
+import contextlib
+import re
+
+from typing import Iterable, Iterator
+
+_name_regex = re.compile(r"^[a-z][a-zA-Z0-9_]*$")
+_trusted = False
+# LLVM's fast-math flags. "fast" implies all the others.
+_fastmath_flags = frozenset(
+    ["reassoc", "contract", "nnan", "ninf", "nsz", "arcp", "afn", "fast"]
+)
+
 
 class ValidateError(Exception):
     pass
+
+
+@contextlib.contextmanager
+def trusted() -> Iterator[None]:
+    """
+    Skip redundant structural checks, such as name checks, on Petra code built
+    inside the with block. Meant for machine-generated programs known to be
+    well formed. Type checking still happens as usual.
+    """
+    global _trusted
+    previous = _trusted
+    _trusted = True
+    try:
+        yield
+    finally:
+        _trusted = previous
+
+
+def is_trusted() -> bool:
+    return _trusted
+
+
+def validate_name(kind: str, name: str) -> None:
+    """
+    Raise ValidateError unless name is a valid Petra identifier.
+    """
+    if not _trusted and not _name_regex.match(name):
+        raise ValidateError(
+            "%s '%s' does not match regex ^[a-z][a-zA-Z0-9_]*$" % (kind, name)
+        )
+
+
+def validate_fastmath(flags: Iterable[str]) -> None:
+    """
+    Raise ValidateError unless flags are all LLVM fast-math flags.
+    """
+    for flag in flags:
+        if flag not in _fastmath_flags:
+            raise ValidateError("Unknown fast-math flag '%s'" % flag)
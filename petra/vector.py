@@ -0,0 +1,352 @@
+"""
+This file defines Petra SIMD vector operations.
+
+Elementwise arithmetic and comparisons on vectors are handled by the scalar
+operators; this file defines the operations that move values between lanes,
+vectors and memory.
+"""
+
+from llvmlite import ir
+from typing import List, Optional, Sequence, Tuple, Union, cast
+
+from .codegen import CodegenContext
+from .constant import Constant, int_value
+from .expr import Expr
+from .simplify import SimplifyContext, replace
+from .statement import Statement
+from .type import (
+    BoolType,
+    FloatType,
+    Int32_t,
+    IntType,
+    PointerType,
+    Type,
+    ValueType,
+    VectorType,
+)
+from .typecheck import TypeContext, TypeCheckError
+from .validate import ValidateError
+
+
+def _vector_type(e: Expr) -> VectorType:
+    t = e.get_type()
+    if not isinstance(t, VectorType):
+        raise TypeCheckError("%s is not a VectorType" % t)
+    return t
+
+
+def _check_lane(lane: Expr, t: VectorType) -> None:
+    t_lane = lane.get_type()
+    if not isinstance(t_lane, IntType):
+        raise TypeCheckError("Lane index must be an integer, not %s" % t_lane)
+    value = int_value(lane)
+    if value is not None and not 0 <= value < t.lanes:
+        raise TypeCheckError("Lane %s out of range for %s" % (value, t))
+
+
+def _memory_element(ptr: Expr) -> Union[IntType, FloatType]:
+    """
+    Returns the element type of a pointer used for vector loads and stores.
+    """
+    t_ptr = ptr.get_type()
+    if not isinstance(t_ptr, PointerType):
+        raise TypeCheckError("%s is not a PointerType" % t_ptr)
+    element = t_ptr.pointee
+    # Bool_t vectors are bit-packed in memory, unlike arrays of Bool_t.
+    if not isinstance(element, (IntType, FloatType)):
+        raise TypeCheckError("Cannot load or store vectors of %s" % element)
+    return element
+
+
+def _vector_pointer(builder: ir.IRBuilder, ptr: ir.Value, t: VectorType) -> ir.Value:
+    return builder.bitcast(ptr, ir.PointerType(t.llvm_type()))
+
+
+def _alignment(t: VectorType) -> int:
+    """
+    Returns the alignment of a vector in an array of its elements.
+    """
+    element = t.element
+    assert isinstance(element, (IntType, FloatType))
+    return element.bits // 8
+
+
+class Splat(Expr):
+    """
+    A vector with every lane set to the same scalar.
+    """
+
+    def __init__(self, e: Expr, lanes: int):
+        self.e = e
+        self.lanes = lanes
+        self.t: Optional[Type] = None
+        self.validate()
+
+    def get_type(self) -> Type:
+        if isinstance(self.t, Type):
+            return self.t
+        raise Exception("Expected type to exist - was typecheck called?")
+
+    def validate(self) -> None:
+        if self.lanes < 1:
+            raise ValidateError("Vectors must have at least one lane")
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.e.typecheck(ctx)
+        t = self.e.get_type()
+        if not isinstance(t, (IntType, FloatType, BoolType)):
+            raise TypeCheckError("Cannot splat non-scalar type %s" % t)
+        self.t = VectorType(t, self.lanes)
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
+        t = self.get_type()
+        assert isinstance(t, VectorType)
+        value = self.e.codegen(builder, ctx)
+        undef = ir.Constant(t.llvm_type(), ir.Undefined)
+        zero = ir.Constant(Int32_t.llvm_type(), 0)
+        vector = builder.insert_element(undef, value, zero)
+        mask = ir.Constant(VectorType(Int32_t, t.lanes).llvm_type(), [0] * t.lanes)
+        return builder.shuffle_vector(vector, undef, mask)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.e]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        node = replace(self, e=self.e.simplify(ctx))
+        if isinstance(node.e, Constant):
+            ctx.removed += 1
+            t = node.get_type()
+            assert isinstance(t, VectorType)
+            return Constant((cast(object, node.e.value),) * node.lanes, t)
+        return node
+
+
+class ExtractLane(Expr):
+    """
+    Returns the scalar in one lane of a vector.
+    """
+
+    def __init__(self, vector: Expr, lane: Expr):
+        self.vector = vector
+        self.lane = lane
+        self.t: Optional[Type] = None
+        self.validate()
+
+    def get_type(self) -> Type:
+        if isinstance(self.t, Type):
+            return self.t
+        raise Exception("Expected type to exist - was typecheck called?")
+
+    def validate(self) -> None:
+        pass
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.vector.typecheck(ctx)
+        self.lane.typecheck(ctx)
+        t = _vector_type(self.vector)
+        _check_lane(self.lane, t)
+        self.t = t.element
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
+        vector = self.vector.codegen(builder, ctx)
+        lane = self.lane.codegen(builder, ctx)
+        return builder.extract_element(vector, lane)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.vector, self.lane]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        node = replace(
+            self, vector=self.vector.simplify(ctx), lane=self.lane.simplify(ctx)
+        )
+        lane = int_value(node.lane)
+        if isinstance(node.vector, Constant) and lane is not None:
+            ctx.removed += 2
+            value = cast(Tuple[object, ...], node.vector.value)[lane]
+            return Constant(value, cast(ValueType[object], node.get_type()))
+        return node
+
+
+class InsertLane(Expr):
+    """
+    Returns a copy of a vector with one lane replaced by a scalar.
+    """
+
+    def __init__(self, vector: Expr, lane: Expr, value: Expr):
+        self.vector = vector
+        self.lane = lane
+        self.value = value
+        self.t: Optional[Type] = None
+        self.validate()
+
+    def get_type(self) -> Type:
+        if isinstance(self.t, Type):
+            return self.t
+        raise Exception("Expected type to exist - was typecheck called?")
+
+    def validate(self) -> None:
+        pass
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.vector.typecheck(ctx)
+        self.lane.typecheck(ctx)
+        self.value.typecheck(ctx)
+        t = _vector_type(self.vector)
+        _check_lane(self.lane, t)
+        if self.value.get_type() != t.element:
+            raise TypeCheckError(
+                "Cannot insert %s into %s" % (self.value.get_type(), t)
+            )
+        self.t = t
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
+        vector = self.vector.codegen(builder, ctx)
+        lane = self.lane.codegen(builder, ctx)
+        value = self.value.codegen(builder, ctx)
+        return builder.insert_element(vector, value, lane)
+
+    def children(self) -> Sequence[Expr]:
+        return [self.vector, self.lane, self.value]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        return replace(
+            self,
+            vector=self.vector.simplify(ctx),
+            lane=self.lane.simplify(ctx),
+            value=self.value.simplify(ctx),
+        )
+
+
+class Shuffle(Expr):
+    """
+    Returns a vector of lanes picked from two vectors of the same type.
+
+    Mask entry i is the lane of the concatenation of left and right that
+    becomes lane i of the result, so the result has one lane per mask entry.
+    """
+
+    def __init__(self, left: Expr, right: Expr, mask: Sequence[int]):
+        self.left = left
+        self.right = right
+        self.mask = tuple(mask)
+        self.t: Optional[Type] = None
+        self.validate()
+
+    def get_type(self) -> Type:
+        if isinstance(self.t, Type):
+            return self.t
+        raise Exception("Expected type to exist - was typecheck called?")
+
+    def validate(self) -> None:
+        if not self.mask:
+            raise ValidateError("Shuffle mask must not be empty")
+        if min(self.mask) < 0:
+            raise ValidateError("Shuffle mask entries must not be negative")
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.left.typecheck(ctx)
+        self.right.typecheck(ctx)
+        t = _vector_type(self.left)
+        if self.right.get_type() != t:
+            raise TypeCheckError(
+                "Incompatible types for shuffle: %s and %s" % (t, self.right.get_type())
+            )
+        if max(self.mask) >= 2 * t.lanes:
+            raise TypeCheckError(
+                "Shuffle mask entry %s out of range for two %s" % (max(self.mask), t)
+            )
+        self.t = VectorType(t.element, len(self.mask))
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
+        left = self.left.codegen(builder, ctx)
+        right = self.right.codegen(builder, ctx)
+        mask_type = VectorType(Int32_t, len(self.mask)).llvm_type()
+        return builder.shuffle_vector(left, right, ir.Constant(mask_type, self.mask))
+
+    def children(self) -> Sequence[Expr]:
+        return [self.left, self.right]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        return replace(
+            self, left=self.left.simplify(ctx), right=self.right.simplify(ctx)
+        )
+
+
+class VectorLoad(Expr):
+    """
+    Loads lanes consecutive elements from a pointer as a vector.
+
+    The pointer only needs the alignment of its element type.
+    """
+
+    def __init__(self, ptr: Expr, lanes: int):
+        self.ptr = ptr
+        self.lanes = lanes
+        self.t: Optional[Type] = None
+        self.validate()
+
+    def get_type(self) -> Type:
+        if isinstance(self.t, Type):
+            return self.t
+        raise Exception("Expected type to exist - was typecheck called?")
+
+    def validate(self) -> None:
+        if self.lanes < 1:
+            raise ValidateError("Vectors must have at least one lane")
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.ptr.typecheck(ctx)
+        self.t = VectorType(_memory_element(self.ptr), self.lanes)
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> ir.Value:
+        t = self.get_type()
+        assert isinstance(t, VectorType)
+        ptr = _vector_pointer(builder, self.ptr.codegen(builder, ctx), t)
+        return builder.load(ptr, align=_alignment(t))
+
+    def children(self) -> Sequence[Expr]:
+        return [self.ptr]
+
+    def simplify(self, ctx: SimplifyContext) -> Expr:
+        return replace(self, ptr=self.ptr.simplify(ctx))
+
+
+class VectorStore(Statement):
+    """
+    Stores a vector to consecutive elements starting at a pointer.
+
+    The pointer only needs the alignment of its element type.
+    """
+
+    def __init__(self, ptr: Expr, value: Expr):
+        self.ptr = ptr
+        self.value = value
+        self.validate()
+
+    def validate(self) -> None:
+        pass
+
+    def typecheck(self, ctx: TypeContext) -> None:
+        self.ptr.typecheck(ctx)
+        self.value.typecheck(ctx)
+        element = _memory_element(self.ptr)
+        t = _vector_type(self.value)
+        if t.element != element:
+            raise TypeCheckError(
+                "Cannot store %s through %s" % (t, self.ptr.get_type())
+            )
+
+    def codegen(self, builder: ir.IRBuilder, ctx: CodegenContext) -> None:
+        t = self.value.get_type()
+        assert isinstance(t, VectorType)
+        ptr = _vector_pointer(builder, self.ptr.codegen(builder, ctx), t)
+        value = self.value.codegen(builder, ctx)
+        builder.store(value, ptr, align=_alignment(t))
+
+    def children(self) -> Sequence[Expr]:
+        return [self.ptr, self.value]
+
+    def simplify(self, ctx: SimplifyContext) -> List[Union[Expr, Statement]]:
+        return [
+            replace(self, ptr=self.ptr.simplify(ctx), value=self.value.simplify(ctx))
+        ]
@@ -0,0 +1,191 @@
+"""
+This file defines vectorized entry points for scalar Petra functions.
+"""
+
+import ctypes
+
+from llvmlite import binding, ir
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .buffer import Buffer
+from .native import ctype
+from .type import (
+    BoolType,
+    FloatType,
+    Ftypein,
+    Ftypeout,
+    Int64_t,
+    IntType,
+    PointerType,
+    Type,
+)
+from .typecheck import TypeCheckError
+from .validate import validate_name
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore
+
+
+class VectorizedFunction(object):
+    """
+    A native driver applying a scalar function elementwise over buffers.
+
+    The driver takes (n, in_0, stride_0, ..., in_k, stride_k, out, out_stride),
+    with strides counted in elements, and calls the scalar function in-module so
+    that LLVM can inline it and vectorize the loop.
+    """
+
+    def __init__(
+        self, name: str, scalar: str, functypes: Dict[str, Tuple[Ftypein, Ftypeout]]
+    ):
+        self.name = name
+        self.scalar = scalar
+        self.validate()
+        if scalar not in functypes:
+            raise TypeCheckError("Undeclared function '%s'" % scalar)
+        t_in, t_out = functypes[scalar]
+        if not isinstance(t_out, Type):
+            raise TypeCheckError("Cannot vectorize void function '%s'" % scalar)
+        for t in t_in + (t_out,):
+            if not isinstance(t, (IntType, FloatType, BoolType)):
+                raise TypeCheckError(
+                    "Cannot vectorize function '%s' with argument or return type %s"
+                    % (scalar, t)
+                )
+        self.t_in = t_in
+        self.t_out = t_out
+        self.calls = {scalar}
+
+    def validate(self) -> None:
+        validate_name("Function name", self.name)
+
+    def functype(self) -> Tuple[Ftypein, Ftypeout]:
+        t_in: Tuple[Type, ...] = (Int64_t,)
+        for t in self.t_in + (self.t_out,):
+            t_in += (PointerType(t), Int64_t)
+        return (t_in, ())
+
+    def codegen(
+        self,
+        module: ir.Module,
+        funcs: Dict[str, ir.Function],
+        profile: bool = False,
+        debug_info: bool = False,
+    ) -> None:
+        """
+        Emit the loop into module. The loop itself isn't profiled and has no
+        debug info, but the scalar function it calls may.
+        """
+        func = funcs[self.name]
+        n = func.args[0]
+        arrays = [(func.args[i], func.args[i + 1]) for i in range(1, len(func.args), 2)]
+        builder = ir.IRBuilder(func.append_basic_block(name="start"))
+        # Contiguous buffers get a loop of their own with unit strides, which
+        # the loop vectorizer handles without runtime stride checks.
+        one = ir.Constant(Int64_t.llvm_type(), 1)
+        contiguous: ir.Value = builder.icmp_signed("==", arrays[0][1], one)
+        for _, stride in arrays[1:]:
+            contiguous = builder.and_(
+                contiguous, builder.icmp_signed("==", stride, one)
+            )
+        with builder.if_else(contiguous) as (then_case, else_case):
+            with then_case:
+                self._loop(builder, funcs, n, [(ptr, None) for ptr, _ in arrays])
+            with else_case:
+                self._loop(builder, funcs, n, arrays)
+        builder.ret_void()
+
+    def _loop(
+        self,
+        builder: ir.IRBuilder,
+        funcs: Dict[str, ir.Function],
+        n: ir.Value,
+        arrays: Sequence[Tuple[ir.Value, Optional[ir.Value]]],
+    ) -> None:
+        i64 = Int64_t.llvm_type()
+        zero = ir.Constant(i64, 0)
+        preheader = builder.basic_block
+        loop = builder.append_basic_block(name="loop")
+        end = builder.append_basic_block(name="endloop")
+        builder.cbranch(builder.icmp_signed(">", n, zero), loop, end)
+
+        builder.position_at_end(loop)
+        i = builder.phi(i64, name="i")
+        i.add_incoming(zero, preheader)
+        pointers = []
+        for ptr, stride in arrays:
+            index = i if stride is None else builder.mul(i, stride)
+            pointers.append(builder.gep(ptr, [index]))
+        args = [builder.load(ptr) for ptr in pointers[:-1]]
+        builder.store(builder.call(funcs[self.scalar], args), pointers[-1])
+        next_i = builder.add(i, ir.Constant(i64, 1), flags=("nuw", "nsw"))
+        i.add_incoming(next_i, loop)
+        builder.cbranch(builder.icmp_signed("<", next_i, n), loop, end)
+
+        builder.position_at_end(end)
+
+
+class Vectorized(object):
+    """
+    A compiled vectorized function, callable on NumPy arrays or any other
+    objects supporting the buffer protocol. Arguments are passed to native
+    code without copying, so the whole array costs one native call.
+
+    Buffers must be aligned to their element type. If out is not given a NumPy
+    array is allocated for the result. Like NativeCallable, it keeps the
+    engine holding its code alive.
+    """
+
+    def __init__(
+        self, engine: binding.ExecutionEngine, address: int, t_in: Ftypein, t_out: Type
+    ):
+        self.engine = engine
+        self.t_in = t_in
+        self.t_out = t_out
+        argtypes = [ctypes.c_void_p, ctypes.c_int64] * (len(t_in) + 1)
+        self.cfunc = ctypes.CFUNCTYPE(None, ctypes.c_int64, *argtypes)(address)
+
+    def __call__(self, *args: object, out: Optional[object] = None) -> object:
+        if len(args) != len(self.t_in):
+            raise TypeError(
+                "Expected %s arguments, not %s" % (len(self.t_in), len(args))
+            )
+        buffers: List[Buffer] = []
+        try:
+            for arg, t in zip(args, self.t_in):
+                buffers.append(Buffer(arg))
+                buffers[-1].check_element_type(t)
+            if out is None:
+                if numpy is None:
+                    raise TypeError("out must be given when NumPy is not installed")
+                size = buffers[0].flat()[0] if buffers else 0
+                out = numpy.empty(size, dtype=ctype(self.t_out))
+            buffers.append(Buffer(out, writable=True))
+            buffers[-1].check_element_type(self.t_out)
+
+            cargs: List[int] = []
+            length: Optional[int] = None
+            for i, (buf, t) in enumerate(zip(buffers, self.t_in + (self.t_out,))):
+                n, stride = buf.flat()
+                if length is not None and n != length:
+                    raise ValueError(
+                        "Buffers have different lengths: %s and %s" % (length, n)
+                    )
+                length = n
+                if stride % buf.itemsize != 0:
+                    raise ValueError(
+                        "Buffer strides must be a multiple of the item size"
+                    )
+                align = ctypes.alignment(ctype(t))
+                if buf.address % align != 0:
+                    raise ValueError(
+                        "Argument %s is not aligned to %s bytes" % (i, align)
+                    )
+                cargs += [buf.address, stride // buf.itemsize]
+            self.cfunc(length, *cargs)
+        finally:
+            for buf in buffers:
+                buf.release()
+        return out
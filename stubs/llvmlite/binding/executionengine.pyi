@@ -8,7 +8,7 @@ def check_jit_execution() -> None: ...
 class ExecutionEngine(ffi.ObjectRef):
     def __init__(self, ptr: Any, module: Any) -> None: ...
     def get_function_address(self, name: Any) -> int: ...
-    def get_global_value_address(self, name: Any): ...
+    def get_global_value_address(self, name: str) -> int: ...
     def add_global_mapping(self, gv: Any, addr: Any) -> None: ...
     def add_module(self, module: Any) -> None: ...
     def finalize_object(self) -> None: ...
@@ -1,5 +1,5 @@
 from . import ffi as ffi
-from typing import Any
+from typing import Any, Tuple
 
 def initialize() -> None: ...
 def initialize_all_targets() -> None: ...
@@ -9,4 +9,4 @@ def initialize_native_asmprinter() -> None: ...
 def initialize_native_asmparser() -> None: ...
 def shutdown() -> None: ...
 
-llvm_version_info: Any
+llvm_version_info: Tuple[int, int, int]
@@ -9,15 +9,15 @@ def parse_bitcode(bitcode: Any, context: Optional[ContextRef] = ...) -> ModuleRe
 
 class ModuleRef(ffi.ObjectRef):
     def __init__(self, module_ptr: Any, context: Any) -> None: ...
-    def as_bitcode(self): ...
+    def as_bitcode(self) -> bytes: ...
     def get_function(self, name: Any): ...
     def get_global_variable(self, name: Any): ...
     def get_struct_type(self, name: Any): ...
     def verify(self) -> None: ...
     @property
-    def name(self): ...
+    def name(self) -> str: ...
     @name.setter
-    def name(self, value: Any) -> None: ...
+    def name(self, value: str) -> None: ...
     @property
     def data_layout(self): ...
     @data_layout.setter
@@ -30,7 +30,7 @@ class ModuleRef(ffi.ObjectRef):
     @property
     def global_variables(self): ...
     @property
-    def functions(self): ...
+    def functions(self) -> _FunctionsIterator: ...
     @property
     def struct_types(self): ...
     def clone(self): ...
@@ -47,6 +47,8 @@ class _GlobalsIterator(_Iterator):
 
 class _FunctionsIterator(_Iterator):
     kind: str = ...
+    def __iter__(self) -> _FunctionsIterator: ...
+    def __next__(self) -> ValueRef: ...
 
 class _TypesIterator(_Iterator):
     kind: str = ...
@@ -12,8 +12,9 @@ class SectionIteratorRef(ffi.ObjectRef):
     def next(self) -> None: ...
 
 class ObjectFileRef(ffi.ObjectRef):
+    def __init__(self, ptr: object) -> None: ...
     @classmethod
-    def from_data(cls, data: Any): ...
+    def from_data(cls, data: bytes) -> ObjectFileRef: ...
     @classmethod
-    def from_path(cls, path: Any): ...
+    def from_path(cls, path: str) -> ObjectFileRef: ...
     def sections(self) -> None: ...
@@ -1,8 +1,10 @@
 from . import ffi as ffi
 from typing import Any, Optional
 
-def create_module_pass_manager(): ...
-def create_function_pass_manager(module: Any): ...
+def create_module_pass_manager() -> ModulePassManager: ...
+def create_function_pass_manager(module: Any) -> FunctionPassManager: ...
+def set_time_passes(enable: bool) -> None: ...
+def report_and_reset_timings() -> str: ...
 
 class PassManager(ffi.ObjectRef):
     def add_constant_merge_pass(self) -> None: ...
@@ -24,10 +26,10 @@ class PassManager(ffi.ObjectRef):
 
 class ModulePassManager(PassManager):
     def __init__(self, ptr: Optional[Any] = ...) -> None: ...
-    def run(self, module: Any): ...
+    def run(self, module: Any) -> bool: ...
 
 class FunctionPassManager(PassManager):
     def __init__(self, module: Any) -> None: ...
-    def initialize(self): ...
-    def finalize(self): ...
-    def run(self, function: Any): ...
+    def initialize(self) -> bool: ...
+    def finalize(self) -> bool: ...
+    def run(self, function: Any) -> bool: ...
@@ -1,14 +1,14 @@
 from . import ffi as ffi
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 def get_process_triple(): ...
 
-class FeatureMap(dict):
-    def flatten(self, sort: bool = ...): ...
+class FeatureMap(Dict[str, bool]):
+    def flatten(self, sort: bool = ...) -> str: ...
 
-def get_host_cpu_features(): ...
-def get_default_triple(): ...
-def get_host_cpu_name(): ...
+def get_host_cpu_features() -> FeatureMap: ...
+def get_default_triple() -> str: ...
+def get_host_cpu_name() -> str: ...
 def get_object_format(triple: Optional[Any] = ...): ...
 def create_target_data(layout: Any): ...
 
@@ -22,10 +22,11 @@ RELOC: Any
 CODEMODEL: Any
 
 class Target(ffi.ObjectRef):
+    def __init__(self, ptr: object) -> None: ...
     @classmethod
     def from_default_triple(cls) -> Target: ...
     @classmethod
-    def from_triple(cls, triple: Any) -> Target: ...
+    def from_triple(cls, triple: str) -> Target: ...
     @property
     def name(self): ...
     @property
@@ -1,32 +1,32 @@
 from . import ffi as ffi, passmanagers as passmanagers
 from typing import Any, Optional
 
-def create_pass_manager_builder(): ...
+def create_pass_manager_builder() -> PassManagerBuilder: ...
 
 class PassManagerBuilder(ffi.ObjectRef):
     def __init__(self, ptr: Optional[Any] = ...) -> None: ...
     @property
-    def opt_level(self): ...
+    def opt_level(self) -> int: ...
     @opt_level.setter
-    def opt_level(self, level: Any) -> None: ...
+    def opt_level(self, level: int) -> None: ...
     @property
-    def size_level(self): ...
+    def size_level(self) -> int: ...
     @size_level.setter
-    def size_level(self, size: Any) -> None: ...
+    def size_level(self, size: int) -> None: ...
     @property
     def inlining_threshold(self) -> None: ...
     @inlining_threshold.setter
-    def inlining_threshold(self, threshold: Any) -> None: ...
+    def inlining_threshold(self, threshold: int) -> None: ...
     @property
     def disable_unroll_loops(self): ...
     @disable_unroll_loops.setter
     def disable_unroll_loops(self, disable: bool = ...) -> None: ...
     @property
-    def loop_vectorize(self): ...
+    def loop_vectorize(self) -> bool: ...
     @loop_vectorize.setter
-    def loop_vectorize(self, enable: bool = ...): ...
+    def loop_vectorize(self, enable: bool = ...) -> None: ...
     @property
-    def slp_vectorize(self): ...
+    def slp_vectorize(self) -> bool: ...
     @slp_vectorize.setter
-    def slp_vectorize(self, enable: bool = ...): ...
+    def slp_vectorize(self, enable: bool = ...) -> None: ...
     def populate(self, pm: Any) -> None: ...
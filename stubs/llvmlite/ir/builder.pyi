@@ -1,28 +1,34 @@
 from .types import Type
-from .values import Block, Value
+from .module import Module
+from .values import Block, Function, Value
 from .instructions import (
     AllocaInstr,
+    Branch,
     CallInstr,
+    CastInstr,
+    ConditionalBranch,
+    FCMPInstr,
     Instruction,
     ICMPInstr,
     LoadInstr,
+    PhiInstr,
     Ret,
     StoreInstr,
 )
 
-from typing import Any, ContextManager, Optional, Tuple
+from typing import Any, ContextManager, List, Optional, Sequence, Tuple
 
 class IRBuilder:
     debug_metadata: Any = ...
-    def __init__(self, block: ir.Block = ...) -> None: ...
+    def __init__(self, block: Block = ...) -> None: ...
     @property
-    def block(self): ...
+    def block(self) -> Block: ...
     basic_block: Block = ...
     @property
-    def function(self): ...
+    def function(self) -> Function: ...
     @property
-    def module(self): ...
-    def position_before(self, instr: Any) -> None: ...
+    def module(self) -> Module: ...
+    def position_before(self, instr: Instruction) -> None: ...
     def position_after(self, instr: Any) -> None: ...
     def position_at_start(self, block: Any) -> None: ...
     def position_at_end(self, block: Any) -> None: ...
@@ -35,24 +41,60 @@ class IRBuilder:
     def if_else(
         self, pred: Value, likely: Optional[bool] = ...
     ) -> ContextManager[Tuple[ContextManager[Block], ContextManager[Block]]]: ...
-    def shl(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def lshr(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def ashr(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def add(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def fadd(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def sub(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def fsub(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def mul(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def fmul(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def udiv(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def sdiv(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def fdiv(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def urem(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def srem(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def frem(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def or_(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def and_(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
-    def xor(self, lhs: Value, rhs: Value, name: str = ...) -> Instruction: ...
+    def shl(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def lshr(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def ashr(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def add(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def fadd(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def sub(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def fsub(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def mul(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def fmul(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def udiv(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def sdiv(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def fdiv(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def urem(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def srem(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def frem(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def or_(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def and_(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
+    def xor(
+        self, lhs: Value, rhs: Value, name: str = ..., flags: Sequence[str] = ...
+    ) -> Instruction: ...
     def sadd_with_overflow(
         self, lhs: Value, rhs: Value, name: str = ...
     ) -> Instruction: ...
@@ -85,38 +127,44 @@ class IRBuilder:
         lhs: Value,
         rhs: Value,
         name: str = ...,
-        flags: List[str] = ...,
-    ): ...
+        flags: Sequence[str] = ...,
+    ) -> FCMPInstr: ...
     def fcmp_unordered(
         self,
         cmpop: str,
         lhs: Value,
         rhs: Value,
         name: str = ...,
-        flags: List[str] = ...,
-    ): ...
-    def select(self, cond: Value, lhs: Value, rhs: Value, name: str = ...): ...
-    def trunc(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def zext(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def sext(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def fptrunc(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def fpext(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def bitcast(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def addrspacecast(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def fptoui(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def uitofp(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def fptosi(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def sitofp(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def ptrtoint(self, value: Value, typ: Value, name: str = ...) -> None: ...
-    def inttoptr(self, value: Value, typ: Value, name: str = ...) -> None: ...
+        flags: Sequence[str] = ...,
+    ) -> FCMPInstr: ...
+    def select(
+        self, cond: Value, lhs: Value, rhs: Value, name: str = ...
+    ) -> Instruction: ...
+    def trunc(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def zext(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def sext(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def fptrunc(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def fpext(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def bitcast(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def addrspacecast(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def fptoui(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def uitofp(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def fptosi(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def sitofp(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def ptrtoint(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
+    def inttoptr(self, value: Value, typ: Type, name: str = ...) -> CastInstr: ...
     def alloca(
         self, typ: Type, size: Optional[Value] = ..., name: str = ...
     ) -> AllocaInstr: ...
     def load(
-        self, ptr: Value, name: str = ..., align: Optional[Value] = ...
+        self,
+        ptr: Value,
+        name: str = ...,
+        align: Optional[int] = ...,
+        typ: Optional[Type] = ...,
     ) -> LoadInstr: ...
     def store(
-        self, value: Value, ptr: Value, align: Optional[Value] = ...,
+        self, value: Value, ptr: Value, align: Optional[int] = ...,
     ) -> StoreInstr: ...
     def load_atomic(
         self, ptr: Value, ordering: Value, align: Value, name: str = ...,
@@ -125,8 +173,10 @@ class IRBuilder:
         self, value: Value, ptr: Value, ordering: Value, align: Value,
     ): ...
     def switch(self, value: Any, default: Any): ...
-    def branch(self, target: Any): ...
-    def cbranch(self, cond: Value, truebr: Block, falsebr: Block) -> Block: ...
+    def branch(self, target: Block) -> Branch: ...
+    def cbranch(
+        self, cond: Value, truebr: Block, falsebr: Block
+    ) -> ConditionalBranch: ...
     def _branch_helper(
         self, bbenter: Block, bbexit: Block
     ) -> ContextManager[Block]: ...
@@ -136,8 +186,8 @@ class IRBuilder:
     def resume(self, landingpad: Any): ...
     def call(
         self,
-        fn: Any,
-        args: Any,
+        fn: Value,
+        args: Sequence[Value],
         name: str = ...,
         cconv: Optional[Any] = ...,
         tail: bool = ...,
@@ -164,23 +214,29 @@ class IRBuilder:
         cconv: Optional[Any] = ...,
         tail: bool = ...,
     ): ...
-    def gep(self, ptr: Any, indices: Any, inbounds: bool = ..., name: str = ...): ...
+    def gep(
+        self,
+        ptr: Value,
+        indices: Sequence[Value],
+        inbounds: bool = ...,
+        name: str = ...,
+    ) -> Instruction: ...
     def extract_element(
-        self, vector: Value, idx: int, name: Optional[str] = ...
-    ) -> Value: ...
+        self, vector: Value, idx: Value, name: str = ...
+    ) -> Instruction: ...
     def insert_element(
-        self, vector: Value, value: Value, idx: int, name: Optional[str] = ...
-    ) -> Value: ...
+        self, vector: Value, value: Value, idx: Value, name: str = ...
+    ) -> Instruction: ...
     def shuffle_vector(
-        self, vector1: Value, vector2: Value, mask: Value, name: Optional[str] = ...
-    ): ...
+        self, vector1: Value, vector2: Value, mask: Value, name: str = ...
+    ) -> Instruction: ...
     def extract_value(
         self, agg: Value, idx: int, name: Optional[str] = ...
     ) -> Value: ...
     def insert_value(
         self, agg: Value, value: Value, idx: int, name: Optional[str] = ...
     ) -> Value: ...
-    def phi(self, typ: Any, name: str = ...): ...
+    def phi(self, typ: Type, name: str = ...) -> PhiInstr: ...
     def unreachable(self): ...
     def atomic_rmw(
         self, op: Any, ptr: Any, val: Any, ordering: Any, name: str = ...
@@ -202,7 +202,7 @@ class PhiInstr(Instruction):
     incomings: Any = ...
     def __init__(self, parent: Any, typ: Any, name: Any) -> None: ...
     def descr(self, buf: Any) -> None: ...
-    def add_incoming(self, value: Any, block: Any) -> None: ...
+    def add_incoming(self, value: Value, block: Block) -> None: ...
     def replace_usage(self, old: Any, new: Any) -> None: ...
 
 class ExtractElement(Instruction):
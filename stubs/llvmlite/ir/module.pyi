@@ -1,5 +1,5 @@
 from . import context as context, types as types, values as values
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 class Module:
     context: Any = ...
@@ -7,13 +7,17 @@ class Module:
     data_layout: str = ...
     scope: Any = ...
     triple: str = ...
-    globals: Any = ...
-    metadata: Any = ...
-    namedmetadata: Any = ...
+    globals: Dict[str, values.GlobalValue] = ...
+    metadata: List[values.MDValue] = ...
+    namedmetadata: Dict[str, values.NamedMetaData] = ...
     def __init__(self, name: str = ..., context: Any = ...) -> None: ...
-    def add_metadata(self, operands: Any): ...
-    def add_debug_info(self, kind: Any, operands: Any, is_distinct: bool = ...): ...
-    def add_named_metadata(self, name: Any, element: Optional[Any] = ...): ...
+    def add_metadata(self, operands: Sequence[object]) -> values.MDValue: ...
+    def add_debug_info(
+        self, kind: str, operands: Dict[str, object], is_distinct: bool = ...
+    ) -> values.DIValue: ...
+    def add_named_metadata(
+        self, name: str, element: Optional[object] = ...
+    ) -> values.NamedMetaData: ...
     def get_named_metadata(self, name: Any): ...
     @property
     def functions(self): ...
@@ -23,6 +27,9 @@ class Module:
     def add_global(self, globalvalue: Any) -> None: ...
     def get_unique_name(self, name: str = ...): ...
     def declare_intrinsic(
-        self, intrinsic: Any, tys: Any = ..., fnty: Optional[Any] = ...
-    ): ...
+        self,
+        intrinsic: str,
+        tys: Sequence[types.Type] = ...,
+        fnty: Optional[types.FunctionType] = ...,
+    ) -> values.Function: ...
     def get_identified_types(self): ...
@@ -1,5 +1,5 @@
 from ._utils import _StrCaching
-from typing import Any, Optional, TypeVar
+from typing import Any, Optional, Sequence, TypeVar
 
 class Type(_StrCaching):
     is_pointer: bool = ...
@@ -39,7 +39,9 @@ class FunctionType(Type):
     return_type: Any = ...
     args: Any = ...
     var_arg: Any = ...
-    def __init__(self, return_type: Any, args: Any, var_arg: bool = ...) -> None: ...
+    def __init__(
+        self, return_type: Type, args: Sequence[Type], var_arg: bool = ...
+    ) -> None: ...
     def __eq__(self, other: Any) -> Any: ...
     def __hash__(self) -> Any: ...
 
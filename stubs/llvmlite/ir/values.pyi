@@ -1,24 +1,27 @@
 from . import types as types
 from . import instructions as instructions
+from .instructions import Instruction
 from ._utils import _HasMetadata, _StrCaching, _StringReferenceCaching
-from typing import Any
+from .module import Module
+from typing import Any, List, Optional, Sequence, Tuple
 
 class _ConstOpMixin:
     def bitcast(self, typ: Any): ...
     def inttoptr(self, typ: Any): ...
     def gep(self, indices: Any): ...
 
-class Value: ...
+class Value:
+    type: types.Type = ...
 
 class _Undefined:
     def __new__(cls): ...
 
-Undefined: Any
+Undefined: _Undefined
 
 class Constant(_StrCaching, _StringReferenceCaching, _ConstOpMixin, Value):
-    type: Any = ...
+    type: types.Type = ...
     constant: Any = ...
-    def __init__(self, typ: Any, constant: Any) -> None: ...
+    def __init__(self, typ: types.Type, constant: object) -> None: ...
     @classmethod
     def literal_array(cls, elems: Any): ...
     @classmethod
@@ -36,7 +39,7 @@ class NamedValue(_StrCaching, _StringReferenceCaching, Value):
     name_prefix: str = ...
     deduplicate_name: bool = ...
     parent: Any = ...
-    type: Any = ...
+    type: types.Type = ...
     def __init__(self, parent: Any, type: Any, name: Any) -> None: ...
     def descr(self, buf: Any) -> None: ...
     name: str = ...
@@ -58,22 +61,22 @@ class MetaDataArgument(_StrCaching, _StringReferenceCaching, Value):
 
 class NamedMetaData:
     parent: Any = ...
-    operands: Any = ...
+    operands: List[Value] = ...
     def __init__(self, parent: Any) -> None: ...
     def add(self, md: Any) -> None: ...
 
 class MDValue(NamedValue):
     name_prefix: str = ...
-    operands: Any = ...
-    def __init__(self, parent: Any, values: Any, name: Any) -> None: ...
+    operands: Tuple[object, ...] = ...
+    def __init__(self, parent: Module, values: Sequence[object], name: str) -> None: ...
     def descr(self, buf: Any) -> None: ...
     def __eq__(self, other: Any) -> Any: ...
     def __ne__(self, other: Any) -> Any: ...
     def __hash__(self) -> Any: ...
 
 class DIToken:
-    value: Any = ...
-    def __init__(self, value: Any) -> None: ...
+    value: str = ...
+    def __init__(self, value: str) -> None: ...
 
 class DIValue(NamedValue):
     name_prefix: str = ...
@@ -97,13 +100,13 @@ class GlobalValue(NamedValue, _ConstOpMixin):
 
 class GlobalVariable(GlobalValue):
     value_type: Any = ...
-    initializer: Any = ...
+    initializer: Optional[Constant] = ...
     unnamed_addr: bool = ...
     global_constant: bool = ...
     addrspace: Any = ...
     align: Any = ...
     def __init__(
-        self, module: Any, typ: Any, name: Any, addrspace: int = ...
+        self, module: Module, typ: types.Type, name: str, addrspace: int = ...
     ) -> None: ...
     def descr(self, buf: Any) -> None: ...
 
@@ -132,7 +135,9 @@ class Function(GlobalValue, _HasMetadata):
     return_value: Any = ...
     calling_convention: str = ...
     metadata: Any = ...
-    def __init__(self, module: Any, ftype: Any, name: Any) -> None: ...
+    def __init__(
+        self, module: Module, ftype: types.FunctionType, name: str
+    ) -> None: ...
     @property
     def module(self): ...
     @property
@@ -174,7 +179,7 @@ class ReturnValue(_BaseArgument): ...
 class Block(NamedValue):
     scope: Any = ...
     instructions: Any = ...
-    terminator: Option[instructions.Instruction] = ...
+    terminator: Optional[Instruction] = ...
     def __init__(self, parent: Any, name: str = ...) -> None: ...
     @property
     def is_terminated(self) -> bool: ...
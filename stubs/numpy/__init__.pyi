@@ -0,0 +1,32 @@
+from typing import Tuple, Union
+
+from . import testing as testing
+
+_Shape = Union[int, Tuple[int, ...]]
+_Operand = Union[int, float, ndarray]
+
+class _Flags:
+    writeable: bool
+
+class ndarray:
+    flags: _Flags
+    T: ndarray
+    def __getitem__(self, key: object) -> ndarray: ...
+    def reshape(self, *shape: int) -> ndarray: ...
+    def ravel(self) -> ndarray: ...
+    def __add__(self, other: _Operand) -> ndarray: ...
+    def __radd__(self, other: _Operand) -> ndarray: ...
+    def __sub__(self, other: _Operand) -> ndarray: ...
+    def __rsub__(self, other: _Operand) -> ndarray: ...
+    def __mul__(self, other: _Operand) -> ndarray: ...
+    def __rmul__(self, other: _Operand) -> ndarray: ...
+    def __lt__(self, other: _Operand) -> ndarray: ...
+    def __gt__(self, other: _Operand) -> ndarray: ...
+
+class int32: ...
+class int64: ...
+
+def arange(stop: int, dtype: object = ...) -> ndarray: ...
+def empty(shape: _Shape, dtype: object = ...) -> ndarray: ...
+def linspace(start: float, stop: float, num: int = ...) -> ndarray: ...
+def zeros(shape: _Shape, dtype: object = ...) -> ndarray: ...
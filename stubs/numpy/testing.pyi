@@ -0,0 +1 @@
+def assert_array_equal(actual: object, desired: object) -> None: ...
@@ -0,0 +1,53 @@
+from typing import cast, Callable
+
+import os
+import petra as pt
+import tempfile
+import unittest
+
+from ctypes import CFUNCTYPE, c_int32
+
+
+def make_program() -> pt.Program:
+    program = pt.Program("module")
+    x, y = pt.Symbol(pt.Int32_t, "x"), pt.Symbol(pt.Int32_t, "y")
+    program.add_func(
+        "sum",
+        (x, y),
+        pt.Int32_t,
+        pt.Block([pt.Return(pt.Add(pt.Var(x), pt.Var(y)))]),
+    )
+    return program
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = pt.ObjectCache(self.tmpdir.name)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def call_sum(self, program: pt.Program, opt_level: int = 0) -> int:
+        engine = program.compile(opt_level=opt_level, cache=self.cache)
+        psum = engine.get_function_address("sum")
+        f = cast(Callable[[int, int], int], CFUNCTYPE(c_int32, c_int32, c_int32)(psum))
+        return f(2, 3)
+
+    def test_hit(self) -> None:
+        self.assertEqual(self.call_sum(make_program()), 5)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        # Equivalent program with different symbol ids shares the cache entry.
+        self.assertEqual(self.call_sum(make_program()), 5)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_opt_level_miss(self) -> None:
+        self.call_sum(make_program(), 0)
+        self.call_sum(make_program(), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 2)
+
+    def test_evict(self) -> None:
+        self.cache.max_size = 0
+        self.assertEqual(self.call_sum(make_program()), 5)
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 0)
@@ -4,6 +4,7 @@ import petra as pt
 import unittest
 
 from ctypes import CFUNCTYPE, c_int32, c_bool
+from petra.expr import Expr
 
 program = pt.Program("module")
 
@@ -15,7 +16,11 @@ program.add_func(
         [
             pt.If(
                 pt.Lt(pt.Int32(0), pt.Int32(1)),
-                pt.Block([pt.Return(pt.Int32(1)),]),
+                pt.Block(
+                    [
+                        pt.Return(pt.Int32(1)),
+                    ]
+                ),
                 pt.Block([pt.Return(pt.Int32(2))]),
             ),
             pt.Return(pt.Int32(0)),
@@ -31,7 +36,11 @@ program.add_func(
         [
             pt.If(
                 pt.Lt(pt.Int32(1), pt.Int32(0)),
-                pt.Block([pt.Return(pt.Int32(1)),]),
+                pt.Block(
+                    [
+                        pt.Return(pt.Int32(1)),
+                    ]
+                ),
                 pt.Block([pt.Return(pt.Int32(2))]),
             ),
             pt.Return(pt.Int32(0)),
@@ -50,13 +59,55 @@ program.add_func(
             pt.DefineVar(x, pt.Int32(0)),
             pt.While(
                 pt.Lt(pt.Var(x), pt.Int32(10)),
-                pt.Block([pt.Assign(pt.Var(x), pt.Add(pt.Var(x), pt.Int32(1)),),]),
+                pt.Block(
+                    [
+                        pt.Assign(
+                            pt.Var(x),
+                            pt.Add(pt.Var(x), pt.Int32(1)),
+                        ),
+                    ]
+                ),
             ),
             pt.Return(pt.Var(x)),
         ]
     ),
 )
 
+i = pt.Symbol(pt.Int32_t, "i")
+n = pt.Symbol(pt.Int32_t, "n")
+step = pt.Symbol(pt.Int32_t, "step")
+total = pt.Symbol(pt.Int32_t, "total")
+
+
+def sum_range(start: Expr, stop: Expr, step: Expr) -> pt.Block:
+    return pt.Block(
+        [
+            pt.DefineVar(total, pt.Int32(0)),
+            pt.For(
+                i,
+                start,
+                stop,
+                step,
+                pt.Block([pt.Assign(pt.Var(total), pt.Add(pt.Var(total), pt.Var(i)))]),
+            ),
+            pt.Return(pt.Var(total)),
+        ]
+    )
+
+
+program.add_func(
+    "for_up", (n,), pt.Int32_t, sum_range(pt.Int32(0), pt.Var(n), pt.Int32(1))
+)
+program.add_func(
+    "for_down", (n,), pt.Int32_t, sum_range(pt.Var(n), pt.Int32(0), pt.Int32(-3))
+)
+program.add_func(
+    "for_step",
+    (n, step),
+    pt.Int32_t,
+    sum_range(pt.Int32(0), pt.Var(n), pt.Var(step)),
+)
+
 
 class ConditionalsTestCase(unittest.TestCase):
     def setUp(self) -> None:
@@ -81,3 +132,58 @@ class ConditionalsTestCase(unittest.TestCase):
 
     def test_while_then(self) -> None:
         self.assertEqual(self.while_then(), 10)
+
+    def test_for(self) -> None:
+        for_up = self.engine.get_function_address("for_up")
+        f = cast(Callable[[int], int], CFUNCTYPE(c_int32, c_int32)(for_up))
+        self.assertEqual(f(10), 45)
+        self.assertEqual(f(0), 0)
+        self.assertEqual(f(-5), 0)
+        for_down = self.engine.get_function_address("for_down")
+        f = cast(Callable[[int], int], CFUNCTYPE(c_int32, c_int32)(for_down))
+        self.assertEqual(f(10), 10 + 7 + 4 + 1)
+        self.assertEqual(f(0), 0)
+        for_step = self.engine.get_function_address("for_step")
+        g = cast(
+            Callable[[int, int], int], CFUNCTYPE(c_int32, c_int32, c_int32)(for_step)
+        )
+        self.assertEqual(g(10, 2), 0 + 2 + 4 + 6 + 8)
+        self.assertEqual(g(-10, -4), 0 - 4 - 8)
+        self.assertEqual(g(-10, 4), 0)
+
+    def test_for_codegen(self) -> None:
+        llvm_ir = program.to_llvm().split('@"for_up"')[1].split("\n}")[0]
+        self.assertIn("phi", llvm_ir)
+        self.assertIn("add nsw", llvm_ir)
+        self.assertIn("!llvm.loop", llvm_ir)
+        self.assertIn("llvm.loop.mustprogress", program.to_llvm())
+
+    def test_for_errors(self) -> None:
+        def add_func(block: pt.Block) -> None:
+            pt.Program("module").add_func("foo", (n,), pt.Int32_t, block)
+
+        with self.assertRaises(pt.TypeCheckError):
+            add_func(sum_range(pt.Int32(0), pt.Int8(10), pt.Int32(1)))
+        with self.assertRaises(pt.TypeCheckError):
+            add_func(sum_range(pt.Var(i), pt.Int32(10), pt.Int32(1)))
+        with self.assertRaises(pt.ValidateError):
+            sum_range(pt.Int32(0), pt.Int32(10), pt.Int32(0))
+        with self.assertRaises(pt.ValidateError):
+            add_func(
+                sum_range(pt.Int32(0), pt.Var(n), pt.Sub(pt.Int32(1), pt.Int32(1)))
+            )
+        with self.assertRaises(pt.TypeCheckError):
+            add_func(
+                pt.Block(
+                    [
+                        pt.For(
+                            i,
+                            pt.Int32(0),
+                            pt.Var(n),
+                            pt.Int32(1),
+                            pt.Block([pt.Assign(pt.Var(i), pt.Int32(0))]),
+                        ),
+                        pt.Return(pt.Int32(0)),
+                    ]
+                )
+            )
@@ -0,0 +1,210 @@
+from typing import cast, Callable
+
+import math
+import petra as pt
+import unittest
+
+from ctypes import CFUNCTYPE, c_bool, c_double, c_float, c_int32
+
+program = pt.Program("module")
+
+a = pt.Symbol(pt.Float64_t, "a")
+b = pt.Symbol(pt.Float64_t, "b")
+s = pt.Symbol(pt.Float32_t, "s")
+t = pt.Symbol(pt.Float32_t, "t")
+i = pt.Symbol(pt.Int32_t, "i")
+n = pt.Symbol(pt.Int32_t, "n")
+
+# (a + b) * (a - b) / b + a % b
+program.add_func(
+    "arith_f64",
+    (a, b),
+    pt.Float64_t,
+    pt.Block(
+        [
+            pt.Return(
+                pt.Add(
+                    pt.Div(
+                        pt.Mul(
+                            pt.Add(pt.Var(a), pt.Var(b)), pt.Sub(pt.Var(a), pt.Var(b))
+                        ),
+                        pt.Var(b),
+                    ),
+                    pt.Mod(pt.Var(a), pt.Var(b)),
+                )
+            )
+        ]
+    ),
+)
+
+program.add_func(
+    "lt_ordered",
+    (a, b),
+    pt.Bool_t,
+    pt.Block([pt.Return(pt.Lt(pt.Var(a), pt.Var(b)))]),
+)
+
+program.add_func(
+    "lt_unordered",
+    (a, b),
+    pt.Bool_t,
+    pt.Block([pt.Return(pt.Lt(pt.Var(a), pt.Var(b), ordered=False))]),
+)
+
+program.add_func(
+    "neq_unordered",
+    (a, b),
+    pt.Bool_t,
+    pt.Block([pt.Return(pt.Neq(pt.Var(a), pt.Var(b), ordered=False))]),
+)
+
+# Each comparison with its default ordering.
+comparisons = {"lt": pt.Lt, "lte": pt.Lte, "gt": pt.Gt, "gte": pt.Gte}
+comparisons.update({"eq": pt.Eq, "neq": pt.Neq})
+for name, op in comparisons.items():
+    program.add_func(
+        "%s_f64" % name,
+        (a, b),
+        pt.Bool_t,
+        pt.Block([pt.Return(op(pt.Var(a), pt.Var(b)))]),
+    )
+
+# Adds t to itself n times; reassoc lets LLVM vectorize the reduction.
+program.add_func(
+    "sum_f32",
+    (t, n),
+    pt.Float32_t,
+    pt.Block(
+        [
+            pt.DefineVar(s, pt.Float32(0.0)),
+            pt.For(
+                i,
+                pt.Int32(0),
+                pt.Var(n),
+                pt.Int32(1),
+                pt.Block([pt.Assign(pt.Var(s), pt.Add(pt.Var(s), pt.Var(t)))]),
+            ),
+            pt.Return(pt.Var(s)),
+        ]
+    ),
+    fastmath=("reassoc", "contract"),
+)
+
+program.add_func(
+    "fma_f64",
+    (a, b),
+    pt.Float64_t,
+    pt.Block(
+        [
+            pt.Return(
+                pt.Add(
+                    pt.Mul(pt.Var(a), pt.Var(b), fastmath=("contract",)),
+                    pt.Float64(1.0),
+                    fastmath=("contract", "nnan", "ninf"),
+                )
+            )
+        ]
+    ),
+)
+
+program.add_func(
+    "vector_f64",
+    (a,),
+    pt.Float64_t,
+    pt.Block(
+        [
+            pt.Return(
+                pt.ExtractLane(
+                    pt.Mul(pt.Splat(pt.Var(a), 2), pt.Vector(pt.Float64_t, [2.0, 3.0])),
+                    pt.Int32(1),
+                )
+            )
+        ]
+    ),
+)
+
+
+class FloatTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = program.compile()
+
+    def binop(self, name: str) -> Callable[[float, float], float]:
+        address = self.engine.get_function_address(name)
+        f = CFUNCTYPE(c_double, c_double, c_double)(address)
+        return cast(Callable[[float, float], float], f)
+
+    def compare(self, name: str) -> Callable[[float, float], bool]:
+        address = self.engine.get_function_address(name)
+        f = CFUNCTYPE(c_bool, c_double, c_double)(address)
+        return cast(Callable[[float, float], bool], f)
+
+    def function_llvm(self, name: str) -> str:
+        return program.to_llvm().split('@"%s"' % name)[1].split("define")[0]
+
+    def test_arith(self) -> None:
+        self.assertEqual(self.binop("arith_f64")(7.5, 2.0), 9.5 * 5.5 / 2.0 + 1.5)
+        # The remainder takes the sign of the dividend, like C's fmod.
+        self.assertEqual(self.binop("arith_f64")(-7.5, 2.0), -5.5 * -9.5 / 2.0 - 1.5)
+
+    def test_ordered(self) -> None:
+        lt_ordered = self.compare("lt_ordered")
+        lt_unordered = self.compare("lt_unordered")
+        neq_unordered = self.compare("neq_unordered")
+        self.assertTrue(lt_ordered(1.0, 2.0))
+        self.assertTrue(lt_unordered(1.0, 2.0))
+        self.assertFalse(lt_ordered(math.nan, 2.0))
+        self.assertTrue(lt_unordered(math.nan, 2.0))
+        self.assertTrue(neq_unordered(math.nan, math.nan))
+        self.assertFalse(neq_unordered(1.0, 1.0))
+        self.assertIn("fcmp olt", self.function_llvm("lt_ordered"))
+        self.assertIn("fcmp ult", self.function_llvm("lt_unordered"))
+
+    def test_nan(self) -> None:
+        # As in C, every comparison with NaN is false except !=.
+        for name in ["lt", "lte", "gt", "gte", "eq", "neq"]:
+            f = self.compare("%s_f64" % name)
+            for x, y in [(math.nan, 1.0), (1.0, math.nan), (math.nan, math.nan)]:
+                self.assertEqual(f(x, y), name == "neq", (name, x, y))
+        self.assertIn("fcmp une", self.function_llvm("neq_f64"))
+        self.assertIn("fcmp oeq", self.function_llvm("eq_f64"))
+
+    def test_fastmath(self) -> None:
+        address = self.engine.get_function_address("sum_f32")
+        sum_f32 = cast(
+            Callable[[float, int], float],
+            CFUNCTYPE(c_float, c_float, c_int32)(address),
+        )
+        self.assertEqual(sum_f32(0.5, 1000), 500.0)
+        self.assertEqual(sum_f32(0.5, 0), 0.0)
+        self.assertIn("fadd reassoc contract float", self.function_llvm("sum_f32"))
+        self.assertEqual(self.binop("fma_f64")(3.0, 4.0), 13.0)
+        fma = self.function_llvm("fma_f64")
+        self.assertIn("fmul contract double", fma)
+        self.assertIn("fadd contract nnan ninf double", fma)
+
+    def test_vector(self) -> None:
+        address = self.engine.get_function_address("vector_f64")
+        f = cast(Callable[[float], float], CFUNCTYPE(c_double, c_double)(address))
+        self.assertEqual(f(1.5), 4.5)
+
+    def test_errors(self) -> None:
+        with self.assertRaises(pt.ValidateError):
+            pt.Add(pt.Float64(1.0), pt.Float64(1.0), fastmath=("fastest",))
+        with self.assertRaises(pt.ValidateError):
+            pt.Program("module").add_func(
+                "foo", (), (), pt.Block([pt.Return(())]), fastmath=("fastest",)
+            )
+        with self.assertRaises(pt.TypeCheckError):
+            pt.Program("module").add_func(
+                "foo",
+                (),
+                pt.Float64_t,
+                pt.Block([pt.Return(pt.Add(pt.Float64(1.0), pt.Float32(1.0)))]),
+            )
+        with self.assertRaises(pt.TypeCheckError):
+            pt.Program("module").add_func(
+                "foo",
+                (),
+                pt.Bool_t,
+                pt.Block([pt.Return(pt.Lt(pt.Float64(1.0), pt.Int64(1)))]),
+            )
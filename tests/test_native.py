@@ -0,0 +1,213 @@
+import array
+import gc
+import mmap
+import petra as pt
+import struct
+import unittest
+
+from ctypes import ArgumentError, Structure, byref, c_int32, pointer
+from petra.native import ctype
+from typing import Callable, Tuple, cast
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore
+
+program = pt.Program("module")
+
+x, y = pt.Symbol(pt.Int32_t, "x"), pt.Symbol(pt.Int32_t, "y")
+f = pt.Symbol(pt.Float64_t, "f")
+b = pt.Symbol(pt.Bool_t, "b")
+p = pt.Symbol(pt.PointerType(pt.Int32_t), "p")
+My_Struct = pt.StructType({"a": pt.Int32_t, "b": pt.Int64_t})
+s = pt.Symbol(My_Struct, "s")
+ps = pt.Symbol(pt.PointerType(My_Struct), "ps")
+
+program.add_func(
+    "sum", (x, y), pt.Int32_t, pt.Block([pt.Return(pt.Add(pt.Var(x), pt.Var(y)))])
+)
+program.add_func("iden_f64", (f,), pt.Float64_t, pt.Block([pt.Return(pt.Var(f))]))
+program.add_func("not_", (b,), pt.Bool_t, pt.Block([pt.Return(pt.Not(pt.Var(b)))]))
+program.add_func("load", (p,), pt.Int32_t, pt.Block([pt.Return(pt.Deref(pt.Var(p)))]))
+program.add_func("nop", (), (), pt.Block([pt.Return(())]))
+program.add_func(
+    "get_a",
+    (ps,),
+    pt.Int32_t,
+    pt.Block([pt.Return(pt.GetElement(pt.Deref(pt.Var(ps)), name="a"))]),
+)
+program.add_func(
+    "get_b", (s,), pt.Int64_t, pt.Block([pt.Return(pt.GetElement(pt.Var(s), idx=1))])
+)
+program.add_func_decl("undefined", (), pt.Int32_t)
+
+i = pt.Symbol(pt.Int32_t, "i")
+n = pt.Symbol(pt.Int32_t, "n")
+total = pt.Symbol(pt.Int32_t, "total")
+
+# Only loads through p, so read-only buffers can be passed.
+program.add_func(
+    "sum_n",
+    (p, n),
+    pt.Int32_t,
+    pt.Block(
+        [
+            pt.DefineVar(total, pt.Int32(0)),
+            pt.For(
+                i,
+                pt.Int32(0),
+                pt.Var(n),
+                pt.Int32(1),
+                pt.Block(
+                    [
+                        pt.Assign(
+                            pt.Var(total),
+                            pt.Add(
+                                pt.Var(total),
+                                pt.Deref(pt.Offset(pt.Var(p), pt.Var(i))),
+                            ),
+                        )
+                    ]
+                ),
+            ),
+            pt.Return(pt.Var(total)),
+        ]
+    ),
+)
+
+program.add_func(
+    "negate_n",
+    (p, n),
+    (),
+    pt.Block(
+        [
+            pt.For(
+                i,
+                pt.Int32(0),
+                pt.Var(n),
+                pt.Int32(1),
+                pt.Block(
+                    [
+                        pt.Store(
+                            pt.Offset(pt.Var(p), pt.Var(i)),
+                            pt.Sub(
+                                pt.Int32(0), pt.Deref(pt.Offset(pt.Var(p), pt.Var(i)))
+                            ),
+                        )
+                    ]
+                ),
+            ),
+            pt.Return(()),
+        ]
+    ),
+)
+
+
+class NativeTestCase(unittest.TestCase):
+    def test_scalars(self) -> None:
+        self.assertEqual(program.get_callable("sum")(2, 3), 5)
+        self.assertEqual(program.get_callable("iden_f64")(1.5), 1.5)
+        self.assertEqual(program.get_callable("not_")(True), False)
+        self.assertIsNone(program.get_callable("nop")())
+
+    def test_pointers(self) -> None:
+        value = c_int32(42)
+        self.assertEqual(program.get_callable("load")(byref(value)), 42)
+        struct_t = cast(Callable[[int, int], Structure], ctype(My_Struct))
+        self.assertEqual(program.get_callable("get_a")(pointer(struct_t(7, 8))), 7)
+
+    def test_cached(self) -> None:
+        self.assertIs(program.get_callable("sum"), program.get_callable("sum"))
+        self.assertIsNot(
+            program.get_callable("sum"), program.get_callable("sum", opt_level=2)
+        )
+
+    def test_outlives_program(self) -> None:
+        def make_program() -> pt.Program:
+            block = pt.Block([pt.Return(pt.Add(pt.Var(x), pt.Int32(1)))])
+            return pt.Program("module").add_func("inc", (x,), pt.Int32_t, block)
+
+        changed = make_program()
+        inc = changed.get_callable("inc")
+        # Adding a function drops the program's engines.
+        changed.add_func("nop", (), (), pt.Block([pt.Return(())]))
+        self.assertEqual(inc(1), 2)
+        collected = make_program()
+        inc = collected.get_callable("inc")
+        del collected
+        gc.collect()
+        make_program().compile()
+        self.assertEqual(inc(1), 2)
+
+    def test_argument_checks(self) -> None:
+        with self.assertRaises(ArgumentError):
+            program.get_callable("sum")(1.5, 2)
+        with self.assertRaises(TypeError):
+            program.get_callable("sum")(1)
+
+    def test_errors(self) -> None:
+        with self.assertRaises(TypeError):
+            program.get_callable("get_b")
+        with self.assertRaises(Exception):
+            program.get_callable("missing")
+        with self.assertRaises(Exception):
+            program.get_callable("undefined")
+
+    def test_buffers(self) -> None:
+        sum_n = program.get_callable("sum_n")
+        negate_n = program.get_callable("negate_n")
+        values = array.array("i", [1, 2, 3, 4])
+        self.assertEqual(sum_n(values, 4), 10)
+        self.assertEqual(sum_n(memoryview(values)[1:], 3), 9)
+        negate_n(values, 3)
+        self.assertEqual(cast(Tuple[int, ...], tuple(values)), (-1, -2, -3, 4))
+        data = bytearray(struct.pack("=4i", 5, 6, 7, 8))
+        negate_n(data, 4)
+        self.assertEqual(
+            cast(Tuple[int, ...], struct.unpack("=4i", data)), (-5, -6, -7, -8)
+        )
+        # ctypes pointers are still passed through as before.
+        value = c_int32(42)
+        self.assertEqual(sum_n(byref(value), 1), 42)
+        self.assertEqual(sum_n(pointer(value), 1), 42)
+        self.assertEqual(sum_n(None, 0), 0)
+
+    def test_readonly_buffers(self) -> None:
+        readonly = struct.pack("=3i", 1, 2, 3)
+        self.assertEqual(program.get_callable("sum_n")(readonly, 3), 6)
+        with mmap.mmap(-1, len(readonly)) as m:
+            m.write(readonly)
+            self.assertEqual(program.get_callable("sum_n")(m, 3), 6)
+        with self.assertRaises(TypeError):
+            program.get_callable("negate_n")(readonly, 3)
+        with self.assertRaises(TypeError):
+            program.get_callable("negate_n")(memoryview(bytearray(12)).toreadonly(), 3)
+
+    def test_buffer_checks(self) -> None:
+        sum_n = program.get_callable("sum_n")
+        with self.assertRaises(TypeError):
+            sum_n(array.array("d", [1.0, 2.0]), 2)
+        with self.assertRaises(ValueError):
+            sum_n(memoryview(array.array("i", [1, 2, 3, 4]))[::2], 2)
+        with self.assertRaises(ValueError):
+            sum_n(memoryview(bytearray(13))[1:], 3)
+        with self.assertRaises(ArgumentError):
+            sum_n(5, 1)
+
+    def test_numpy(self) -> None:
+        if numpy is None:
+            self.skipTest("requires NumPy")
+        a = numpy.arange(10, dtype=numpy.int32)
+        self.assertEqual(program.get_callable("sum_n")(a, 10), 45)
+        # The array is passed without copying, so writes are visible.
+        program.get_callable("negate_n")(a[2:], 3)
+        numpy.testing.assert_array_equal(a[:6], [0, 1, -2, -3, -4, 5])
+        a.flags.writeable = False
+        self.assertEqual(program.get_callable("sum_n")(a, 2), 1)
+        with self.assertRaises(TypeError):
+            program.get_callable("negate_n")(a, 2)
+        with self.assertRaises(ValueError):
+            program.get_callable("sum_n")(numpy.zeros((4, 4), numpy.int32).T, 4)
+        with self.assertRaises(TypeError):
+            program.get_callable("sum_n")(numpy.zeros(4, numpy.int64), 4)
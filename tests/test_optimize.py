@@ -0,0 +1,82 @@
+from typing import cast, Callable
+
+import petra as pt
+import unittest
+
+from ctypes import CFUNCTYPE, c_int32
+from llvmlite import binding
+from petra.optimize import optimize
+
+program = pt.Program("module")
+
+n = pt.Symbol(pt.Int32_t, "n")
+steps = pt.Symbol(pt.Int32_t, "steps")
+
+program.add_func(
+    "collatz",
+    (n,),
+    pt.Int32_t,
+    pt.Block(
+        [
+            pt.DefineVar(steps, pt.Int32(0)),
+            pt.While(
+                pt.Neq(pt.Var(n), pt.Int32(1)),
+                pt.Block(
+                    [
+                        pt.If(
+                            pt.Eq(pt.Mod(pt.Var(n), pt.Int32(2)), pt.Int32(0)),
+                            pt.Block(
+                                [pt.Assign(pt.Var(n), pt.Div(pt.Var(n), pt.Int32(2)))]
+                            ),
+                            pt.Block(
+                                [
+                                    pt.Assign(
+                                        pt.Var(n),
+                                        pt.Add(
+                                            pt.Mul(pt.Int32(3), pt.Var(n)), pt.Int32(1)
+                                        ),
+                                    )
+                                ]
+                            ),
+                        ),
+                        pt.Assign(pt.Var(steps), pt.Add(pt.Var(steps), pt.Int32(1))),
+                    ]
+                ),
+            ),
+            pt.Return(pt.Var(steps)),
+        ]
+    ),
+)
+
+
+class OptimizeTestCase(unittest.TestCase):
+    def collatz(self, opt_level: int, size_level: int = 0) -> Callable[[int], int]:
+        self.engine = program.compile(opt_level=opt_level, size_level=size_level)
+        collatz = self.engine.get_function_address("collatz")
+        return cast(Callable[[int], int], CFUNCTYPE(c_int32, c_int32)(collatz))
+
+    def test_opt_levels(self) -> None:
+        for opt_level in range(4):
+            collatz = self.collatz(opt_level)
+            self.assertEqual(collatz(1), 0)
+            self.assertEqual(collatz(6), 8)
+            self.assertEqual(collatz(27), 111)
+
+    def test_size_levels(self) -> None:
+        for size_level in range(3):
+            collatz = self.collatz(2, size_level)
+            self.assertEqual(collatz(27), 111)
+
+    def test_invalid_levels(self) -> None:
+        with self.assertRaises(ValueError):
+            program.compile(opt_level=4)
+        with self.assertRaises(ValueError):
+            program.compile(opt_level=2, size_level=3)
+
+    def test_mem2reg(self) -> None:
+        program.compile()
+        target_machine = binding.Target.from_default_triple().create_target_machine()
+        module = binding.parse_assembly(program.to_llvm())
+        self.assertIn("alloca", str(module))
+        optimize(module, target_machine, 2)
+        self.assertNotIn("alloca", str(module))
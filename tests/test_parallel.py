@@ -0,0 +1,55 @@
+from typing import Sequence, Tuple
+
+import os
+import petra as pt
+import tempfile
+import unittest
+
+from petra.parallel import partition
+
+program = pt.Program("module")
+
+x = pt.Symbol(pt.Int32_t, "x")
+
+program.add_func(
+    "f0", (x,), pt.Int32_t, pt.Block([pt.Return(pt.Add(pt.Var(x), pt.Int32(1)))])
+)
+for i in range(1, 10):
+    program.add_func(
+        "f%d" % i,
+        (x,),
+        pt.Int32_t,
+        pt.Block(
+            [pt.Return(pt.Add(pt.Call("f%d" % (i - 1), [pt.Var(x)]), pt.Int32(1)))]
+        ),
+    )
+
+
+def split(items: Sequence[int], parts: int) -> Tuple[Tuple[int, ...], ...]:
+    return tuple(tuple(part) for part in partition(items, parts))
+
+
+class ParallelTestCase(unittest.TestCase):
+    def test_partition(self) -> None:
+        self.assertEqual(split([1, 2, 3, 4, 5], 2), ((1, 2, 3), (4, 5)))
+        self.assertEqual(split([1, 2], 4), ((1,), (2,)))
+        self.assertEqual(split([], 4), ((),))
+
+    def test_compile(self) -> None:
+        for opt_level in (0, 2):
+            f9 = program.get_callable("f9", opt_level=opt_level, jobs=3)
+            self.assertEqual(f9(1), 11)
+            self.assertEqual(program.get_callable("f4", opt_level=opt_level)(0), 5)
+
+    def test_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = pt.ObjectCache(tmpdir)
+            program.compile(opt_level=1, jobs=2, cache=cache)
+            self.assertEqual((cache.hits, cache.misses), (0, 2))
+            self.assertEqual(len(os.listdir(tmpdir)), 2)
+
+    def test_save_object(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "module.o")
+            program.save_object(filename, opt_level=2, jobs=2)
+            self.assertGreater(os.path.getsize(filename), 0)
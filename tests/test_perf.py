@@ -0,0 +1,163 @@
+from typing import Dict, List, Tuple, cast
+
+import ctypes
+import os
+import petra as pt
+import petra.perf
+import struct
+import sys
+import tempfile
+import unittest
+
+from petra.perf import ElfObject, jitdump_path, perf_map_path
+
+
+def unpack(fmt: str, data: bytes, pos: int = 0) -> Tuple[int, ...]:
+    return cast(Tuple[int, ...], struct.unpack_from(fmt, data, pos))
+
+
+def make_block() -> Tuple[pt.Block, pt.Symbol, int]:
+    """
+    Returns the body of a function of x and the line of its return statement.
+    """
+    x = pt.Symbol(pt.Int32_t, "x")
+    y = pt.Symbol(pt.Int32_t, "y")
+    line = cast(int, sys._getframe().f_lineno) + 4
+    block = pt.Block(
+        [
+            pt.DefineVar(y, pt.Mul(pt.Var(x), pt.Var(x))),
+            pt.Return(pt.Add(pt.Var(y), pt.Int32(1))),
+        ]
+    )
+    return block, x, line
+
+
+def make_program(
+    incremental: bool = False,
+    debug_info: bool = False,
+    perf_map: bool = False,
+    jitdump: bool = False,
+) -> Tuple[pt.Program, int]:
+    """
+    Returns a program and the line of the return statement of its function.
+    """
+    program = pt.Program(
+        "module",
+        incremental=incremental,
+        debug_info=debug_info,
+        perf_map=perf_map,
+        jitdump=jitdump,
+    )
+    with pt.record_locations():
+        block, x, line = make_block()
+    program.add_func("square", (x,), pt.Int32_t, block)
+    return program, line
+
+
+def read_jitdump() -> List[Tuple[int, bytes]]:
+    """
+    Returns the id and body of each record in the jitdump file.
+    """
+    with open(jitdump_path(), "rb") as f:
+        data = f.read()
+    magic, version, header_size = unpack("<III", data)
+    assert (magic, version) == (0x4A695444, 1)
+    records: List[Tuple[int, bytes]] = []
+    pos = header_size
+    while pos < len(data):
+        id_, size = unpack("<II", data, pos)
+        records.append((id_, data[pos + 16 : pos + size]))
+        pos += size
+    return records
+
+
+class PerfTestCase(unittest.TestCase):
+    def tearDown(self) -> None:
+        petra.perf._jitdump = None
+        for path in (perf_map_path(), jitdump_path()):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_debug_info(self) -> None:
+        program, line = make_program(debug_info=True)
+        llvm_ir = program.to_llvm()
+        self.assertIn("DISubprogram", llvm_ir)
+        self.assertIn('filename: "%s"' % os.path.basename(__file__), llvm_ir)
+        self.assertIn("line: %d" % line, llvm_ir)
+        for opt_level in (0, 2):
+            square = program.get_callable("square", opt_level=opt_level)
+            self.assertEqual(square(3), 10)
+
+    def test_no_locations(self) -> None:
+        block, x, _ = make_block()
+        statement = block.statements[0]
+        assert isinstance(statement, pt.DefineVar)
+        self.assertIsNone(statement.location)
+        program = pt.Program("module", debug_info=True)
+        program.add_func("square", (x,), pt.Int32_t, block)
+        llvm_ir = program.to_llvm()
+        self.assertIn("DISubprogram", llvm_ir)
+        self.assertIn('filename: "<petra>"', llvm_ir)
+        self.assertEqual(program.get_callable("square")(3), 10)
+
+    def test_elf_object(self) -> None:
+        program, line = make_program(debug_info=True)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "module.o")
+            program.save_object(path)
+            with open(path, "rb") as f:
+                elf = ElfObject(f.read())
+        section, offset, size = elf.functions()["square"]
+        rows = elf.line_rows()
+        lines = tuple(row[3] for row in rows)
+        self.assertIn(line, lines)
+        for row_section, row_offset, filename, _ in rows:
+            self.assertEqual(row_section, section)
+            self.assertTrue(offset <= row_offset <= offset + size)
+            self.assertEqual(filename, __file__)
+
+    def test_perf_map(self) -> None:
+        program, _ = make_program(perf_map=True)
+        square = program.get_callable("square")
+        engine = program.compile()
+        with open(perf_map_path()) as f:
+            entries = [line.split() for line in f]
+        self.assertEqual(len(entries), 1)
+        address, size, name = entries[0]
+        self.assertEqual(name, "square")
+        self.assertEqual(int(address, 16), engine.get_function_address("square"))
+        self.assertGreater(int(size, 16), 0)
+        self.assertEqual(square(2), 5)
+
+    def test_jitdump(self) -> None:
+        program, line = make_program(debug_info=True, jitdump=True)
+        engine = program.compile()
+        address = engine.get_function_address("square")
+        records = read_jitdump()
+        ids = tuple(id_ for id_, _ in records)
+        self.assertEqual(ids, (2, 0))
+        debug_address, count = unpack("<QQ", records[0][1])
+        self.assertEqual(debug_address, address)
+        lines: Dict[int, str] = dict()
+        pos = 16
+        for _ in range(count):
+            _, lineno, _ = unpack("<QII", records[0][1], pos)
+            end = records[0][1].index(b"\0", pos + 16)
+            lines[lineno] = records[0][1][pos + 16 : end].decode()
+            pos = end + 1
+        self.assertEqual(lines[line], __file__)
+        _, _, vma, code_address, size, _ = unpack("<IIQQQQ", records[1][1])
+        self.assertEqual((vma, code_address), (address, address))
+        name_end = records[1][1].index(b"\0", 40)
+        self.assertEqual(records[1][1][40:name_end], b"square")
+        self.assertEqual(records[1][1][name_end + 1 :], ctypes.string_at(address, size))
+
+    def test_incremental(self) -> None:
+        program, _ = make_program(incremental=True, perf_map=True)
+        program.compile()
+        x = pt.Symbol(pt.Int32_t, "x")
+        program.add_func("one", (x,), pt.Int32_t, pt.Block([pt.Return(pt.Int32(1))]))
+        program.compile()
+        with open(perf_map_path()) as f:
+            names = tuple(line.split()[2] for line in f)
+        self.assertEqual(names, ("square", "one"))
@@ -1,9 +1,9 @@
-from typing import cast, Callable
+from typing import cast, Callable, Tuple
 
 import petra as pt
 import unittest
 
-from ctypes import CFUNCTYPE, c_int32, c_int64
+from ctypes import CFUNCTYPE, POINTER, Array, Structure, c_int32, c_int64
 
 program = pt.Program("module")
 
@@ -54,6 +54,84 @@ program.add_func(
     ),
 )
 
+i = pt.Symbol(pt.Int64_t, "i")
+n = pt.Symbol(pt.Int64_t, "n")
+
+# Doubles each element of ptr[0:n] in place.
+program.add_func(
+    "double_in_place",
+    (ptr, n),
+    (),
+    pt.Block(
+        [
+            pt.For(
+                i,
+                pt.Int64(0),
+                pt.Var(n),
+                pt.Int64(1),
+                pt.Block(
+                    [
+                        pt.Store(
+                            pt.Offset(pt.Var(ptr), pt.Var(i)),
+                            pt.Mul(
+                                pt.Deref(pt.Offset(pt.Var(ptr), pt.Var(i))), pt.Int64(2)
+                            ),
+                        )
+                    ]
+                ),
+            ),
+            pt.Return(()),
+        ]
+    ),
+)
+
+Pair_t = pt.StructType({"first": pt.Int64_t, "second": pt.ArrayType(pt.Int64_t, 3)})
+pair = pt.Symbol(pt.PointerType(Pair_t), "pair")
+
+# pair->first = pair->second[i], returning the previous value of pair->first.
+program.add_func(
+    "swap_fields",
+    (pair, i),
+    pt.Int64_t,
+    pt.Block(
+        [
+            pt.DefineVar(val, pt.Deref(pt.FieldPtr(pt.Var(pair), name="first"))),
+            pt.Store(
+                pt.FieldPtr(pt.Var(pair), idx=0),
+                pt.Deref(
+                    pt.ElementPtr(pt.FieldPtr(pt.Var(pair), name="second"), pt.Var(i))
+                ),
+            ),
+            pt.Return(pt.Var(val)),
+        ]
+    ),
+)
+
+program.add_func(
+    "volatile_copy",
+    (ptr,),
+    (),
+    pt.Block(
+        [
+            pt.Store(
+                pt.Offset(pt.Var(ptr), pt.Int64(1)),
+                pt.Deref(pt.Var(ptr), align=8, volatile=True),
+                volatile=True,
+            ),
+            pt.Return(()),
+        ]
+    ),
+)
+
+
+class Pair(Structure):
+    _fields_ = [("first", c_int64), ("second", c_int64 * 3)]
+    first: int
+    second: "Array[c_int64]"
+
+    def __init__(self, first: int, second: Tuple[int, int, int]) -> None:
+        super().__init__(first, second)
+
 
 class PointersTestCase(unittest.TestCase):
     def setUp(self) -> None:
@@ -74,9 +152,92 @@ class PointersTestCase(unittest.TestCase):
     def test_mismatch_type_deref(self) -> None:
         with self.assertRaises(pt.TypeCheckError):
             pt.Program("module").add_func(
-                "foo", (), pt.Int32_t, pt.Block([pt.Return(pt.Deref(pt.Int64(123)))]),
+                "foo",
+                (),
+                pt.Int32_t,
+                pt.Block([pt.Return(pt.Deref(pt.Int64(123)))]),
             )
         with self.assertRaises(pt.TypeCheckError):
             pt.Program("module").add_func(
-                "foo", (ptr,), (), pt.Block([pt.DefineVar(v32, pt.Deref(pt.Var(ptr))),])
+                "foo",
+                (ptr,),
+                (),
+                pt.Block(
+                    [
+                        pt.DefineVar(v32, pt.Deref(pt.Var(ptr))),
+                    ]
+                ),
             )
+
+    def test_store_in_place(self) -> None:
+        address = self.engine.get_function_address("double_in_place")
+        f = CFUNCTYPE(None, POINTER(c_int64), c_int64)(address)
+        values = (c_int64 * 5)(1, 2, 3, 4, 5)
+        f(values, 4)
+        self.assertEqual(cast(Tuple[int, ...], tuple(values)), (2, 4, 6, 8, 5))
+
+    def test_element_pointers(self) -> None:
+        address = self.engine.get_function_address("swap_fields")
+        f = cast(
+            Callable[[Pair, int], int],
+            CFUNCTYPE(c_int64, POINTER(Pair), c_int64)(address),
+        )
+        p = Pair(7, (10, 20, 30))
+        self.assertEqual(f(p, 2), 7)
+        self.assertEqual(p.first, 30)
+        self.assertEqual(cast(Tuple[int, ...], tuple(p.second)), (10, 20, 30))
+
+    def test_volatile(self) -> None:
+        address = self.engine.get_function_address("volatile_copy")
+        f = CFUNCTYPE(None, POINTER(c_int64))(address)
+        values = (c_int64 * 2)(3, 0)
+        f(values)
+        self.assertEqual(cast(Tuple[int, ...], tuple(values)), (3, 3))
+        llvm_ir = program.to_llvm().split('@"volatile_copy"')[1]
+        self.assertIn("load volatile i64, i64* %", llvm_ir)
+        self.assertIn(", align 8", llvm_ir)
+        self.assertIn("store volatile i64 %", llvm_ir)
+
+    def test_store_order(self) -> None:
+        order = pt.Program("module")
+        order.add_func_decl("get_ptr", (), Pointer_Int64_t)
+        order.add_func_decl("get_val", (), pt.Int64_t)
+        order.add_func(
+            "store",
+            (),
+            (),
+            pt.Block(
+                [
+                    pt.Store(pt.Call("get_ptr", []), pt.Call("get_val", [])),
+                    pt.Return(()),
+                ]
+            ),
+        )
+        llvm_ir = order.to_llvm()
+        self.assertLess(
+            llvm_ir.index('call i64* @"get_ptr"'), llvm_ir.index('call i64 @"get_val"')
+        )
+
+    def test_pointer_errors(self) -> None:
+        with self.assertRaises(pt.ValidateError):
+            pt.Deref(pt.Var(ptr), align=3)
+        with self.assertRaises(pt.ValidateError):
+            pt.FieldPtr(pt.Var(pair))
+        for statement in [
+            pt.Store(pt.Var(ptr), pt.Int32(1)),
+            pt.Store(pt.Var(val), pt.Int64(1)),
+            pt.Store(pt.Offset(pt.Var(ptr), pt.Bool(True)), pt.Int64(1)),
+            pt.Store(pt.ElementPtr(pt.Var(ptr), pt.Int64(0)), pt.Int64(1)),
+            pt.Store(pt.FieldPtr(pt.Var(pair), name="third"), pt.Int64(1)),
+            pt.Store(
+                pt.ElementPtr(pt.FieldPtr(pt.Var(pair), idx=1), pt.Int64(3)),
+                pt.Int64(1),
+            ),
+        ]:
+            with self.assertRaises(pt.TypeCheckError):
+                pt.Program("module").add_func(
+                    "foo",
+                    (ptr, val, pair),
+                    (),
+                    pt.Block([statement, pt.Return(())]),
+                )
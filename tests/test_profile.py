@@ -0,0 +1,77 @@
+from typing import Dict, Tuple
+
+import petra as pt
+import unittest
+
+
+def make_program(profile: bool = False, incremental: bool = False) -> pt.Program:
+    program = pt.Program("module", incremental=incremental, profile=profile)
+    n = pt.Symbol(pt.Int32_t, "n")
+    program.add_func(
+        "fib",
+        (n,),
+        pt.Int32_t,
+        pt.Block(
+            [
+                pt.If(
+                    pt.Lt(pt.Var(n), pt.Int32(2)),
+                    pt.Block([pt.Return(pt.Var(n))]),
+                    pt.Block([]),
+                ),
+                pt.Return(
+                    pt.Add(
+                        pt.Call("fib", [pt.Sub(pt.Var(n), pt.Int32(1))]),
+                        pt.Call("fib", [pt.Sub(pt.Var(n), pt.Int32(2))]),
+                    )
+                ),
+            ]
+        ),
+    )
+    program.add_func("unused", (), (), pt.Block([pt.Return(())]))
+    return program
+
+
+class ProfileTestCase(unittest.TestCase):
+    def test_counts(self) -> None:
+        program = make_program(profile=True)
+        fib = program.get_callable("fib")
+        profile = program.get_profile()
+        unused: Dict[str, Tuple[int, int]] = {"fib": (0, 0), "unused": (0, 0)}
+        self.assertEqual(profile.read(), unused)
+        self.assertEqual(fib(10), 55)
+        calls, cycles = profile.read()["fib"]
+        self.assertEqual(calls, 177)
+        self.assertGreater(cycles, 0)
+        self.assertEqual(profile.read()["unused"], (0, 0))
+        self.assertIn("fib", profile.report())
+        self.assertNotIn("unused", profile.report())
+        profile.reset()
+        self.assertEqual(profile.read()["fib"], (0, 0))
+
+    def test_optimized(self) -> None:
+        program = make_program(profile=True)
+        self.assertEqual(program.get_callable("fib", opt_level=2)(10), 55)
+        self.assertEqual(program.get_profile(opt_level=2).read()["fib"][0], 177)
+        # Each engine has counters of its own.
+        self.assertEqual(program.get_profile().read()["fib"][0], 0)
+
+    def test_incremental(self) -> None:
+        program = make_program(incremental=True, profile=True)
+        program.get_callable("fib")(3)
+        x = pt.Symbol(pt.Int32_t, "x")
+        program.add_func(
+            "fib_twice",
+            (x,),
+            pt.Int32_t,
+            pt.Block([pt.Return(pt.Call("fib", [pt.Call("fib", [pt.Var(x)])]))]),
+        )
+        self.assertEqual(program.get_callable("fib_twice")(4), 2)
+        counts = program.get_profile().read()
+        self.assertEqual(counts["fib_twice"][0], 1)
+        self.assertEqual(counts["fib"][0], 5 + 9 + 5)
+
+    def test_not_profiled(self) -> None:
+        program = make_program()
+        self.assertNotIn("readcyclecounter", program.to_llvm())
+        with self.assertRaises(Exception):
+            program.get_profile()
@@ -0,0 +1,92 @@
+from typing import cast, Callable
+
+import petra as pt
+import unittest
+
+from ctypes import CFUNCTYPE, c_int32
+
+
+def return_const(program: pt.Program, name: str, value: int) -> None:
+    program.add_func(name, (), pt.Int32_t, pt.Block([pt.Return(pt.Int32(value))]))
+
+
+class ProgramTestCase(unittest.TestCase):
+    def test_engine_reused(self) -> None:
+        program = pt.Program("module")
+        return_const(program, "one", 1)
+        engine = program.compile()
+        self.assertIs(program.compile(), engine)
+        self.assertIsNot(program.compile(opt_level=2), engine)
+        self.assertIs(program.compile(), engine)
+
+    def test_engine_invalidated(self) -> None:
+        program = pt.Program("module")
+        return_const(program, "one", 1)
+        engine = program.compile()
+        llvm_ir = program.to_llvm()
+        return_const(program, "two", 2)
+        self.assertNotEqual(program.to_llvm(), llvm_ir)
+        new_engine = program.compile()
+        self.assertIsNot(new_engine, engine)
+        two = new_engine.get_function_address("two")
+        self.assertEqual(cast(Callable[[], int], CFUNCTYPE(c_int32)(two))(), 2)
+        program.add_func_decl("malloc", (pt.Int64_t,), pt.PointerType(pt.Int8_t))
+        self.assertIsNot(program.compile(), new_engine)
+
+    def test_incremental(self) -> None:
+        program = pt.Program("module", incremental=True)
+        return_const(program, "one", 1)
+        engine = program.compile()
+        program.add_func(
+            "two",
+            (),
+            pt.Int32_t,
+            pt.Block([pt.Return(pt.Add(pt.Call("one", []), pt.Call("one", [])))]),
+        )
+        self.assertIs(program.compile(), engine)
+        two = engine.get_function_address("two")
+        self.assertEqual(cast(Callable[[], int], CFUNCTYPE(c_int32)(two))(), 2)
+        program.add_func(
+            "three",
+            (),
+            pt.Int32_t,
+            pt.Block([pt.Return(pt.Add(pt.Call("two", []), pt.Call("one", [])))]),
+        )
+        self.assertIs(program.compile(opt_level=0), engine)
+        three = engine.get_function_address("three")
+        self.assertEqual(cast(Callable[[], int], CFUNCTYPE(c_int32)(three))(), 3)
+        # The full module still contains every function.
+        self.assertIn('define i32 @"three"', program.to_llvm())
+
+    def test_lazy(self) -> None:
+        program = pt.Program("module", lazy=True)
+        # Forward reference to a function added later.
+        program.add_func(
+            "two",
+            (),
+            pt.Int32_t,
+            pt.Block([pt.Return(pt.Add(pt.Call("one", []), pt.Call("one", [])))]),
+        )
+        return_const(program, "one", 1)
+        # Never reached from "two", so never typechecked.
+        program.add_func("bad", (), pt.Int32_t, pt.Block([pt.Return(pt.Int8(1))]))
+        llvm_ir = program.to_llvm(entry_points=["two"])
+        self.assertIn('define i32 @"one"', llvm_ir)
+        self.assertNotIn('@"bad"', llvm_ir)
+        self.assertEqual(cast(Callable[[], int], program.get_callable("two"))(), 2)
+        with self.assertRaises(pt.TypeCheckError):
+            program.to_llvm()
+        with self.assertRaises(Exception):
+            program.to_llvm(entry_points=["missing"])
+
+    def test_lazy_partial_failure(self) -> None:
+        program = pt.Program("module", lazy=True)
+        return_const(program, "one", 1)
+        program.add_func("bad", (), pt.Int32_t, pt.Block([pt.Return(pt.Int8(1))]))
+        return_const(program, "two", 2)
+        program.to_llvm(entry_points=["one"])
+        # "two" is built before "bad" fails, so it must not be left out of the
+        # IR cached by the first call.
+        with self.assertRaises(pt.TypeCheckError):
+            program.to_llvm()
+        self.assertEqual(cast(Callable[[], int], program.get_callable("two"))(), 2)
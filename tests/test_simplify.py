@@ -0,0 +1,166 @@
+from typing import cast
+
+import petra as pt
+import unittest
+
+from ctypes import CFUNCTYPE, c_int8, c_int32
+from petra.function import Function
+from petra.simplify import count_nodes
+
+program = pt.Program("module")
+
+x = pt.Symbol(pt.Int32_t, "x")
+y = pt.Symbol(pt.Int32_t, "y")
+
+program.add_func(
+    "wrap_i8", (), pt.Int8_t, pt.Block([pt.Return(pt.Add(pt.Int8(127), pt.Int8(1)))])
+)
+
+program.add_func(
+    "div_i32",
+    (),
+    pt.Int32_t,
+    pt.Block(
+        [
+            pt.Return(
+                pt.Add(
+                    pt.Mul(pt.Div(pt.Int32(-7), pt.Int32(2)), pt.Int32(10)),
+                    pt.Mod(pt.Int32(-7), pt.Int32(2)),
+                )
+            )
+        ]
+    ),
+)
+
+program.add_func(
+    "identities",
+    (x,),
+    pt.Int32_t,
+    pt.Block(
+        [
+            pt.Return(
+                pt.Mul(pt.Int32(1), pt.Sub(pt.Add(pt.Var(x), pt.Int32(0)), pt.Int32(0)))
+            )
+        ]
+    ),
+)
+
+program.add_func(
+    "pruned",
+    (x,),
+    pt.Int32_t,
+    pt.Block(
+        [
+            pt.While(
+                pt.Lt(pt.Int32(1), pt.Int32(0)), pt.Block([pt.Return(pt.Int32(1))])
+            ),
+            pt.If(
+                pt.And(pt.Bool(True), pt.Not(pt.Eq(pt.Int32(2), pt.Int32(3)))),
+                pt.Block([pt.DefineVar(y, pt.Var(x)), pt.Return(pt.Var(y))]),
+                pt.Block([pt.Return(pt.Int32(2))]),
+            ),
+            pt.Return(pt.Int32(3)),
+        ]
+    ),
+)
+
+program.add_func(
+    "div_by_zero",
+    (),
+    pt.Int32_t,
+    pt.Block(
+        [
+            pt.If(
+                pt.Or(
+                    pt.Bool(True), pt.Eq(pt.Div(pt.Int32(1), pt.Int32(0)), pt.Int32(0))
+                ),
+                pt.Block([pt.Return(pt.Int32(1))]),
+                pt.Block([pt.Return(pt.Div(pt.Int32(1), pt.Int32(0)))]),
+            ),
+        ]
+    ),
+)
+
+
+class SimplifyTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = program.compile()
+
+    def call(self, name: str, *args: int) -> int:
+        functype = program.functypes[name]
+        restype = c_int8 if functype[1] is pt.Int8_t else c_int32
+        address = self.engine.get_function_address(name)
+        f = CFUNCTYPE(restype, *(c_int32 for _ in args))(address)
+        return cast(int, f(*args))
+
+    def removed(self, name: str) -> int:
+        func = program.definitions[name]
+        assert isinstance(func, Function)
+        return func.removed
+
+    def test_wrap(self) -> None:
+        self.assertEqual(self.call("wrap_i8"), -128)
+        self.assertEqual(self.removed("wrap_i8"), 2)
+
+    def test_div(self) -> None:
+        self.assertEqual(self.call("div_i32"), -31)
+        self.assertNotIn("sdiv", program.to_llvm().split('@"div_i32"')[1])
+
+    def test_identities(self) -> None:
+        self.assertEqual(self.call("identities", 5), 5)
+        self.assertEqual(self.removed("identities"), 6)
+
+    def test_pruned(self) -> None:
+        self.assertEqual(self.call("pruned", 5), 5)
+        llvm_ir = program.to_llvm().split('@"pruned"')[1].split("define")[0]
+        self.assertNotIn("br i1", llvm_ir)
+        self.assertNotIn("ret i32 2", llvm_ir)
+        self.assertNotIn("ret i32 3", llvm_ir)
+
+    def test_div_by_zero_not_folded(self) -> None:
+        self.assertEqual(self.call("div_by_zero"), 1)
+        block = pt.Block([pt.Return(pt.Div(pt.Int32(1), pt.Int32(0)))])
+        self.assertEqual(Function("f", (), pt.Int32_t, block, {}).removed, 0)
+
+    def test_count_nodes(self) -> None:
+        block = pt.Block(
+            [
+                pt.If(
+                    pt.Lt(pt.Var(x), pt.Int32(1)),
+                    pt.Block([pt.Assign(pt.Var(x), pt.Int32(2))]),
+                    pt.Block([]),
+                ),
+                pt.Return(pt.Var(x)),
+            ]
+        )
+        self.assertEqual(count_nodes(block), 12)
+
+    def test_block_reused(self) -> None:
+        # The variable defined in the branch taken ends with it, rather than
+        # clashing with the one defined after the if.
+        add = pt.Add(pt.Var(y), pt.Int32(0))
+        ret = pt.Return(add)
+        block = pt.Block(
+            [
+                pt.If(
+                    pt.Bool(True),
+                    pt.Block([pt.DefineVar(y, pt.Int32(1))]),
+                    pt.Block([]),
+                ),
+                pt.DefineVar(y, pt.Int32(2)),
+                ret,
+            ]
+        )
+        statements = list(block.statements)
+        for _ in range(2):
+            reused = pt.Program("module")
+            reused.add_func("f", (), pt.Int32_t, block)
+            self.assertEqual(block.statements, statements)
+            self.assertIs(ret.e, add)
+            llvm_ir = reused.to_llvm()
+            self.assertNotIn("br i1", llvm_ir)
+            # Both variables start, and the branch's ends before the other's;
+            # the function returns before the latter ends.
+            self.assertEqual(llvm_ir.count('call void @"llvm.lifetime.start.p0i8"'), 2)
+            self.assertEqual(llvm_ir.count('call void @"llvm.lifetime.end.p0i8"'), 1)
+            self.assertEqual(reused.get_callable("f")(), 2)
@@ -0,0 +1,123 @@
+from typing import Iterable, List, Tuple, cast
+
+import os
+import petra as pt
+import tempfile
+import unittest
+
+from petra.stats import PhaseRecord, parse_pass_timings
+
+
+def add_funcs(program: pt.Program) -> pt.Program:
+    x = pt.Symbol(pt.Int32_t, "x")
+    program.add_func(
+        "inc",
+        (x,),
+        pt.Int32_t,
+        pt.Block([pt.Return(pt.Add(pt.Var(x), pt.Int32(1)))]),
+    )
+    y = pt.Symbol(pt.Int32_t, "y")
+    program.add_func(
+        "twice",
+        (y,),
+        pt.Int32_t,
+        pt.Block([pt.Return(pt.Call("inc", [pt.Call("inc", [pt.Var(y)])]))]),
+    )
+    return program
+
+
+def names(phases: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(phases)
+
+
+class StatsTestCase(unittest.TestCase):
+    def test_phases(self) -> None:
+        stats = pt.CompileStats()
+        program = add_funcs(pt.Program("module", stats=stats))
+        f = program.get_callable("twice", opt_level=2)
+        self.assertEqual(f(1), 3)
+        self.assertEqual(
+            names(stats.phase_seconds("add_func")), ("typecheck", "codegen", "total")
+        )
+        self.assertEqual(
+            names(stats.phase_seconds("compile")),
+            ("to_llvm", "parse", "optimize", "jit", "total"),
+        )
+        self.assertEqual(
+            names(sorted(stats.function_seconds()["twice"])), ("codegen", "typecheck")
+        )
+        self.assertTrue(all(r.peak_bytes is None for r in stats.records))
+        self.assertIn("optimize", stats.report())
+
+    def test_lazy(self) -> None:
+        stats = pt.CompileStats()
+        program = add_funcs(pt.Program("module", lazy=True, stats=stats))
+        self.assertEqual(names(stats.phase_seconds("add_func")), ("total",))
+        program.to_llvm()
+        self.assertEqual(
+            names(stats.phase_seconds("to_llvm")),
+            ("typecheck", "codegen", "to_llvm", "total"),
+        )
+        self.assertEqual(names(sorted(stats.function_seconds())), ("inc", "twice"))
+
+    def test_save_object(self) -> None:
+        stats = pt.CompileStats()
+        program = add_funcs(pt.Program("module", stats=stats))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            program.save_object(os.path.join(tmpdir, "module.o"), opt_level=1)
+        self.assertEqual(
+            names(stats.phase_seconds("save_object")),
+            ("to_llvm", "parse", "optimize", "emit", "total"),
+        )
+
+    def test_memory(self) -> None:
+        stats = pt.CompileStats(memory=True)
+        add_funcs(pt.Program("module", stats=stats)).compile()
+        for record in stats.records:
+            assert record.peak_bytes is not None
+            self.assertGreaterEqual(record.peak_bytes, 0)
+        total = [r for r in stats.records if r.phase == "total"][-1]
+        inner = [r for r in stats.records if r.operation == "compile"][:-1]
+        assert total.peak_bytes is not None
+        self.assertGreaterEqual(
+            total.peak_bytes, max(cast(int, r.peak_bytes) for r in inner)
+        )
+
+    def test_hooks(self) -> None:
+        records: List[PhaseRecord] = []
+        stats = pt.CompileStats(hooks=[records.append])
+        add_funcs(pt.Program("module", stats=stats))
+        self.assertEqual(records, stats.records)
+        first = tuple((r.operation, r.phase, r.function) for r in records[:3])
+        self.assertEqual(
+            first,
+            (
+                ("add_func", "typecheck", "inc"),
+                ("add_func", "codegen", "inc"),
+                ("add_func", "total", None),
+            ),
+        )
+
+    def test_pass_timing(self) -> None:
+        stats = pt.CompileStats(pass_timing=True)
+        add_funcs(pt.Program("module", stats=stats)).compile(opt_level=2)
+        self.assertEqual(len(stats.pass_reports), 1)
+        self.assertIn("Function Integration/Inlining", stats.pass_seconds)
+
+    def test_parse_pass_timings(self) -> None:
+        report = "\n".join(
+            [
+                "  ... Pass execution timing report ...",
+                "   ---User Time---   --System Time--   --User+System--"
+                "   ---Wall Time---  --- Name ---",
+                "   0.0009 ( 25.4%)   0.0002 ( 46.9%)   0.0011 ( 27.7%)"
+                "   0.0011 ( 27.8%)  Simplify the CFG",
+                "   0.0001 (  2.2%)   0.0001 (  2.4%)  Simplify the CFG",
+                "   0.0040 (100.0%)   0.0041 (100.0%)  Total",
+                "  ... Instruction Selection and Scheduling timing report ...",
+                "   0.0001 (  2.2%)   0.0001 (  2.4%)  DAG Combining 1",
+            ]
+        )
+        timings = parse_pass_timings(report)
+        self.assertEqual(names(timings), ("Simplify the CFG",))
+        self.assertAlmostEqual(timings["Simplify the CFG"], 0.0012)
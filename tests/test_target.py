@@ -0,0 +1,45 @@
+from typing import cast, Callable
+
+import os
+import petra as pt
+import tempfile
+import unittest
+
+from ctypes import CFUNCTYPE, c_int32
+from petra.target import create_target_machine, get_target_machine, host_cpu
+
+program = pt.Program("module")
+
+x = pt.Symbol(pt.Int32_t, "x")
+
+program.add_func(
+    "double",
+    (x,),
+    pt.Int32_t,
+    pt.Block([pt.Return(pt.Mul(pt.Var(x), pt.Int32(2)))]),
+)
+
+
+class TargetTestCase(unittest.TestCase):
+    def test_shared_machine(self) -> None:
+        self.assertIs(get_target_machine(2), get_target_machine(2))
+        self.assertIsNot(get_target_machine(2), get_target_machine(3))
+        self.assertIsNot(create_target_machine(2), create_target_machine(2))
+
+    def test_host_cpu(self) -> None:
+        name, features = host_cpu()
+        self.assertNotEqual(name, "")
+        self.assertIs(host_cpu()[1], features)
+
+    def test_generic_cpu(self) -> None:
+        engine = program.compile(cpu="generic", features="")
+        self.assertIsNot(engine, program.compile())
+        double = engine.get_function_address("double")
+        f = cast(Callable[[int], int], CFUNCTYPE(c_int32, c_int32)(double))
+        self.assertEqual(f(21), 42)
+
+    def test_save_object(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "double.o")
+            program.save_object(filename, opt_level=2, cpu="generic", features="")
+            self.assertGreater(os.path.getsize(filename), 0)
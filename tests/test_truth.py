@@ -54,6 +54,26 @@ program.add_func(
     "not_", (z,), pt.Bool_t, pt.Block([pt.Return(pt.Not(pt.Var(z)))]),
 )
 
+program.add_func("id", (z,), pt.Bool_t, pt.Block([pt.Return(pt.Var(z))]))
+
+program.add_func(
+    "and_call",
+    (z, w),
+    pt.Bool_t,
+    pt.Block([pt.Return(pt.And(pt.Var(z), pt.Call("id", [pt.Var(w)])))]),
+)
+
+program.add_func(
+    "or_call",
+    (z, w),
+    pt.Bool_t,
+    pt.Block([pt.Return(pt.Or(pt.Var(z), pt.Call("id", [pt.Var(w)])))]),
+)
+
+
+def function_llvm(name: str) -> str:
+    return program.to_llvm().split('@"%s"' % name)[1].split("\n}")[0]
+
 
 class TruthTestCase(unittest.TestCase):
     def setUp(self) -> None:
@@ -112,6 +132,16 @@ class TruthTestCase(unittest.TestCase):
         not_ = self.engine.get_function_address("not_")
         self.not_ = cast(Callable[[bool], bool], CFUNCTYPE(c_bool, c_bool)(not_))
 
+        and_call = self.engine.get_function_address("and_call")
+        self.and_call = cast(
+            Callable[[bool, bool], bool], CFUNCTYPE(c_bool, c_bool, c_bool)(and_call)
+        )
+
+        or_call = self.engine.get_function_address("or_call")
+        self.or_call = cast(
+            Callable[[bool, bool], bool], CFUNCTYPE(c_bool, c_bool, c_bool)(or_call)
+        )
+
     def test_lt(self) -> None:
         self.assertFalse(self.lt(0, 0))
         self.assertTrue(self.lt(0, 3))
@@ -226,6 +256,28 @@ class TruthTestCase(unittest.TestCase):
         self.assertTrue(self.or_(False, True))
         self.assertFalse(self.or_(False, False))
 
+    def test_and_call(self) -> None:
+        self.assertTrue(self.and_call(True, True))
+        self.assertFalse(self.and_call(True, False))
+        self.assertFalse(self.and_call(False, True))
+        self.assertFalse(self.and_call(False, False))
+
+    def test_or_call(self) -> None:
+        self.assertTrue(self.or_call(True, True))
+        self.assertTrue(self.or_call(True, False))
+        self.assertTrue(self.or_call(False, True))
+        self.assertFalse(self.or_call(False, False))
+
+    def test_logical_codegen(self) -> None:
+        # Cheap right operands are selected without branching.
+        for name in ("and_", "or_"):
+            self.assertIn("select", function_llvm(name))
+            self.assertNotIn("br i1", function_llvm(name))
+        # Calls are only made if needed, and the result merged with a phi.
+        for name in ("and_call", "or_call"):
+            self.assertIn("phi", function_llvm(name))
+            self.assertEqual(function_llvm(name).count("alloca"), 2)
+
     def test_not(self) -> None:
         self.assertTrue(self.not_(False))
         self.assertFalse(self.not_(True))
@@ -0,0 +1,36 @@
+import petra as pt
+import unittest
+
+
+class TypeTestCase(unittest.TestCase):
+    def test_interned(self) -> None:
+        self.assertIs(pt.PointerType(pt.Int32_t), pt.PointerType(pt.Int32_t))
+        self.assertIs(pt.ArrayType(pt.Int8_t, 4), pt.ArrayType(pt.Int8_t, 4))
+        self.assertIs(
+            pt.StructType({"a": pt.Int32_t, "b": pt.ArrayType(pt.Int8_t, 4)}),
+            pt.StructType({"a": pt.Int32_t, "b": pt.ArrayType(pt.Int8_t, 4)}),
+        )
+        self.assertIs(
+            pt.PointerType(pt.Int32_t).llvm_type(),
+            pt.PointerType(pt.Int32_t).llvm_type(),
+        )
+
+    def test_distinct(self) -> None:
+        self.assertIsNot(pt.PointerType(pt.Int32_t), pt.PointerType(pt.Int64_t))
+        self.assertIsNot(pt.ArrayType(pt.Int8_t, 4), pt.ArrayType(pt.Int8_t, 5))
+        self.assertIsNot(
+            pt.StructType({"a": pt.Int32_t}), pt.StructType({"b": pt.Int32_t})
+        )
+        self.assertIsNot(
+            pt.StructType({"a": pt.Int32_t, "b": pt.Int64_t}),
+            pt.StructType({"b": pt.Int64_t, "a": pt.Int32_t}),
+        )
+
+    def test_structurally_equal_types_typecheck(self) -> None:
+        p = pt.Symbol(pt.PointerType(pt.Int32_t), "p")
+        pt.Program("module").add_func(
+            "f",
+            (p,),
+            pt.PointerType(pt.Int32_t),
+            pt.Block([pt.Return(pt.Var(p))]),
+        )
@@ -3,7 +3,7 @@ from typing import cast, Callable
 import petra as pt
 import unittest
 
-from ctypes import CFUNCTYPE, c_int32
+from ctypes import CFUNCTYPE, c_int32, c_int64
 
 program = pt.Program("module")
 
@@ -57,6 +57,31 @@ program.add_func(
     ),
 )
 
+n = pt.Symbol(pt.Int64_t, "n")
+total = pt.Symbol(pt.Int64_t, "total")
+step = pt.Symbol(pt.Int64_t, "step")
+
+program.add_func(
+    "loop_local",
+    (n,),
+    pt.Int64_t,
+    pt.Block(
+        [
+            pt.DefineVar(total, pt.Int64(0)),
+            pt.While(
+                pt.Lt(pt.Var(total), pt.Var(n)),
+                pt.Block(
+                    [
+                        pt.DefineVar(step, pt.Int64(1)),
+                        pt.Assign(pt.Var(total), pt.Add(pt.Var(total), pt.Var(step))),
+                    ]
+                ),
+            ),
+            pt.Return(pt.Var(total)),
+        ]
+    ),
+)
+
 
 class VarsTestCase(unittest.TestCase):
     def setUp(self) -> None:
@@ -90,6 +115,19 @@ class VarsTestCase(unittest.TestCase):
     def test_return_temp_unused(self) -> None:
         self.assertEqual(self.return_temp_unused(), 2)
 
+    def test_loop_local(self) -> None:
+        # Allocating the loop's variable on each iteration would overflow the
+        # stack.
+        loop_local = self.engine.get_function_address("loop_local")
+        f = cast(Callable[[int], int], CFUNCTYPE(c_int64, c_int64)(loop_local))
+        self.assertEqual(f(10000000), 10000000)
+        llvm_ir = program.to_llvm().split('@"loop_local"')[1].split("\n}")[0]
+        entry, body = llvm_ir.split("start:")
+        self.assertEqual(entry.count("alloca"), 3)
+        self.assertNotIn("alloca", body)
+        self.assertIn("llvm.lifetime.start", body)
+        self.assertIn("llvm.lifetime.end", body)
+
     def test_variable_name_starts_not_lowercase(self) -> None:
         with self.assertRaises(pt.ValidateError):
             pt.Symbol(pt.Int32_t, "_")
@@ -179,3 +217,45 @@ class VarsTestCase(unittest.TestCase):
                 pt.Int32_t,
                 pt.Block([pt.DefineVar(x, pt.Int8(2)), pt.Return(pt.Int32(2)),]),
             )
+
+    def test_variable_out_of_scope(self) -> None:
+        with self.assertRaises(pt.TypeCheckError):
+            pt.Program("module").add_func(
+                "foo",
+                (),
+                pt.Int32_t,
+                pt.Block(
+                    [
+                        pt.If(
+                            pt.Bool(True),
+                            pt.Block([pt.DefineVar(x, pt.Int32(2))]),
+                            pt.Block([]),
+                        ),
+                        pt.Return(pt.Var(x)),
+                    ]
+                ),
+            )
+
+    def test_redeclared_variable_in_nested_block(self) -> None:
+        with self.assertRaises(pt.TypeCheckError):
+            pt.Program("module").add_func(
+                "foo",
+                (),
+                pt.Int32_t,
+                pt.Block(
+                    [
+                        pt.DefineVar(x, pt.Int32(2)),
+                        pt.While(
+                            pt.Bool(False), pt.Block([pt.DefineVar(x, pt.Int32(3))])
+                        ),
+                        pt.Return(pt.Var(x)),
+                    ]
+                ),
+            )
+
+    def test_trusted(self) -> None:
+        with pt.trusted():
+            bad = pt.Symbol(pt.Int32_t, "_a")
+        self.assertEqual(bad.name, "_a")
+        with self.assertRaises(pt.ValidateError):
+            pt.Symbol(pt.Int32_t, "_a")
@@ -0,0 +1,159 @@
+from typing import cast, Callable, Tuple
+
+import petra as pt
+import unittest
+
+from ctypes import CFUNCTYPE, POINTER, c_bool, c_int32
+from petra.typecheck import TypeContext
+
+program = pt.Program("module")
+
+Int32x4_t = pt.VectorType(pt.Int32_t, 4)
+Pointer_Int32_t = pt.PointerType(pt.Int32_t)
+
+x = pt.Symbol(pt.Int32_t, "x")
+lane = pt.Symbol(pt.Int32_t, "lane")
+v = pt.Symbol(Int32x4_t, "v")
+src = pt.Symbol(Pointer_Int32_t, "src")
+dst = pt.Symbol(Pointer_Int32_t, "dst")
+
+# dst[0:4] = src[0:4] * (1, 2, 3, 4) + x
+program.add_func(
+    "axpy4",
+    (src, dst, x),
+    (),
+    pt.Block(
+        [
+            pt.DefineVar(v, pt.VectorLoad(pt.Var(src), 4)),
+            pt.Assign(
+                pt.Var(v),
+                pt.Add(
+                    pt.Mul(pt.Var(v), pt.Vector(pt.Int32_t, [1, 2, 3, 4])),
+                    pt.Splat(pt.Var(x), 4),
+                ),
+            ),
+            pt.VectorStore(pt.Var(dst), pt.Var(v)),
+            pt.Return(()),
+        ]
+    ),
+)
+
+# Reverses (x, x + 1, x + 2, x + 3) and returns the given lane.
+program.add_func(
+    "reversed_lane",
+    (x, lane),
+    pt.Int32_t,
+    pt.Block(
+        [
+            pt.DefineVar(
+                v,
+                pt.Add(pt.Splat(pt.Var(x), 4), pt.Vector(pt.Int32_t, [0, 1, 2, 3])),
+            ),
+            pt.Return(
+                pt.ExtractLane(
+                    pt.Shuffle(pt.Var(v), pt.Var(v), [3, 2, 1, 0]), pt.Var(lane)
+                )
+            ),
+        ]
+    ),
+)
+
+program.add_func(
+    "less_than_lane",
+    (x, lane),
+    pt.Bool_t,
+    pt.Block(
+        [
+            pt.Return(
+                pt.ExtractLane(
+                    pt.Lt(
+                        pt.InsertLane(
+                            pt.Vector(pt.Int32_t, [5, 5, 5, 5]), pt.Int32(2), pt.Var(x)
+                        ),
+                        pt.Vector(pt.Int32_t, [6, 5, 4, 3]),
+                    ),
+                    pt.Var(lane),
+                )
+            ),
+        ]
+    ),
+)
+
+
+class VectorTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = program.compile()
+
+    def test_load_store(self) -> None:
+        axpy4 = CFUNCTYPE(None, POINTER(c_int32), POINTER(c_int32), c_int32)(
+            self.engine.get_function_address("axpy4")
+        )
+        src = (c_int32 * 4)(10, 20, 30, 40)
+        dst = (c_int32 * 4)()
+        axpy4(src, dst, 5)
+        self.assertEqual(cast(Tuple[int, ...], tuple(dst)), (15, 45, 95, 165))
+        llvm_ir = program.to_llvm()
+        self.assertIn("load <4 x i32>, <4 x i32>* ", llvm_ir)
+        self.assertIn("store <4 x i32> ", llvm_ir)
+
+    def test_shuffle_extract(self) -> None:
+        f = cast(
+            Callable[[int, int], int],
+            CFUNCTYPE(c_int32, c_int32, c_int32)(
+                self.engine.get_function_address("reversed_lane")
+            ),
+        )
+        lanes = tuple(f(10, i) for i in range(4))
+        self.assertEqual(lanes, (13, 12, 11, 10))
+
+    def test_compare_insert(self) -> None:
+        f = cast(
+            Callable[[int, int], bool],
+            CFUNCTYPE(c_bool, c_int32, c_int32)(
+                self.engine.get_function_address("less_than_lane")
+            ),
+        )
+        lanes = tuple(f(3, i) for i in range(4))
+        self.assertEqual(lanes, (True, False, True, False))
+        self.assertEqual(f(4, 2), False)
+
+    def test_types(self) -> None:
+        self.assertIs(pt.VectorType(pt.Int32_t, 4), Int32x4_t)
+        self.assertEqual(str(Int32x4_t.llvm_type()), "<4 x i32>")
+        with self.assertRaises(pt.ValidateError):
+            pt.VectorType(Pointer_Int32_t, 4)
+        with self.assertRaises(pt.ValidateError):
+            pt.VectorType(pt.Int32_t, 0)
+        with self.assertRaises(pt.ValidateError):
+            pt.Vector(pt.Int8_t, [1, 2, 300])
+        with self.assertRaises(pt.ValidateError):
+            pt.Shuffle(pt.Var(v), pt.Var(v), [0, -1])
+
+    def test_typecheck_errors(self) -> None:
+        # Bool_t vectors are bit-packed, so can't be loaded from Bool_t arrays.
+        bools = pt.Symbol(pt.PointerType(pt.Bool_t), "bools")
+        with self.assertRaises(pt.TypeCheckError):
+            pt.Program("module").add_func(
+                "foo",
+                (bools,),
+                (),
+                pt.Block(
+                    [
+                        pt.VectorStore(pt.Var(bools), pt.VectorLoad(pt.Var(bools), 4)),
+                        pt.Return(()),
+                    ]
+                ),
+            )
+        four = pt.Vector(pt.Int32_t, [1, 2, 3, 4])
+        two = pt.Vector(pt.Int32_t, [1, 2])
+        for e in [
+            pt.Add(four, two),
+            pt.Add(four, pt.Int32(1)),
+            pt.ExtractLane(four, pt.Int32(4)),
+            pt.ExtractLane(pt.Int32(1), pt.Int32(0)),
+            pt.InsertLane(four, pt.Int32(0), pt.Int64(1)),
+            pt.Shuffle(four, four, [0, 8]),
+            pt.Shuffle(four, two, [0]),
+        ]:
+            with self.assertRaises(pt.TypeCheckError):
+                e.typecheck(TypeContext({}, ()))
@@ -0,0 +1,98 @@
+import array
+import gc
+import petra as pt
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore
+
+program = pt.Program("module")
+
+x, y = pt.Symbol(pt.Int32_t, "x"), pt.Symbol(pt.Int32_t, "y")
+f = pt.Symbol(pt.Float64_t, "f")
+
+program.add_func(
+    "axpy",
+    (x, y),
+    pt.Int32_t,
+    pt.Block([pt.Return(pt.Add(pt.Mul(pt.Int32(3), pt.Var(x)), pt.Var(y)))]),
+)
+program.add_func(
+    "positive", (x,), pt.Bool_t, pt.Block([pt.Return(pt.Gt(pt.Var(x), pt.Int32(0)))])
+)
+program.add_func("iden_f64", (f,), pt.Float64_t, pt.Block([pt.Return(pt.Var(f))]))
+program.add_vectorized("axpy_v", "axpy")
+program.add_vectorized("positive_v", "positive")
+program.add_vectorized("iden_f64_v", "iden_f64")
+
+
+class VectorizeTestCase(unittest.TestCase):
+    def test_buffers(self) -> None:
+        axpy = program.get_vectorized("axpy_v")
+        out = array.array("i", [0] * 5)
+        ones = memoryview(bytearray(b"\x01\0\0\0" * 5)).cast("i")
+        axpy(array.array("i", range(5)), ones, out=out)
+        self.assertEqual(out, array.array("i", [1, 4, 7, 10, 13]))
+
+    def test_memoryview_strided(self) -> None:
+        axpy = program.get_vectorized("axpy_v")
+        data = memoryview(array.array("i", range(10)))
+        out = array.array("i", [0] * 5)
+        axpy(data[::2], data[1::2], out=out)
+        self.assertEqual(out, array.array("i", [1, 9, 17, 25, 33]))
+
+    def test_opt_levels(self) -> None:
+        data = array.array("i", range(100))
+        for opt_level in range(4):
+            out = array.array("i", [0] * 100)
+            program.get_vectorized("axpy_v", opt_level)(data, data, out=out)
+            self.assertEqual(out, array.array("i", [4 * i for i in range(100)]))
+
+    def test_errors(self) -> None:
+        axpy = program.get_vectorized("axpy_v")
+        ints = array.array("i", range(5))
+        with self.assertRaises(TypeError):
+            axpy(array.array("d", range(5)), ints, out=array.array("i", ints))
+        with self.assertRaises(ValueError):
+            axpy(ints, array.array("i", range(4)), out=array.array("i", ints))
+        with self.assertRaises(BufferError):
+            axpy(ints, ints, out=bytes(20))
+        with self.assertRaises(TypeError):
+            axpy(ints, out=array.array("i", ints))
+        misaligned = memoryview(bytearray(21))[1:].cast("i")
+        with self.assertRaises(ValueError):
+            axpy(misaligned, ints, out=array.array("i", ints))
+        with self.assertRaises(ValueError):
+            axpy(ints, ints, out=misaligned)
+        with self.assertRaises(pt.TypeCheckError):
+            pt.Program("module").add_vectorized("missing_v", "missing")
+        with self.assertRaises(Exception):
+            program.get_vectorized("axpy")
+
+    def test_outlives_program(self) -> None:
+        collected = pt.Program("module")
+        collected.add_func("iden", (x,), pt.Int32_t, pt.Block([pt.Return(pt.Var(x))]))
+        collected.add_vectorized("iden_v", "iden")
+        iden = collected.get_vectorized("iden_v")
+        del collected
+        gc.collect()
+        out = array.array("i", [0] * 3)
+        iden(array.array("i", range(3)), out=out)
+        self.assertEqual(out, array.array("i", [0, 1, 2]))
+
+    def test_numpy(self) -> None:
+        if numpy is None:
+            self.skipTest("requires NumPy")
+        a = numpy.arange(1000, dtype=numpy.int32)
+        numpy.testing.assert_array_equal(
+            program.get_vectorized("axpy_v")(a, a[::-1]), 3 * a + a[::-1]
+        )
+        numpy.testing.assert_array_equal(
+            program.get_vectorized("positive_v")(a - 500), a > 500
+        )
+        b = numpy.linspace(0.0, 1.0, 12).reshape(3, 4)
+        numpy.testing.assert_array_equal(
+            program.get_vectorized("iden_f64_v")(b), b.ravel()
+        )